@@ -0,0 +1,84 @@
+""" Benchmark: cliente de Monday nuevo por request vs cliente compartido con pool keep-alive
+
+Levanta un servidor HTTP local que simula la API GraphQL de Monday y mide la latencia
+de N llamadas creando un MondayClient por llamada (comportamiento anterior de server.py)
+contra el cliente compartido de MondayClientPool.
+
+Uso:
+    python benchmarks/bench_monday_pool.py [cantidad_llamadas]
+"""
+
+import json
+import os
+import statistics
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monday import MondayClient
+from monday_pool import MondayClientPool
+
+RESPUESTA = json.dumps({"data": {"boards": [{"id": "1", "name": "Board"}]}}).encode("utf-8")
+
+
+class MondayStandIn(BaseHTTPRequestHandler):
+    """Responde cualquier POST con un json fijo manteniendo la conexion abierta"""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPUESTA)))
+        self.end_headers()
+        self.wfile.write(RESPUESTA)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def apuntar_a(client, url):
+    """Redirige todos los recursos del cliente al servidor local"""
+    for recurso in vars(client).values():
+        graphql_client = getattr(recurso, "client", None)
+        if graphql_client is not None:
+            graphql_client.endpoint = url
+    return client
+
+
+def medir(nombre, obtener_cliente, cantidad):
+    tiempos = []
+    for _ in range(cantidad):
+        inicio = time.perf_counter()
+        obtener_cliente().boards.fetch_boards(limit=1, page=1)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    p50 = statistics.median(tiempos)
+    p95 = tiempos[int(len(tiempos) * 0.95) - 1]
+    print(f"{nombre:<28} p50={p50:.3f} ms  p95={p95:.3f} ms  total={sum(tiempos):.1f} ms")
+    return p50
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MondayStandIn)
+    Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/v2"
+
+    pool = MondayClientPool()
+    cliente_compartido = apuntar_a(pool.get_client(MondayClient, "token"), url)
+
+    p50_nuevo = medir("cliente nuevo por request", lambda: apuntar_a(MondayClient("token"), url), cantidad)
+    p50_pool = medir("cliente compartido (pool)", lambda: cliente_compartido, cantidad)
+    print(f"mejora p50: {p50_nuevo / p50_pool:.1f}x (sin TLS; contra api.monday.com se suma el handshake)")
+
+    pool.cerrar()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
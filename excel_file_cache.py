@@ -0,0 +1,326 @@
+""" Cache de archivos de importacion direccionado por contenido
+
+Los archivos (descargados o locales) se guardan una sola vez en objetos/<sha256>.xlsx y
+se vinculan con hardlinks en procesa_archivos/<uid>/, asi analizar y despues importar el
+mismo excel no vuelve a descargarlo ni a copiarlo. Las urls se revalidan con
+If-None-Match / If-Modified-Since y los archivos locales por tamaño y fecha de
+modificacion. Cuando el cache supera MONDAY_CACHE_MAX_MB se eliminan los objetos usados
+hace mas tiempo.
+
+Las descargas se guardan en un archivo parcial por url y se retoman con requests Range
+si la conexion se corta, en este intento o en el siguiente intento del trabajo.
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import zipfile
+from threading import Lock
+
+import requests
+
+from monday_retry import PoliticaReintento
+
+logger = logging.getLogger(__name__)
+
+TAMANO_BLOQUE_HASH = 1024 * 1024
+
+
+class CacheArchivos:
+    """Objetos por hash de contenido y un indice json de origen -> hash"""
+    directorio:str
+    max_bytes:int
+
+    def __init__(self, directorio = None, max_bytes = None):
+        self.directorio = directorio or os.getenv("MONDAY_CACHE_DIR", "cache_archivos")
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("MONDAY_CACHE_MAX_MB", 1024)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = Lock()
+        self._locks_url = {}
+
+    def get_path_objeto(self, hash_contenido:str) -> str:
+        return os.path.join(self.directorio, "objetos", f"{hash_contenido}.xlsx")
+
+    def get_path_indice(self) -> str:
+        return os.path.join(self.directorio, "indice.json")
+
+    def leer_indice(self) -> dict:
+        try:
+            with open(self.get_path_indice(), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {"origenes": {}, "objetos": {}}
+
+    def guardar_indice(self, indice:dict):
+        os.makedirs(self.directorio, exist_ok=True)
+        temporal = f"{self.get_path_indice()}.tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(indice, f)
+        os.replace(temporal, self.get_path_indice())
+
+    def archivo_local(self, origen:str, destino:str) -> str:
+        """Vincula en destino el contenido de un archivo local, solo se copia al cache si cambio desde la ultima vez"""
+        stat = os.stat(origen)
+        clave = os.path.abspath(origen)
+        with self._lock:
+            indice = self.leer_indice()
+            entrada = indice["origenes"].get(clave)
+            if entrada and entrada["tamano"] == stat.st_size and entrada["mtime"] == stat.st_mtime_ns and self.existe(entrada["hash"]):
+                self.aciertos += 1
+                return self.vincular(indice, entrada["hash"], destino)
+            self.fallos += 1
+            os.makedirs(os.path.join(self.directorio, "objetos"), exist_ok=True)
+            temporal = os.path.join(self.directorio, "objetos", f".{os.getpid()}.{time.monotonic_ns()}.tmp")
+            shutil.copyfile(origen, temporal)
+            hash_contenido = self.agregar_objeto(indice, temporal)
+            indice["origenes"][clave] = {"hash": hash_contenido, "tamano": stat.st_size, "mtime": stat.st_mtime_ns}
+            return self.vincular(indice, hash_contenido, destino)
+
+    def archivo_url(self, url:str, destino:str, progreso = None) -> str:
+        """Vincula en destino el contenido de una url, si ya esta en el cache se revalida con ETag / Last-Modified"""
+        with self._lock:
+            lock_url = self._locks_url.setdefault(url, Lock())
+        #Dos importaciones de la misma url comparten el archivo parcial, se descarga de a una
+        with lock_url:
+            return self.descargar_url(url, destino, progreso)
+
+    def descargar_url(self, url:str, destino:str, progreso = None) -> str:
+        with self._lock:
+            indice = self.leer_indice()
+            entrada = indice["origenes"].get(url)
+        encabezados = {}
+        if entrada and self.existe(entrada["hash"]):
+            if entrada.get("etag"):
+                encabezados["If-None-Match"] = entrada["etag"]
+            if entrada.get("last_modified"):
+                encabezados["If-Modified-Since"] = entrada["last_modified"]
+        else:
+            entrada = None
+        os.makedirs(os.path.join(self.directorio, "objetos"), exist_ok=True)
+        #El parcial tiene un nombre fijo por url para retomar la descarga en el proximo intento del trabajo
+        temporal = os.path.join(self.directorio, "objetos", f".{hashlib.sha256(url.encode()).hexdigest()[:16]}.parcial")
+        try:
+            respuesta = descargar(url, temporal, encabezados, progreso)
+        except Exception as e:
+            if entrada is None:
+                raise
+            #Sin conexion con el origen se usa la ultima version descargada
+            logger.warning(f"No se pudo revalidar {url}, se usa la copia del cache: {e}")
+            respuesta = None
+        with self._lock:
+            indice = self.leer_indice()
+            if respuesta is None or respuesta.status_code == 304:
+                self.aciertos += 1
+                return self.vincular(indice, entrada["hash"], destino)
+            self.fallos += 1
+            hash_contenido = self.agregar_objeto(indice, temporal)
+            indice["origenes"][url] = {
+                "hash": hash_contenido,
+                "etag": respuesta.headers.get("ETag"),
+                "last_modified": respuesta.headers.get("Last-Modified"),
+            }
+            return self.vincular(indice, hash_contenido, destino)
+
+    def existe(self, hash_contenido:str) -> bool:
+        return os.path.exists(self.get_path_objeto(hash_contenido))
+
+    def agregar_objeto(self, indice:dict, temporal:str) -> str:
+        """Mueve el archivo temporal a su objeto por hash, si el contenido ya estaba se descarta"""
+        hash_contenido = calcular_hash(temporal)
+        path_objeto = self.get_path_objeto(hash_contenido)
+        if os.path.exists(path_objeto):
+            os.remove(temporal)
+        else:
+            os.replace(temporal, path_objeto)
+        indice["objetos"][hash_contenido] = {"tamano": os.path.getsize(path_objeto), "usado": time.time()}
+        return hash_contenido
+
+    def vincular(self, indice:dict, hash_contenido:str, destino:str) -> str:
+        """Crea destino como hardlink del objeto (copia si el sistema de archivos no lo permite) y guarda el indice"""
+        if os.path.lexists(destino):
+            os.remove(destino)
+        try:
+            os.link(self.get_path_objeto(hash_contenido), destino)
+        except OSError:
+            shutil.copyfile(self.get_path_objeto(hash_contenido), destino)
+        objeto = indice["objetos"].setdefault(hash_contenido, {"tamano": os.path.getsize(destino)})
+        objeto["usado"] = time.time()
+        self.purgar(indice, hash_contenido)
+        self.guardar_indice(indice)
+        return hash_contenido
+
+    def purgar(self, indice:dict, conservar:str = None):
+        """Elimina los objetos usados hace mas tiempo hasta quedar dentro de max_bytes.
+        Los archivos ya vinculados en procesa_archivos no se pierden, el hardlink mantiene el contenido"""
+        objetos = indice["objetos"]
+        total = sum(objeto["tamano"] for objeto in objetos.values())
+        for hash_contenido in sorted(objetos, key=lambda clave: objetos[clave]["usado"]):
+            if total <= self.max_bytes:
+                break
+            if hash_contenido == conservar:
+                continue
+            total -= objetos.pop(hash_contenido)["tamano"]
+            if self.existe(hash_contenido):
+                os.remove(self.get_path_objeto(hash_contenido))
+            logger.info(f"Cache de archivos: se elimina {hash_contenido}")
+        hashes = set(objetos)
+        indice["origenes"] = {clave: entrada for clave, entrada in indice["origenes"].items() if entrada["hash"] in hashes}
+
+    def estado(self) -> dict:
+        with self._lock:
+            indice = self.leer_indice()
+        return {
+            "objetos": len(indice["objetos"]),
+            "bytes": sum(objeto["tamano"] for objeto in indice["objetos"].values()),
+            "max_bytes": self.max_bytes,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+        }
+
+
+def calcular_hash(path:str) -> str:
+    """sha256 del contenido del archivo"""
+    hash_contenido = hashlib.sha256()
+    with open(path, "rb") as f:
+        for bloque in iter(lambda: f.read(TAMANO_BLOQUE_HASH), b""):
+            hash_contenido.update(bloque)
+    return hash_contenido.hexdigest()
+
+
+class DescargaInvalida(Exception):
+    """El archivo descargado no coincide con el tamaño o el digest informados por el servidor"""
+
+
+def descargar(url:str, destino:str, encabezados:dict = None, progreso = None):
+    """GET de la url guardando el cuerpo en destino, devuelve la respuesta (304 si no cambio).
+
+    Si destino ya tiene una parte descargada se pide el resto con Range / If-Range, y ante
+    cortes de conexion se reintenta desde lo descargado. Al terminar se verifica el tamaño,
+    el digest sha-256 si el servidor lo envia y que el archivo sea un xlsx (zip) valido.
+    progreso(descargados, total, bytes_por_segundo, reintentos) se llama en cada chunk.
+    """
+    chunk_size = int(float(os.getenv("MONDAY_DESCARGA_CHUNK_KB", 1024)) * 1024)
+    timeout = float(os.getenv("MONDAY_DESCARGA_TIMEOUT", 30))
+    politica = PoliticaReintento(max_intentos=int(os.getenv("MONDAY_DESCARGA_INTENTOS", 5)))
+    path_validador = f"{destino}.validador"
+    intento = 0
+    while True:
+        try:
+            return descargar_intento(url, destino, path_validador, encabezados or {}, chunk_size, timeout, progreso, intento)
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError, DescargaInvalida) as e:
+            error = e
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code < 500:
+                raise
+            error = e
+        intento += 1
+        if intento >= politica.max_intentos:
+            raise error
+        espera = politica.calcular_espera(intento)
+        logger.warning(f"Descarga de {url} interrumpida ({error}), reintento {intento} en {espera:.1f}s")
+        time.sleep(espera)
+
+
+def descargar_intento(url:str, destino:str, path_validador:str, encabezados:dict, chunk_size:int, timeout:float, progreso, reintentos:int):
+    """Un GET de la descarga, retoma desde el tamaño actual de destino si el servidor conserva el mismo validador"""
+    existente = os.path.getsize(destino) if os.path.exists(destino) else 0
+    validador = None
+    if os.path.exists(path_validador):
+        with open(path_validador, "r", encoding="utf-8") as f:
+            validador = f.read() or None
+    encabezados = dict(encabezados)
+    if existente > 0 and validador:
+        encabezados["Range"] = f"bytes={existente}-"
+        encabezados["If-Range"] = validador
+    else:
+        existente = 0
+    with requests.get(url, stream=True, timeout=timeout, headers=encabezados) as r:
+        if r.status_code == 304:
+            return r
+        if r.status_code == 416:
+            #La parte guardada no corresponde al archivo actual, se descarga de nuevo
+            eliminar_parcial(destino, path_validador)
+            raise DescargaInvalida(f"Rango no valido al retomar {url}")
+        if r.status_code not in (200, 206):
+            raise requests.HTTPError(f"HTTP {r.status_code} al descargar {url}", response=r)
+        if r.status_code == 200:
+            existente = 0
+            total = int(r.headers["Content-Length"]) if r.headers.get("Content-Length") else None
+        else:
+            inicio_rango, total = leer_content_range(r.headers.get("Content-Range"))
+            if inicio_rango != existente:
+                eliminar_parcial(destino, path_validador)
+                raise DescargaInvalida(f"El servidor respondio un rango distinto al pedido: {r.headers.get('Content-Range')}")
+        nuevo_validador = r.headers.get("ETag") or r.headers.get("Last-Modified") or ""
+        with open(path_validador, "w", encoding="utf-8") as f:
+            f.write(nuevo_validador)
+        descargados = existente
+        inicio = time.monotonic()
+        with open(destino, "ab" if existente else "wb") as f:
+            for chunk in r.iter_content(chunk_size=chunk_size):
+                f.write(chunk)
+                descargados += len(chunk)
+                if progreso is not None:
+                    segundos = time.monotonic() - inicio
+                    progreso(descargados, total, (descargados - existente) / segundos if segundos > 0 else None, reintentos)
+        if total is not None and descargados != total:
+            raise DescargaInvalida(f"Descarga incompleta de {url}: {descargados} de {total} bytes")
+        verificar_integridad(destino, path_validador, r.headers)
+        os.remove(path_validador)
+        return r
+
+
+def leer_content_range(content_range:str):
+    """Devuelve el byte inicial y el tamaño total de un encabezado 'bytes inicio-fin/total'"""
+    try:
+        rango, total = content_range.split(" ", 1)[1].split("/")
+        return int(rango.split("-")[0]), (int(total) if total != "*" else None)
+    except (AttributeError, IndexError, ValueError):
+        raise DescargaInvalida(f"Content-Range invalido: {content_range}")
+
+
+def verificar_integridad(destino:str, path_validador:str, headers):
+    """Compara el sha-256 con Digest / Repr-Digest si el servidor lo envia y verifica que el xlsx sea un zip valido"""
+    esperado = None
+    for encabezado in ("Repr-Digest", "Digest"):
+        for valor in (headers.get(encabezado) or "").split(","):
+            algoritmo, _, digest = valor.strip().partition("=")
+            if algoritmo.lower() == "sha-256" and digest:
+                esperado = digest.strip(":")
+    if esperado is not None:
+        hash_contenido = hashlib.sha256()
+        with open(destino, "rb") as f:
+            for bloque in iter(lambda: f.read(TAMANO_BLOQUE_HASH), b""):
+                hash_contenido.update(bloque)
+        if base64.b64encode(hash_contenido.digest()).decode() != esperado:
+            eliminar_parcial(destino, path_validador)
+            raise DescargaInvalida("El sha-256 del archivo descargado no coincide con el informado por el servidor")
+    if not zipfile.is_zipfile(destino):
+        eliminar_parcial(destino, path_validador)
+        raise DescargaInvalida("El archivo descargado no es un xlsx valido")
+
+
+def eliminar_parcial(destino:str, path_validador:str):
+    for path in (destino, path_validador):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+_cache_archivos = None
+_cache_archivos_lock = Lock()
+
+
+def get_cache_archivos() -> CacheArchivos:
+    """Devuelve el cache de archivos compartido por todo el proceso"""
+    global _cache_archivos
+    with _cache_archivos_lock:
+        if _cache_archivos is None:
+            _cache_archivos = CacheArchivos()
+        return _cache_archivos
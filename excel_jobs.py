@@ -0,0 +1,379 @@
+""" Cola persistente de importaciones de excel y pool acotado de workers
+
+Cada pedido a /monday/read_excel se guarda como un trabajo en una base SQLite y lo
+toma alguno de los workers del pool (MONDAY_IMPORT_CONCURRENCIA importaciones a la vez),
+por prioridad y orden de llegada. Cada trabajo en proceso guarda su dueño (host:pid) y un
+latido que el pool renueva cada MONDAY_IMPORT_LATIDO segundos. Un trabajo que quedo procesando
+vuelve a la cola para continuar desde su estado solo cuando su dueño ya no existe (mismo host)
+o su latido vencio (MONDAY_IMPORT_LEASE segundos), asi otro worker de uvicorn no retoma una
+importacion que sigue viva.
+"""
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+from threading import Condition, Lock, Thread
+
+logger = logging.getLogger(__name__)
+
+PENDIENTE = "pendiente"
+PROCESANDO = "procesando"
+FINALIZADO = "finalizado"
+ERROR = "error"
+DETENIDO = "detenido"
+ESTADOS_ACTIVOS = (PENDIENTE, PROCESANDO)
+
+
+class Trabajo:
+    """Importacion registrada en la cola"""
+    uid:str
+    estado:str
+    prioridad:int
+    params:dict
+    creado:float
+    iniciado:float
+    finalizado:float
+    mensaje:str
+    intentos:int
+    duenio:str
+    latido:float
+
+    def __init__(self, uid:str, estado:str, prioridad:int, params:dict, creado:float = None, iniciado:float = None, finalizado:float = None, mensaje:str = "", intentos:int = 0, duenio:str = None, latido:float = None):
+        self.uid = uid
+        self.estado = estado
+        self.prioridad = prioridad
+        self.params = params
+        self.creado = creado
+        self.iniciado = iniciado
+        self.finalizado = finalizado
+        self.mensaje = mensaje
+        self.intentos = intentos
+        self.duenio = duenio
+        self.latido = latido
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(row["uid"], row["estado"], row["prioridad"], json.loads(row["params"]), row["creado"], row["iniciado"], row["finalizado"], row["mensaje"] or "", row["intentos"], row["duenio"], row["latido"])
+
+
+class ColaTrabajos:
+    """Cola de trabajos de importacion guardada en SQLite"""
+    path:str
+    lease:float
+
+    def __init__(self, path = None, lease = None):
+        self.path = path or os.getenv("MONDAY_JOBS_DB", "monday_trabajos.db")
+        self.lease = float(lease or os.getenv("MONDAY_IMPORT_LEASE", 60))
+        self._lock = Lock()
+        self._creada = False
+
+    def conectar(self) -> sqlite3.Connection:
+        conexion = sqlite3.connect(self.path, timeout=30)
+        conexion.row_factory = sqlite3.Row
+        if not self._creada:
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("""
+                CREATE TABLE IF NOT EXISTS trabajos (
+                    uid TEXT PRIMARY KEY,
+                    estado TEXT NOT NULL,
+                    prioridad INTEGER NOT NULL DEFAULT 0,
+                    params TEXT NOT NULL,
+                    creado REAL NOT NULL,
+                    iniciado REAL,
+                    finalizado REAL,
+                    mensaje TEXT,
+                    intentos INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            columnas = {columna["name"] for columna in conexion.execute("PRAGMA table_info(trabajos)")}
+            #Bases creadas antes de registrar el dueño y el latido de cada trabajo
+            for columna in ("duenio TEXT", "latido REAL"):
+                if columna.split()[0] not in columnas:
+                    conexion.execute(f"ALTER TABLE trabajos ADD COLUMN {columna}")
+            conexion.execute("CREATE INDEX IF NOT EXISTS trabajos_cola ON trabajos (estado, prioridad DESC, creado)")
+            conexion.commit()
+            self._creada = True
+        return conexion
+
+    @staticmethod
+    def get_duenio() -> str:
+        """Identificador del proceso que toma los trabajos"""
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def encolar(self, uid:str, params:dict, prioridad:int = 0) -> Trabajo:
+        """Agrega un trabajo a la cola, si el uid ya existe (continuar un proceso) vuelve a quedar pendiente.
+        Un trabajo que se esta procesando no se modifica, el trabajo devuelto queda en estado procesando"""
+        with self._lock:
+            conexion = self.conectar()
+            try:
+                conexion.execute("""
+                    INSERT INTO trabajos (uid, estado, prioridad, params, creado) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(uid) DO UPDATE SET estado = excluded.estado, prioridad = excluded.prioridad,
+                        params = excluded.params, creado = excluded.creado, iniciado = NULL, finalizado = NULL, mensaje = NULL
+                    WHERE trabajos.estado != ?
+                """, (uid, PENDIENTE, prioridad, json.dumps(params), time.time(), PROCESANDO))
+                conexion.commit()
+            finally:
+                conexion.close()
+        return self.get(uid)
+
+    def tomar(self) -> Trabajo:
+        """Toma el trabajo pendiente de mayor prioridad y lo marca como procesando, None si la cola esta vacia"""
+        with self._lock:
+            conexion = self.conectar()
+            try:
+                conexion.execute("BEGIN IMMEDIATE")
+                row = conexion.execute(
+                    "SELECT * FROM trabajos WHERE estado = ? ORDER BY prioridad DESC, creado LIMIT 1", (PENDIENTE,)
+                ).fetchone()
+                if row is None:
+                    conexion.rollback()
+                    return None
+                ahora = time.time()
+                conexion.execute(
+                    "UPDATE trabajos SET estado = ?, iniciado = ?, intentos = intentos + 1, duenio = ?, latido = ? WHERE uid = ?",
+                    (PROCESANDO, ahora, self.get_duenio(), ahora, row["uid"])
+                )
+                conexion.commit()
+            finally:
+                conexion.close()
+        trabajo = Trabajo.from_row(row)
+        trabajo.estado = PROCESANDO
+        trabajo.intentos += 1
+        trabajo.duenio = self.get_duenio()
+        trabajo.latido = ahora
+        return trabajo
+
+    def latir(self, uids:list) -> int:
+        """Renueva el latido de los trabajos que este proceso esta procesando"""
+        if not uids:
+            return 0
+        with self._lock:
+            conexion = self.conectar()
+            try:
+                cursor = conexion.execute(
+                    f"UPDATE trabajos SET latido = ? WHERE estado = ? AND duenio = ? AND uid IN ({','.join('?' * len(uids))})",
+                    (time.time(), PROCESANDO, self.get_duenio(), *uids)
+                )
+                conexion.commit()
+                return cursor.rowcount
+            finally:
+                conexion.close()
+
+    def abandonado(self, trabajo:Trabajo) -> bool:
+        """True si el proceso dueño del trabajo ya no existe o dejo de renovar el latido"""
+        if trabajo.duenio is None or trabajo.latido is None or trabajo.latido < time.time() - self.lease:
+            return True
+        host, _, pid = trabajo.duenio.rpartition(":")
+        if host != socket.gethostname() or not pid.isdigit() or int(pid) == os.getpid():
+            return False
+        #En el mismo host se puede saber si el proceso dueño sigue vivo sin esperar el lease
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            return False
+        return False
+
+    def finalizar(self, uid:str, estado:str, mensaje:str = ""):
+        """Registra el resultado de un trabajo"""
+        with self._lock:
+            conexion = self.conectar()
+            try:
+                conexion.execute(
+                    "UPDATE trabajos SET estado = ?, finalizado = ?, mensaje = ? WHERE uid = ?",
+                    (estado, time.time(), mensaje, uid)
+                )
+                conexion.commit()
+            finally:
+                conexion.close()
+
+    def cancelar(self, uid:str) -> bool:
+        """Marca como detenido un trabajo que todavia no empezo"""
+        with self._lock:
+            conexion = self.conectar()
+            try:
+                cursor = conexion.execute(
+                    "UPDATE trabajos SET estado = ?, finalizado = ? WHERE uid = ? AND estado = ?",
+                    (DETENIDO, time.time(), uid, PENDIENTE)
+                )
+                conexion.commit()
+                return cursor.rowcount > 0
+            finally:
+                conexion.close()
+
+    def recuperar_interrumpidos(self) -> list:
+        """Vuelve a encolar los trabajos procesando cuyo dueño ya no existe o no renueva el latido, continuan desde el estado guardado"""
+        recuperados = []
+        for trabajo in self.listar([PROCESANDO]):
+            if not self.abandonado(trabajo):
+                continue
+            params = dict(trabajo.params)
+            params["continuar"] = "True"
+            params["uid"] = trabajo.uid
+            if self.reencolar(trabajo.uid, params, trabajo.duenio, trabajo.latido):
+                recuperados.append(trabajo.uid)
+                logger.info(f"Trabajo interrumpido vuelve a la cola: {trabajo.uid}")
+        return recuperados
+
+    def reencolar(self, uid:str, params:dict, duenio:str = None, latido:float = None) -> bool:
+        """Vuelve a dejar pendiente un trabajo que quedo procesando, si no cambio de dueño ni latido desde que se leyo"""
+        with self._lock:
+            conexion = self.conectar()
+            try:
+                cursor = conexion.execute(
+                    """UPDATE trabajos SET estado = ?, params = ?, iniciado = NULL, duenio = NULL, latido = NULL
+                       WHERE uid = ? AND estado = ? AND duenio IS ? AND latido IS ?""",
+                    (PENDIENTE, json.dumps(params), uid, PROCESANDO, duenio, latido)
+                )
+                conexion.commit()
+                return cursor.rowcount > 0
+            finally:
+                conexion.close()
+
+    def get(self, uid:str) -> Trabajo:
+        conexion = self.conectar()
+        try:
+            row = conexion.execute("SELECT * FROM trabajos WHERE uid = ?", (uid,)).fetchone()
+        finally:
+            conexion.close()
+        return Trabajo.from_row(row) if row is not None else None
+
+    def listar(self, estados = None) -> list:
+        """Lista los trabajos, opcionalmente filtrados por estado, en orden de ejecucion"""
+        conexion = self.conectar()
+        try:
+            if estados:
+                rows = conexion.execute(
+                    f"SELECT * FROM trabajos WHERE estado IN ({','.join('?' * len(estados))}) ORDER BY prioridad DESC, creado",
+                    tuple(estados)
+                ).fetchall()
+            else:
+                rows = conexion.execute("SELECT * FROM trabajos ORDER BY prioridad DESC, creado").fetchall()
+        finally:
+            conexion.close()
+        return [Trabajo.from_row(row) for row in rows]
+
+    def purgar_finalizados(self) -> int:
+        """Elimina de la cola los trabajos que ya no estan activos"""
+        with self._lock:
+            conexion = self.conectar()
+            try:
+                cursor = conexion.execute(
+                    f"DELETE FROM trabajos WHERE estado NOT IN ({','.join('?' * len(ESTADOS_ACTIVOS))})", ESTADOS_ACTIVOS
+                )
+                conexion.commit()
+                return cursor.rowcount
+            finally:
+                conexion.close()
+
+
+class PoolImportaciones:
+    """Workers que toman trabajos de la cola y los procesan, como maximo max_workers a la vez.
+
+    procesar(trabajo) se ejecuta en el hilo del worker y debe devolver el estado final y
+    el mensaje del trabajo. Mientras un trabajo se procesa, activos[uid] guarda el objeto
+    que se registro con registrar_activo, para consultar el avance o pedir que se detenga.
+    Un hilo aparte renueva el latido de los trabajos en proceso y recupera los abandonados
+    por otros procesos.
+    """
+    max_workers:int
+    intervalo_latido:float
+
+    def __init__(self, cola:ColaTrabajos, procesar, max_workers = None, intervalo_latido = None):
+        self.cola = cola
+        self.procesar = procesar
+        self.max_workers = int(max_workers or os.getenv("MONDAY_IMPORT_CONCURRENCIA", 2))
+        self.intervalo_latido = float(intervalo_latido or os.getenv("MONDAY_IMPORT_LATIDO", 10))
+        self.activos = {}
+        self.en_proceso = set()
+        self._workers = []
+        self._condicion = Condition()
+        self._detenido = False
+
+    def iniciar(self):
+        """Inicia los workers, si ya estan corriendo no hace nada"""
+        with self._condicion:
+            if self._workers:
+                return
+            self._detenido = False
+            for numero in range(self.max_workers):
+                worker = Thread(target=self.trabajar, name=f"importacion-{numero}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+            latido = Thread(target=self.latir, name="importacion-latido", daemon=True)
+            latido.start()
+            self._workers.append(latido)
+        logger.info(f"Pool de importaciones iniciado con {self.max_workers} workers")
+
+    def encolar(self, uid:str, params:dict, prioridad:int = 0) -> Trabajo:
+        """Guarda el trabajo en la cola y despierta a un worker"""
+        trabajo = self.cola.encolar(uid, params, prioridad)
+        self.iniciar()
+        with self._condicion:
+            self._condicion.notify()
+        return trabajo
+
+    def latir(self):
+        """Renueva el latido de los trabajos en proceso y vuelve a encolar los abandonados por otros procesos"""
+        while True:
+            with self._condicion:
+                if self._detenido:
+                    return
+                self._condicion.wait(timeout=self.intervalo_latido)
+                if self._detenido:
+                    return
+            try:
+                self.cola.latir(list(self.en_proceso))
+                if self.cola.recuperar_interrumpidos():
+                    with self._condicion:
+                        self._condicion.notify_all()
+            except Exception as e:
+                logger.error(f"No se pudo renovar el latido de las importaciones: {e}")
+
+    def registrar_activo(self, uid:str, proceso):
+        self.activos[uid] = proceso
+
+    def trabajar(self):
+        """Loop de un worker"""
+        while True:
+            with self._condicion:
+                if self._detenido:
+                    return
+            trabajo = self.cola.tomar()
+            if trabajo is None:
+                with self._condicion:
+                    self._condicion.wait(timeout=1)
+                continue
+            logger.info(f"Inicia trabajo {trabajo.uid} prioridad {trabajo.prioridad}")
+            self.en_proceso.add(trabajo.uid)
+            try:
+                estado, mensaje = self.procesar(trabajo)
+            except Exception as e:
+                logger.error(f"Error en el trabajo {trabajo.uid}: {e}")
+                estado, mensaje = ERROR, str(e)
+            finally:
+                self.activos.pop(trabajo.uid, None)
+                self.en_proceso.discard(trabajo.uid)
+            if estado == DETENIDO and self._detenido:
+                #Detenido por el cierre del servicio: queda procesando para retomarlo al reiniciar
+                logger.info(f"Trabajo {trabajo.uid} interrumpido por el cierre del servicio")
+                return
+            self.cola.finalizar(trabajo.uid, estado, mensaje)
+            logger.info(f"Fin trabajo {trabajo.uid}: {estado}")
+
+    def detener(self, timeout:float = 5):
+        """Detiene los workers, los trabajos en curso quedan procesando y se retoman al reiniciar"""
+        with self._condicion:
+            self._detenido = True
+            self._condicion.notify_all()
+            workers = self._workers
+            self._workers = []
+        for proceso in list(self.activos.values()):
+            proceso.detener = True
+        for worker in workers:
+            worker.join(timeout)
@@ -0,0 +1,82 @@
+""" Journal de avance de las importaciones de excel
+
+Cada elemento creado en Monday se agrega como una linea json a procesa_archivos/<uid>/journal.jsonl
+(fila del excel -> id de monday). Las lineas se escriben por lotes, cada MONDAY_JOURNAL_FILAS
+entradas o MONDAY_JOURNAL_SEGUNDOS segundos, con un solo write y fsync. Al continuar un proceso
+el journal se aplica sobre el ultimo data.json, asi una caida en medio de la importacion pierde
+como maximo el ultimo lote y no todos los ids creados.
+"""
+
+import json
+import logging
+import os
+import time
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+
+class JournalImportacion:
+    """Archivo de entradas json solo de agregado, confirmadas por lotes con fsync"""
+    path:str
+    cada_filas:int
+    cada_segundos:float
+
+    def __init__(self, path:str, cada_filas = None, cada_segundos = None):
+        self.path = path
+        self.cada_filas = int(cada_filas or os.getenv("MONDAY_JOURNAL_FILAS", 50))
+        self.cada_segundos = float(cada_segundos if cada_segundos is not None else os.getenv("MONDAY_JOURNAL_SEGUNDOS", 1))
+        self.pendientes = []
+        self.ultima_confirmacion = time.monotonic()
+        self._lock = Lock()
+
+    def registrar(self, entrada:dict, forzar:bool = False):
+        """Agrega una entrada, se escribe al completar el lote o pasado cada_segundos desde la ultima escritura"""
+        with self._lock:
+            self.pendientes.append(json.dumps(entrada))
+            if forzar or len(self.pendientes) >= self.cada_filas or time.monotonic() - self.ultima_confirmacion >= self.cada_segundos:
+                self._confirmar()
+
+    def registrar_varios(self, entradas:list, forzar:bool = False):
+        """Agrega varias entradas juntas, con forzar se escriben todas con un solo fsync"""
+        with self._lock:
+            self.pendientes.extend(json.dumps(entrada) for entrada in entradas)
+            if forzar or len(self.pendientes) >= self.cada_filas or time.monotonic() - self.ultima_confirmacion >= self.cada_segundos:
+                self._confirmar()
+
+    def confirmar(self):
+        """Escribe las entradas pendientes"""
+        with self._lock:
+            self._confirmar()
+
+    def _confirmar(self):
+        self.ultima_confirmacion = time.monotonic()
+        if not self.pendientes:
+            return
+        texto = "\n".join(self.pendientes) + "\n"
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(texto)
+            f.flush()
+            os.fsync(f.fileno())
+        self.pendientes = []
+
+    def eliminar(self):
+        """Descarta el journal, por ejemplo cuando el estado completo ya quedo en data.json"""
+        with self._lock:
+            self.pendientes = []
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+def leer_journal(path:str) -> list:
+    """Entradas confirmadas del journal, una linea incompleta al final (caida durante la escritura) se ignora"""
+    if not os.path.exists(path):
+        return []
+    entradas = []
+    with open(path, "r", encoding="utf-8") as f:
+        for numero, linea in enumerate(f):
+            try:
+                entradas.append(json.loads(linea))
+            except ValueError:
+                logger.warning(f"Journal {path}: linea {numero + 1} incompleta, se ignora")
+    return entradas
@@ -0,0 +1,252 @@
+""" Plan de importacion del excel: arbol board -> grupos -> items -> subitems
+
+La importacion se hace en dos fases. Primero se arma el arbol completo a partir de los
+niveles de Outline Level de cada fila, sin llamar a Monday. Despues EjecutorPlan crea los
+nodos por niveles: un nodo se crea recien cuando existe su padre, los hijos de un mismo
+padre se crean en el orden del excel y los hijos de padres distintos (por ejemplo items
+de grupos distintos) se crean en paralelo.
+
+En modo streaming el plan se arma con ArmadorPlan a medida que se leen las filas y se
+ejecuta por bloques, descartando los nodos ya creados antes de leer el bloque siguiente.
+"""
+
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+#Tipo de padre que necesita cada tipo de fila, ver ExcelUtilsMonday.identify_type
+TIPO_PADRE = {
+    "board": None,
+    "group": "board",
+    "item": "group",
+    "subiteml1": "item",
+    "subiteml2": "item",
+    "subiteml3": "item",
+    "subiteml4": "item",
+}
+
+
+class NodoPlan:
+    """Fila del excel que se convierte en un elemento de Monday"""
+    fila:int
+    tipo:str
+    titulo:str
+    fecha_inicio:str
+    fecha_fin:str
+    monday_id:str
+    creado:bool
+    grupo_inicial_eliminado:bool
+
+    def __init__(self, fila:int, tipo:str, titulo:str, fecha_inicio:str = None, fecha_fin:str = None, padre = None):
+        self.fila = fila
+        self.tipo = tipo
+        self.titulo = titulo
+        self.fecha_inicio = fecha_inicio
+        self.fecha_fin = fecha_fin
+        self.padre = padre
+        self.hijos = []
+        self.monday_id = None
+        self.creado = False
+        #En los boards: ya se creo el primer grupo, que elimina el grupo inicial de monday
+        self.grupo_inicial_eliminado = False
+
+    def __repr__(self):
+        return f"NodoPlan {self.tipo} fila:{self.fila} {self.titulo}"
+
+    def clave(self) -> str:
+        """Clave estable de la fila: posicion y hash del titulo, si el excel cambia la fila no se confunde con otra"""
+        return f"{self.fila}:{hashlib.sha1(str(self.titulo).encode('utf-8')).hexdigest()[:12]}"
+
+
+class PlanImportacion:
+    """Arbol de nodos a crear en Monday, con fila_inicio el plan cubre solo las filas desde esa posicion"""
+    cantidad_filas:int
+    fila_inicio:int
+
+    def __init__(self, cantidad_filas:int = 0, fila_inicio:int = 0):
+        self.cantidad_filas = cantidad_filas
+        self.fila_inicio = fila_inicio
+        self.raices = []
+        self.nodos = []
+        #Filas cuyo tipo necesita un padre que no aparece antes en el excel
+        self.huerfanos = []
+
+    def agregar(self, nodo:NodoPlan):
+        self.nodos.append(nodo)
+        #Raices: nodos desde donde empieza la creacion, sin padre o con el padre creado en un bloque anterior
+        if nodo.padre is None or nodo.padre.monday_id is not None:
+            self.raices.append(nodo)
+        else:
+            nodo.padre.hijos.append(nodo)
+
+    def niveles(self):
+        """Devuelve los nodos agrupados por profundidad en el arbol"""
+        niveles = []
+        nivel = self.raices
+        while nivel:
+            niveles.append(nivel)
+            nivel = [hijo for nodo in nivel for hijo in nodo.hijos]
+        return niveles
+
+    def contar(self):
+        """Cantidad de nodos por tipo"""
+        cantidades = {}
+        for nodo in self.nodos:
+            cantidades[nodo.tipo] = cantidades.get(nodo.tipo, 0) + 1
+        return cantidades
+
+    def pendientes(self):
+        """Nodos que todavia no tienen id de Monday"""
+        return [nodo for nodo in self.nodos if nodo.monday_id is None]
+
+    def to_columnas(self) -> dict:
+        """Representacion compacta del arbol: por fila su tipo y la fila de su padre (-1 raiz, None si la fila no se importa)"""
+        tipos = [None] * self.cantidad_filas
+        padres = [None] * self.cantidad_filas
+        for nodo in self.nodos:
+            tipos[nodo.fila] = nodo.tipo
+            padres[nodo.fila] = nodo.padre.fila if nodo.padre is not None else -1
+        return {
+            "tipos": tipos,
+            "padres": padres,
+            "huerfanos": [(nodo.fila, nodo.tipo) for nodo in self.huerfanos],
+        }
+
+    @classmethod
+    def desde_columnas(cls, filas:list, columnas:dict, cantidad_filas:int = None):
+        """Reconstruye el plan de to_columnas, con cantidad_filas solo se incluyen las primeras filas"""
+        if cantidad_filas is None:
+            cantidad_filas = len(filas)
+        plan = cls(cantidad_filas)
+        por_fila = {}
+        for fila in range(cantidad_filas):
+            tipo = columnas["tipos"][fila]
+            if tipo is None:
+                continue
+            titulo, fecha_inicio, fecha_fin, outline_lvl = filas[fila]
+            padre = columnas["padres"][fila]
+            nodo = NodoPlan(fila, tipo, titulo, fecha_inicio, fecha_fin, por_fila[padre] if padre >= 0 else None)
+            por_fila[fila] = nodo
+            plan.agregar(nodo)
+        for fila, tipo in columnas["huerfanos"]:
+            if fila < cantidad_filas:
+                titulo, fecha_inicio, fecha_fin, outline_lvl = filas[fila]
+                plan.huerfanos.append(NodoPlan(fila, tipo, titulo, fecha_inicio, fecha_fin))
+        return plan
+
+    def descartar_creados(self):
+        """Quita del plan los nodos ya creados para leer el siguiente bloque de filas sin acumular memoria"""
+        for nodo in self.nodos:
+            if nodo.monday_id is not None:
+                nodo.hijos.clear()
+        self.nodos = [nodo for nodo in self.nodos if nodo.monday_id is None]
+        self.raices = [nodo for nodo in self.nodos if nodo.padre is None or nodo.padre.monday_id is not None]
+        self.huerfanos = []
+        self.fila_inicio = self.cantidad_filas
+
+    def ultima_fila_completa(self) -> int:
+        """Ultima fila tal que todas las anteriores ya fueron procesadas"""
+        por_fila = {nodo.fila: nodo for nodo in self.nodos}
+        pos = max(self.fila_inicio - 1, 0)
+        for fila in range(self.fila_inicio, self.cantidad_filas):
+            nodo = por_fila.get(fila)
+            if nodo is not None and nodo.monday_id is None:
+                break
+            pos = fila
+        return pos
+
+
+class ArmadorPlan:
+    """Agrega las filas del excel de a una al plan, recordando el ultimo board, grupo e item"""
+
+    def __init__(self, plan:PlanImportacion, identify_type, cargar_niveles_superiores:bool = False):
+        self.plan = plan
+        self.identify_type = identify_type
+        self.cargar_niveles_superiores = cargar_niveles_superiores
+        self.ultimos = {}
+
+    def agregar(self, fila:int, registro:tuple):
+        titulo, fecha_inicio, fecha_fin, outline_lvl = registro
+        tipo = self.identify_type(outline_lvl)
+        if tipo not in TIPO_PADRE:
+            return
+        if tipo in ("subiteml2", "subiteml3", "subiteml4") and not self.cargar_niveles_superiores:
+            return
+        tipo_padre = TIPO_PADRE[tipo]
+        padre = self.ultimos.get(tipo_padre) if tipo_padre is not None else None
+        nodo = NodoPlan(fila, tipo, titulo, fecha_inicio, fecha_fin, padre)
+        if tipo_padre is not None and padre is None:
+            logger.warning(f"Fila {fila + 1}: {tipo} sin {tipo_padre}, no se importa")
+            self.plan.huerfanos.append(nodo)
+            return
+        self.plan.agregar(nodo)
+        if tipo in ("board", "group", "item"):
+            self.ultimos[tipo] = nodo
+            #Un board o grupo nuevo cierra los grupos e items anteriores
+            if tipo == "board":
+                self.ultimos.pop("group", None)
+                self.ultimos.pop("item", None)
+            if tipo == "group":
+                self.ultimos.pop("item", None)
+
+
+def armar_plan(filas:list, identify_type, cargar_niveles_superiores:bool = False) -> PlanImportacion:
+    """Arma el arbol de importacion a partir de los registros (titulo, inicio, fin, nivel) del excel"""
+    plan = PlanImportacion(len(filas))
+    armador = ArmadorPlan(plan, identify_type, cargar_niveles_superiores)
+    for fila, registro in enumerate(filas):
+        armador.agregar(fila, registro)
+    return plan
+
+
+class EjecutorPlan:
+    """Crea los nodos del plan por niveles del arbol.
+
+    crear_nodo(nodo) debe crear el elemento en Monday y asignar nodo.monday_id. Los nodos
+    que ya tienen monday_id (por ejemplo al continuar un proceso) no se vuelven a crear.
+    antes_de_nivel(nodos), si se indica, recibe los nodos pendientes de cada nivel antes de crearlos.
+    """
+    max_workers:int
+
+    def __init__(self, crear_nodo, max_workers = None, detener = None, antes_de_nivel = None):
+        self.crear_nodo = crear_nodo
+        self.max_workers = int(max_workers or os.getenv("MONDAY_IMPORT_WORKERS", 4))
+        self.detener = detener
+        self.antes_de_nivel = antes_de_nivel
+
+    def detenido(self) -> bool:
+        return self.detener is not None and self.detener()
+
+    def crear_hermanos(self, hermanos:list):
+        """Crea en orden los hijos de un mismo padre"""
+        for nodo in hermanos:
+            if self.detenido():
+                return
+            if nodo.monday_id is None:
+                self.crear_nodo(nodo)
+                nodo.creado = True
+
+    def ejecutar(self, plan:PlanImportacion):
+        """Crea todos los nodos pendientes del plan, lanza el primer error si alguna rama falla"""
+        nivel = plan.raices
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="importacion") as pool:
+            while nivel and not self.detenido():
+                pendientes = [nodo for nodo in nivel if nodo.monday_id is None]
+                if pendientes and self.antes_de_nivel is not None:
+                    self.antes_de_nivel(pendientes)
+                por_padre = {}
+                for nodo in nivel:
+                    por_padre.setdefault(id(nodo.padre), []).append(nodo)
+                futuros = [pool.submit(self.crear_hermanos, hermanos) for hermanos in por_padre.values()]
+                error = None
+                for futuro in futuros:
+                    try:
+                        futuro.result()
+                    except Exception as e:
+                        error = error or e
+                if error is not None:
+                    raise error
+                nivel = [hijo for nodo in nivel if nodo.monday_id is not None for hijo in nodo.hijos]
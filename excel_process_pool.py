@@ -0,0 +1,64 @@
+""" Pool de procesos para el parseo de los archivos excel
+
+pd.read_excel con openpyxl es CPU intensivo y retiene el GIL, si corre en un hilo del
+servidor frena a todos los endpoints del worker. El parseo y el armado del plan de
+importacion se ejecutan en un proceso separado y vuelven como listas por columna.
+"""
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+
+class PoolParseo:
+    """ProcessPoolExecutor acotado (MONDAY_PARSE_PROCESOS), con 0 procesos el parseo se hace en el mismo proceso"""
+    max_procesos:int
+
+    def __init__(self, max_procesos = None):
+        self.max_procesos = int(max_procesos if max_procesos is not None else os.getenv("MONDAY_PARSE_PROCESOS", 2))
+        self._executor = None
+        self._lock = Lock()
+
+    def get_executor(self) -> ProcessPoolExecutor:
+        """Devuelve el pool de procesos, se crea en el primer uso"""
+        with self._lock:
+            if self._executor is None:
+                #spawn: el servidor tiene hilos corriendo y fork podria copiar locks tomados
+                self._executor = ProcessPoolExecutor(max_workers=self.max_procesos, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def ejecutar(self, funcion, *args):
+        """Ejecuta la funcion en un proceso del pool y espera el resultado"""
+        if self.max_procesos <= 0:
+            return funcion(*args)
+        try:
+            return self.get_executor().submit(funcion, *args).result()
+        except BrokenProcessPool:
+            logger.error("El pool de procesos de parseo se interrumpio, se recrea y se parsea en el proceso actual")
+            self.cerrar()
+            return funcion(*args)
+
+    def cerrar(self):
+        """Detiene los procesos del pool"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+_pool_parseo = None
+_pool_parseo_lock = Lock()
+
+
+def get_pool_parseo() -> PoolParseo:
+    """Devuelve el pool de parseo compartido por todo el proceso"""
+    global _pool_parseo
+    with _pool_parseo_lock:
+        if _pool_parseo is None:
+            _pool_parseo = PoolParseo()
+        return _pool_parseo
@@ -0,0 +1,119 @@
+""" Agrupa mutaciones GraphQL independientes en un unico documento con alias """
+
+import logging
+import os
+from threading import RLock
+
+from monday_complexity import get_presupuesto
+
+logger = logging.getLogger(__name__)
+
+#Complejidad estimada de una mutacion simple en Monday (create_item, change_simple_column_value, ...)
+COMPLEJIDAD_MUTACION_ESTIMADA = 10000
+
+
+class ResultadoMutacion:
+    """Resultado diferido de una mutacion agregada al batcher"""
+    alias:str
+    campo:str
+    complejidad:int
+    listo:bool
+
+    def __init__(self, alias:str, campo:str, complejidad:int):
+        self.alias = alias
+        self.campo = campo
+        self.complejidad = complejidad
+        self.listo = False
+        self.valor = None
+        self.error = None
+
+    def resolver(self, valor = None, error = None):
+        self.valor = valor
+        self.error = error
+        self.listo = True
+
+    def get(self):
+        """Devuelve el resultado de la mutacion, lanza el error si el lote fallo"""
+        if not self.listo:
+            raise RuntimeError(f"La mutacion {self.alias} todavia no fue enviada a Monday")
+        if self.error is not None:
+            raise self.error
+        return self.valor
+
+
+class MutationBatcher:
+    """Acumula mutaciones y las envia juntas como m1: ... m2: ... en un solo request.
+
+    Solo deben agregarse mutaciones que no dependan entre si, el orden de ejecucion
+    dentro del documento lo decide Monday. El lote se envia al alcanzar max_operaciones
+    o max_complejidad (o el presupuesto de complejidad que le queda a la cuenta, si es
+    menor), o al llamar a ejecutar(). Se puede usar desde varios hilos.
+    """
+    max_operaciones:int
+    max_complejidad:int
+    cantidad_requests:int
+    cantidad_mutaciones:int
+
+    def __init__(self, monday_client, max_operaciones = None, max_complejidad = None, presupuesto = None):
+        self.monday_client = monday_client
+        self.presupuesto = presupuesto or get_presupuesto()
+        self.max_operaciones = int(max_operaciones or os.getenv("MONDAY_BATCH_SIZE", 25))
+        self.max_complejidad = int(max_complejidad or os.getenv("MONDAY_BATCH_MAX_COMPLEJIDAD", 1000000))
+        self.cantidad_requests = 0
+        self.cantidad_mutaciones = 0
+        self._pendientes = []
+        self._complejidad = 0
+        self._lock = RLock()
+
+    def pendientes(self) -> int:
+        return len(self._pendientes)
+
+    def limite_complejidad(self) -> int:
+        """Complejidad maxima del lote, acotada por el presupuesto disponible en Monday"""
+        disponible = self.presupuesto.disponible()
+        if disponible is None:
+            return self.max_complejidad
+        return max(COMPLEJIDAD_MUTACION_ESTIMADA, min(self.max_complejidad, disponible))
+
+    def agregar(self, campo:str, complejidad:int = COMPLEJIDAD_MUTACION_ESTIMADA) -> ResultadoMutacion:
+        """Agrega una mutacion sin alias, ej: change_simple_column_value (...) { id }"""
+        with self._lock:
+            if self._pendientes and (
+                len(self._pendientes) >= self.max_operaciones
+                or self._complejidad + complejidad > self.limite_complejidad()
+            ):
+                self.ejecutar()
+            resultado = ResultadoMutacion(f"m{len(self._pendientes) + 1}", campo.strip(), complejidad)
+            self._pendientes.append(resultado)
+            self._complejidad += complejidad
+            if len(self._pendientes) >= self.max_operaciones:
+                self.ejecutar()
+            return resultado
+
+    def armar_documento(self, pendientes) -> str:
+        """Arma el documento GraphQL con un alias por mutacion"""
+        campos = "\n".join(f"    {resultado.alias}: {resultado.campo}" for resultado in pendientes)
+        return f"mutation {{\n{campos}\n}}"
+
+    def ejecutar(self):
+        """Envia las mutaciones pendientes y asigna a cada una su resultado"""
+        with self._lock:
+            if not self._pendientes:
+                return
+            pendientes = self._pendientes
+            self._pendientes = []
+            self._complejidad = 0
+            self.cantidad_requests += 1
+            self.cantidad_mutaciones += len(pendientes)
+        mutation = self.armar_documento(pendientes)
+        logger.info(mutation)
+        try:
+            response = self.monday_client.custom._query(mutation)
+        except Exception as e:
+            for resultado in pendientes:
+                resultado.resolver(error=e)
+            raise
+        logger.info(response)
+        data = (response or {}).get("data") or {}
+        for resultado in pendientes:
+            resultado.resolver(valor=data.get(resultado.alias))
@@ -0,0 +1,213 @@
+""" Cliente asincronico de la API GraphQL de Monday
+
+Expone las mismas operaciones del SDK de monday que usan los endpoints de server.py
+(boards, groups, items, updates, users y custom._query), pero sobre httpx.AsyncClient,
+de modo que una llamada lenta a Monday no bloquea el event loop del worker.
+Las queries se arman con monday.query_joins para que sean identicas a las del SDK.
+Las queries identicas concurrentes se envian una sola vez (ver monday_singleflight).
+"""
+
+import logging
+import os
+
+import httpx
+from monday import query_joins
+from monday.exceptions import MondayQueryError
+
+from monday_complexity import agregar_complejidad, get_presupuesto
+from monday_singleflight import SingleFlight, clave_query, es_mutacion, normalizar_query
+
+logger = logging.getLogger(__name__)
+
+MONDAY_API_URL = "https://api.monday.com/v2"
+MONDAY_API_VERSION = "2026-01"
+
+
+class AsyncGraphQLClient:
+    """Ejecuta queries GraphQL contra Monday sobre un pool de conexiones asincronico"""
+    endpoint:str
+    pool_size:int
+    timeout:float
+    connect_timeout:float
+
+    def __init__(self, token, endpoint = MONDAY_API_URL, pool_size = 10, timeout = 60, connect_timeout = 10, transport = None, presupuesto = None):
+        self.token = token
+        self.presupuesto = presupuesto or get_presupuesto()
+        self.endpoint = endpoint
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.transport = transport
+        self.singleflight = SingleFlight()
+        self._session = None
+
+    def get_session(self) -> httpx.AsyncClient:
+        """Devuelve la sesion http, se crea en el primer uso para quedar ligada al event loop del servicio"""
+        if self._session is None:
+            headers = {
+                "API-Version": os.getenv("MONDAY_API_VERSION", MONDAY_API_VERSION),
+                "Content-Type": "application/json",
+            }
+            if self.token is not None:
+                headers["Authorization"] = self.token
+            self._session = httpx.AsyncClient(
+                headers=headers,
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                transport=self.transport
+            )
+        return self._session
+
+    async def execute(self, query:str, variables:dict = None):
+        """Envia la query y devuelve el json de respuesta, lanza MondayQueryError si Monday informa errores.
+        Si la misma query con las mismas variables ya esta en curso se espera su respuesta en lugar de enviarla otra vez"""
+        query_normalizada = normalizar_query(query)
+        if es_mutacion(query_normalizada):
+            return await self.enviar(query, variables)
+        return await self.singleflight.ejecutar(clave_query(query_normalizada, variables), lambda: self.enviar(query, variables))
+
+    async def enviar(self, query:str, variables:dict = None):
+        """Envia la query a Monday, se pide tambien la complejidad de la query para mantener el presupuesto de la cuenta"""
+        payload = {"query": agregar_complejidad(query)}
+        if variables:
+            payload["variables"] = variables
+        response = await self.get_session().post(self.endpoint, json=payload)
+        response.raise_for_status()
+        response_data = response.json()
+        if "errors" in response_data:
+            raise MondayQueryError(response_data["errors"][0]["message"], response_data["errors"])
+        return self.presupuesto.registrar_respuesta(response_data)
+
+    async def aclose(self):
+        """Cierra las conexiones abiertas"""
+        if self._session is not None:
+            await self._session.aclose()
+            self._session = None
+
+
+class AsyncResource:
+    """Base de los recursos asincronicos, equivalente a monday.resources.base.BaseResource"""
+
+    def __init__(self, graphql_client:AsyncGraphQLClient):
+        self.graphql = graphql_client
+
+    async def _query(self, query:str):
+        result = await self.graphql.execute(query)
+        if result:
+            return result
+
+
+class AsyncCustomResource(AsyncResource):
+    """Queries GraphQL arbitrarias"""
+
+    async def execute_custom_query(self, custom_query:str):
+        return await self.graphql.execute(custom_query)
+
+
+class AsyncBoardResource(AsyncResource):
+    """Operaciones sobre tableros"""
+
+    async def fetch_boards(self, limit = None, page = None, ids = None, board_kind = None, state = None, order_by = None, workspace_ids = None):
+        query = query_joins.get_boards_query(limit, page, ids, board_kind, state, order_by, workspace_ids)
+        return await self.graphql.execute(query)
+
+    async def fetch_items_by_board_id(self, board_ids, query_params = None, limit = 500, cursor = None):
+        query = query_joins.get_board_items_query(board_ids, query_params=query_params, limit=limit, cursor=cursor)
+        return await self.graphql.execute(query)
+
+    async def create_board(self, board_name, board_kind, workspace_id = None):
+        query = query_joins.create_board_by_workspace_query(board_name, board_kind, workspace_id)
+        return await self.graphql.execute(query)
+
+
+class AsyncGroupResource(AsyncResource):
+    """Operaciones sobre grupos"""
+
+    async def get_groups_by_board(self, board_ids):
+        query = query_joins.get_groups_by_board_query(board_ids=board_ids)
+        return await self.graphql.execute(query)
+
+    async def create_group(self, board_id, group_name):
+        query = query_joins.create_group_query(board_id=board_id, group_name=group_name)
+        return await self.graphql.execute(query)
+
+    async def delete_group(self, board_id, group_id):
+        query = query_joins.delete_group_query(board_id=board_id, group_id=group_id)
+        return await self.graphql.execute(query)
+
+
+class AsyncItemResource(AsyncResource):
+    """Operaciones sobre tareas y subtareas"""
+
+    async def create_item(self, board_id, group_id, item_name, column_values = None, create_labels_if_missing = False):
+        query = query_joins.mutate_item_query(board_id, group_id, item_name, column_values, create_labels_if_missing)
+        return await self.graphql.execute(query)
+
+    async def create_subitem(self, parent_item_id, subitem_name, column_values = None, create_labels_if_missing = False):
+        query = query_joins.mutate_subitem_query(parent_item_id, subitem_name, column_values, create_labels_if_missing)
+        return await self.graphql.execute(query)
+
+    async def fetch_items_by_id(self, ids):
+        query = query_joins.get_item_by_id_query(ids)
+        return await self.graphql.execute(query)
+
+    async def change_multiple_column_values(self, board_id, item_id, column_values, create_labels_if_missing = False):
+        query = query_joins.update_multiple_column_values_query(board_id, item_id, column_values, create_labels_if_missing)
+        return await self.graphql.execute(query)
+
+    async def move_item_to_group(self, item_id, group_id):
+        query = query_joins.move_item_to_group_query(item_id, group_id)
+        return await self.graphql.execute(query)
+
+    async def archive_item_by_id(self, item_id):
+        query = query_joins.archive_item_query(item_id)
+        return await self.graphql.execute(query)
+
+    async def delete_item_by_id(self, item_id):
+        query = query_joins.delete_item_query(item_id)
+        return await self.graphql.execute(query)
+
+
+class AsyncUpdateResource(AsyncResource):
+    """Operaciones sobre actualizaciones (comentarios)"""
+
+    async def create_update(self, item_id, update_value):
+        query = query_joins.create_update_query(item_id, update_value)
+        return await self.graphql.execute(query)
+
+    async def fetch_updates_for_item(self, item_id, limit = 100):
+        query = query_joins.get_updates_for_item_query(item=item_id, limit=limit)
+        return await self.graphql.execute(query)
+
+
+class AsyncUserResource(AsyncResource):
+    """Operaciones sobre usuarios"""
+
+    async def fetch_users(self, **kwargs):
+        query = query_joins.get_users_query(**kwargs)
+        return await self.graphql.execute(query)
+
+
+class AsyncMondayClient:
+    """Cliente asincronico de Monday con la misma interfaz que monday.MondayClient para los endpoints del servicio"""
+
+    def __init__(self, token, endpoint = MONDAY_API_URL, transport = None, presupuesto = None):
+        self.graphql = AsyncGraphQLClient(token, endpoint=endpoint, transport=transport, presupuesto=presupuesto)
+        self.custom = AsyncCustomResource(self.graphql)
+        self.boards = AsyncBoardResource(self.graphql)
+        self.groups = AsyncGroupResource(self.graphql)
+        self.items = AsyncItemResource(self.graphql)
+        self.updates = AsyncUpdateResource(self.graphql)
+        self.users = AsyncUserResource(self.graphql)
+
+    def configurar_conexiones(self, pool_size:int, timeout:float, connect_timeout:float):
+        """Ajusta el tamaño del pool y los timeouts antes de abrir la primera conexion"""
+        self.graphql.pool_size = pool_size
+        self.graphql.timeout = timeout
+        self.graphql.connect_timeout = connect_timeout
+
+    async def aclose(self):
+        await self.graphql.aclose()
+
+    def __repr__(self):
+        return f"AsyncMondayClient {self.graphql.endpoint}"
@@ -0,0 +1,143 @@
+""" Cache de respuestas de las consultas de lectura a Monday
+
+Los endpoints de listado (tableros, grupos, columnas, usuarios y workspaces) consultan
+datos que cambian poco. Las respuestas se guardan por operacion y parametros, con un TTL
+por operacion (MONDAY_CACHE_TTL_<OPERACION>) y un tamaño maximo (MONDAY_CACHE_RESPUESTAS_MB);
+al superarlo se descartan las respuestas usadas hace mas tiempo. Cada respuesta tiene
+etiquetas (por ejemplo columnas:<board_id>) y los endpoints que modifican un tablero
+invalidan las etiquetas afectadas. El almacenamiento es el backend de MONDAY_CACHE_BACKEND
+(ver monday_cache_backends): en memoria por defecto, o sqlite / redis para que la respuesta
+que consulto un worker de uvicorn la reutilicen los demas.
+"""
+
+import json
+import logging
+import os
+from threading import Lock
+
+from monday_cache_backends import ERRORES_BACKEND, crear_backend, deserializar, serializar
+
+logger = logging.getLogger(__name__)
+
+#Segundos que se reutiliza cada respuesta, 0 desactiva el cache de la operacion
+TTL_POR_DEFECTO = {
+    "boards": 60,
+    "groups": 300,
+    "columns": 300,
+    "users": 600,
+    "workspaces": 900,
+}
+
+
+def etiqueta_board(tipo:str, board_id) -> str:
+    """Etiqueta de las respuestas de un tablero, tipo es grupos o columnas"""
+    return f"{tipo}:{board_id}"
+
+
+class CacheRespuestas:
+    """Respuestas json por operacion y parametros con TTL, guardadas en el backend configurado"""
+    max_bytes:int
+    ttls:dict
+
+    def __init__(self, max_bytes = None, ttls = None, backend = None):
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("MONDAY_CACHE_RESPUESTAS_MB", 32)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self.ttls = ttls if ttls is not None else {
+            operacion: float(os.getenv(f"MONDAY_CACHE_TTL_{operacion.upper()}", ttl)) for operacion, ttl in TTL_POR_DEFECTO.items()
+        }
+        self.backend = backend or crear_backend(max_bytes)
+        self.aciertos = 0
+        self.fallos = 0
+        self.invalidaciones = 0
+        self.errores = 0
+
+    @property
+    def compartido(self) -> bool:
+        """True si el backend hace I/O (sqlite o redis) y conviene usarlo fuera del event loop"""
+        return self.backend.nombre != "memoria"
+
+    @staticmethod
+    def clave(operacion:str, parametros:dict) -> str:
+        return f"{operacion}:{json.dumps(parametros, sort_keys=True, default=str)}"
+
+    def obtener(self, operacion:str, parametros:dict):
+        """Devuelve una copia de la respuesta guardada, None si no esta, vencio o el backend no responde"""
+        try:
+            valor = self.backend.obtener(self.clave(operacion, parametros))
+        except ERRORES_BACKEND as e:
+            self.registrar_error(e)
+            valor = None
+        if valor is None:
+            self.fallos += 1
+            return None
+        self.aciertos += 1
+        return deserializar(valor)
+
+    def generacion(self) -> int:
+        """Contador de invalidaciones, se pasa a guardar para descartar respuestas de consultas que se cruzaron con una invalidacion"""
+        try:
+            return self.backend.generacion()
+        except ERRORES_BACKEND as e:
+            self.registrar_error(e)
+            return None
+
+    def guardar(self, operacion:str, parametros:dict, respuesta, etiquetas = (), generacion:int = None):
+        """Guarda la respuesta si la operacion tiene TTL y no hubo invalidaciones desde generacion"""
+        ttl = self.ttls.get(operacion, 0)
+        if ttl <= 0:
+            return
+        valor = serializar(respuesta)
+        if len(valor) > self.max_bytes:
+            return
+        try:
+            self.backend.guardar(self.clave(operacion, parametros), valor, ttl, etiquetas, generacion)
+        except ERRORES_BACKEND as e:
+            self.registrar_error(e)
+
+    def invalidar(self, *etiquetas:str):
+        """Elimina las respuestas que tengan alguna de las etiquetas"""
+        try:
+            cantidad = self.backend.invalidar(etiquetas)
+        except ERRORES_BACKEND as e:
+            self.registrar_error(e)
+            return
+        self.invalidaciones += cantidad
+        if cantidad:
+            logger.info(f"Cache de respuestas: {cantidad} respuestas invalidadas por {', '.join(etiquetas)}")
+
+    def registrar_error(self, error:Exception):
+        self.errores += 1
+        logger.warning(f"Cache de respuestas ({self.backend.nombre}) no disponible, se consulta Monday: {error}")
+
+    def limpiar(self):
+        self.backend.limpiar()
+
+    def estado(self) -> dict:
+        estado = {
+            "backend": self.backend.nombre,
+            "max_bytes": self.max_bytes,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "invalidaciones": self.invalidaciones,
+            "errores": self.errores,
+            "ttls": dict(self.ttls),
+        }
+        try:
+            estado.update(self.backend.estado())
+        except ERRORES_BACKEND as e:
+            self.registrar_error(e)
+        return estado
+
+
+_cache_respuestas = None
+_cache_respuestas_lock = Lock()
+
+
+def get_cache_respuestas() -> CacheRespuestas:
+    """Devuelve el cache de respuestas compartido por todo el proceso"""
+    global _cache_respuestas
+    with _cache_respuestas_lock:
+        if _cache_respuestas is None:
+            _cache_respuestas = CacheRespuestas()
+        return _cache_respuestas
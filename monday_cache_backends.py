@@ -0,0 +1,412 @@
+""" Backends de almacenamiento del cache de respuestas
+
+memoria: diccionario LRU del proceso, cada worker de uvicorn tiene el suyo.
+sqlite: archivo compartido por los workers de la misma maquina (MONDAY_CACHE_SQLITE_PATH).
+redis: cualquier servidor que hable el protocolo de Redis (MONDAY_CACHE_REDIS_URL), compartido
+entre maquinas. El tamaño maximo lo controla el servidor (maxmemory con allkeys-lru).
+
+Las respuestas se guardan serializadas con orjson si esta instalado, si no con json. Todos los
+backends llevan un contador de generacion que se incrementa con cada invalidacion, asi una
+consulta que empezo antes de una invalidacion (en cualquier worker) no guarda datos viejos.
+"""
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+from collections import OrderedDict
+from threading import Lock, local
+from urllib.parse import unquote, urlparse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+class ErrorRESP(Exception):
+    """Error devuelto por el servidor Redis"""
+
+
+#Errores del backend que no deben cortar el endpoint, la consulta sigue sin cache
+ERRORES_BACKEND = (OSError, sqlite3.Error, ErrorRESP)
+
+
+def serializar(respuesta) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(respuesta, default=str)
+    return json.dumps(respuesta, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def deserializar(valor:bytes):
+    if orjson is not None:
+        return orjson.loads(valor)
+    return json.loads(valor)
+
+
+class BackendMemoria:
+    """Respuestas en memoria del proceso con desalojo LRU por tamaño"""
+    nombre = "memoria"
+    max_bytes:int
+
+    def __init__(self, max_bytes:int):
+        self.max_bytes = max_bytes
+        #clave -> (expira, etiquetas, valor)
+        self.entradas = OrderedDict()
+        self.bytes = 0
+        self.desalojos = 0
+        self._generacion = 0
+        self._lock = Lock()
+
+    def obtener(self, clave:str) -> bytes:
+        with self._lock:
+            entrada = self.entradas.get(clave)
+            if entrada is None:
+                return None
+            if entrada[0] <= time.monotonic():
+                self.quitar(clave)
+                return None
+            self.entradas.move_to_end(clave)
+            return entrada[2]
+
+    def guardar(self, clave:str, valor:bytes, ttl:float, etiquetas, generacion:int = None) -> bool:
+        with self._lock:
+            if generacion is not None and generacion != self._generacion:
+                return False
+            if clave in self.entradas:
+                self.quitar(clave)
+            self.entradas[clave] = (time.monotonic() + ttl, frozenset(etiquetas), valor)
+            self.bytes += len(valor)
+            while self.bytes > self.max_bytes:
+                self.quitar(next(iter(self.entradas)))
+                self.desalojos += 1
+        return True
+
+    def quitar(self, clave:str):
+        self.bytes -= len(self.entradas.pop(clave)[2])
+
+    def invalidar(self, etiquetas) -> int:
+        with self._lock:
+            self._generacion += 1
+            claves = [clave for clave, entrada in self.entradas.items() if entrada[1].intersection(etiquetas)]
+            for clave in claves:
+                self.quitar(clave)
+        return len(claves)
+
+    def generacion(self) -> int:
+        return self._generacion
+
+    def limpiar(self):
+        with self._lock:
+            self._generacion += 1
+            self.entradas.clear()
+            self.bytes = 0
+
+    def estado(self) -> dict:
+        with self._lock:
+            return {"entradas": len(self.entradas), "bytes": self.bytes, "desalojos": self.desalojos}
+
+
+class BackendSQLite:
+    """Respuestas en un archivo SQLite compartido por los procesos de la maquina, LRU por tamaño"""
+    nombre = "sqlite"
+    path:str
+    max_bytes:int
+
+    def __init__(self, path:str = None, max_bytes:int = 32 * 1024 * 1024):
+        self.path = path or os.getenv("MONDAY_CACHE_SQLITE_PATH", "monday_cache.db")
+        self.max_bytes = max_bytes
+        self.desalojos = 0
+        self._creada = False
+
+    def conectar(self) -> sqlite3.Connection:
+        #Sin transaccion implicita, cerrar la conexion descarta una transaccion que quedo abierta por un error
+        conexion = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        if not self._creada:
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("""
+                CREATE TABLE IF NOT EXISTS respuestas (
+                    clave TEXT PRIMARY KEY,
+                    valor BLOB NOT NULL,
+                    expira REAL NOT NULL,
+                    usado REAL NOT NULL,
+                    tamano INTEGER NOT NULL
+                )
+            """)
+            conexion.execute("CREATE TABLE IF NOT EXISTS etiquetas (etiqueta TEXT NOT NULL, clave TEXT NOT NULL, PRIMARY KEY (etiqueta, clave))")
+            conexion.execute("CREATE TABLE IF NOT EXISTS generacion (id INTEGER PRIMARY KEY CHECK (id = 0), valor INTEGER NOT NULL)")
+            conexion.execute("INSERT OR IGNORE INTO generacion (id, valor) VALUES (0, 0)")
+            self._creada = True
+        return conexion
+
+    def obtener(self, clave:str) -> bytes:
+        ahora = time.time()
+        conexion = self.conectar()
+        try:
+            row = conexion.execute("SELECT valor, expira, usado FROM respuestas WHERE clave = ?", (clave,)).fetchone()
+            if row is None or row[1] <= ahora:
+                return None
+            if row[2] < ahora - 1:
+                #El orden LRU se actualiza como mucho una vez por segundo para no escribir en cada lectura
+                conexion.execute("UPDATE respuestas SET usado = ? WHERE clave = ?", (ahora, clave))
+            return row[0]
+        finally:
+            conexion.close()
+
+    def guardar(self, clave:str, valor:bytes, ttl:float, etiquetas, generacion:int = None) -> bool:
+        ahora = time.time()
+        conexion = self.conectar()
+        try:
+            conexion.execute("BEGIN IMMEDIATE")
+            if generacion is not None and generacion != self.leer_generacion(conexion):
+                conexion.execute("ROLLBACK")
+                return False
+            conexion.execute("DELETE FROM respuestas WHERE expira <= ?", (ahora,))
+            conexion.execute("INSERT OR REPLACE INTO respuestas (clave, valor, expira, usado, tamano) VALUES (?, ?, ?, ?, ?)",
+                (clave, valor, ahora + ttl, ahora, len(valor)))
+            conexion.execute("DELETE FROM etiquetas WHERE clave = ?", (clave,))
+            conexion.executemany("INSERT INTO etiquetas (etiqueta, clave) VALUES (?, ?)", [(etiqueta, clave) for etiqueta in set(etiquetas)])
+            self.purgar(conexion)
+            conexion.execute("COMMIT")
+        finally:
+            conexion.close()
+        return True
+
+    def purgar(self, conexion:sqlite3.Connection):
+        """Elimina las respuestas usadas hace mas tiempo hasta quedar en max_bytes"""
+        total = 0
+        desalojadas = []
+        for clave, tamano in conexion.execute("SELECT clave, tamano FROM respuestas ORDER BY usado DESC"):
+            total += tamano
+            if total > self.max_bytes:
+                desalojadas.append((clave,))
+        if desalojadas:
+            conexion.executemany("DELETE FROM respuestas WHERE clave = ?", desalojadas)
+            self.desalojos += len(desalojadas)
+        conexion.execute("DELETE FROM etiquetas WHERE clave NOT IN (SELECT clave FROM respuestas)")
+
+    @staticmethod
+    def leer_generacion(conexion:sqlite3.Connection) -> int:
+        return conexion.execute("SELECT valor FROM generacion WHERE id = 0").fetchone()[0]
+
+    def invalidar(self, etiquetas) -> int:
+        etiquetas = list(etiquetas)
+        marcas = ", ".join("?" for _ in etiquetas)
+        conexion = self.conectar()
+        try:
+            conexion.execute("BEGIN IMMEDIATE")
+            conexion.execute("UPDATE generacion SET valor = valor + 1 WHERE id = 0")
+            cursor = conexion.execute(f"DELETE FROM respuestas WHERE clave IN (SELECT clave FROM etiquetas WHERE etiqueta IN ({marcas}))", etiquetas)
+            conexion.execute("DELETE FROM etiquetas WHERE clave NOT IN (SELECT clave FROM respuestas)")
+            conexion.execute("COMMIT")
+            return cursor.rowcount
+        finally:
+            conexion.close()
+
+    def generacion(self) -> int:
+        conexion = self.conectar()
+        try:
+            return self.leer_generacion(conexion)
+        finally:
+            conexion.close()
+
+    def limpiar(self):
+        conexion = self.conectar()
+        try:
+            conexion.execute("BEGIN IMMEDIATE")
+            conexion.execute("UPDATE generacion SET valor = valor + 1 WHERE id = 0")
+            conexion.execute("DELETE FROM respuestas")
+            conexion.execute("DELETE FROM etiquetas")
+            conexion.execute("COMMIT")
+        finally:
+            conexion.close()
+
+    def estado(self) -> dict:
+        conexion = self.conectar()
+        try:
+            entradas, bytes_usados = conexion.execute("SELECT COUNT(*), COALESCE(SUM(tamano), 0) FROM respuestas").fetchone()
+        finally:
+            conexion.close()
+        return {"path": self.path, "entradas": entradas, "bytes": bytes_usados, "desalojos": self.desalojos}
+
+
+class ClienteRESP:
+    """Cliente minimo del protocolo de Redis (RESP2), una conexion por hilo"""
+    url:str
+    timeout:float
+
+    def __init__(self, url:str, timeout:float = 2):
+        partes = urlparse(url)
+        self.url = url
+        self.host = partes.hostname or "localhost"
+        self.port = partes.port or 6379
+        self.password = unquote(partes.password) if partes.password else None
+        self.db = int(partes.path.strip("/") or 0)
+        self.timeout = timeout
+        self._local = local()
+
+    def conexion(self):
+        archivo = getattr(self._local, "archivo", None)
+        if archivo is None:
+            conexion = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            self._local.socket = conexion
+            self._local.archivo = archivo = conexion.makefile("rb")
+            if self.password:
+                self.enviar(archivo, "AUTH", self.password)
+            if self.db:
+                self.enviar(archivo, "SELECT", self.db)
+        return archivo
+
+    def ejecutar(self, *argumentos):
+        try:
+            return self.enviar(self.conexion(), *argumentos)
+        except OSError:
+            self.cerrar()
+            raise
+
+    def ejecutar_varios(self, *comandos) -> list:
+        """Envia varios comandos juntos (pipeline) y devuelve sus respuestas en orden. Se leen todas las
+        respuestas antes de lanzar un error para no dejar la conexion desincronizada"""
+        try:
+            archivo = self.conexion()
+            self._local.socket.sendall(b"".join(self.codificar(comando) for comando in comandos))
+            respuestas = []
+            for _ in comandos:
+                try:
+                    respuestas.append(self.leer(archivo))
+                except ErrorRESP as e:
+                    respuestas.append(e)
+        except OSError:
+            self.cerrar()
+            raise
+        for respuesta in respuestas:
+            if isinstance(respuesta, ErrorRESP):
+                raise respuesta
+        return respuestas
+
+    @staticmethod
+    def codificar(argumentos) -> bytes:
+        partes = [b"*%d\r\n" % len(argumentos)]
+        for argumento in argumentos:
+            if not isinstance(argumento, bytes):
+                argumento = str(argumento).encode("utf-8")
+            partes.append(b"$%d\r\n%s\r\n" % (len(argumento), argumento))
+        return b"".join(partes)
+
+    def enviar(self, archivo, *argumentos):
+        self._local.socket.sendall(self.codificar(argumentos))
+        return self.leer(archivo)
+
+    def leer(self, archivo, en_arreglo:bool = False):
+        """Lee una respuesta. Los errores dentro de un arreglo (comandos de un EXEC) se devuelven como ErrorRESP
+        en vez de lanzarse, asi se termina de leer el arreglo"""
+        linea = archivo.readline()
+        if not linea:
+            raise ConnectionError("El servidor Redis cerro la conexion")
+        tipo, resto = linea[:1], linea[1:-2]
+        if tipo == b"+":
+            return resto.decode("utf-8")
+        if tipo == b"-":
+            if en_arreglo:
+                return ErrorRESP(resto.decode("utf-8"))
+            raise ErrorRESP(resto.decode("utf-8"))
+        if tipo == b":":
+            return int(resto)
+        if tipo == b"$":
+            largo = int(resto)
+            return None if largo < 0 else archivo.read(largo + 2)[:-2]
+        if tipo == b"*":
+            largo = int(resto)
+            return None if largo < 0 else [self.leer(archivo, True) for _ in range(largo)]
+        raise ErrorRESP(f"Respuesta desconocida del servidor Redis: {linea!r}")
+
+    def cerrar(self):
+        conexion = getattr(self._local, "socket", None)
+        self._local.socket = self._local.archivo = None
+        if conexion is not None:
+            conexion.close()
+
+
+class BackendRedis:
+    """Respuestas en un servidor Redis compartido, el TTL y el desalojo LRU los hace el servidor"""
+    nombre = "redis"
+    prefijo:str
+
+    def __init__(self, url:str = None, prefijo:str = None):
+        self.cliente = ClienteRESP(url or os.getenv("MONDAY_CACHE_REDIS_URL", "redis://localhost:6379/0"))
+        self.prefijo = prefijo or os.getenv("MONDAY_CACHE_REDIS_PREFIJO", "monday_cache:")
+
+    def clave_respuesta(self, clave:str) -> str:
+        return f"{self.prefijo}r:{clave}"
+
+    def clave_etiqueta(self, etiqueta:str) -> str:
+        return f"{self.prefijo}e:{etiqueta}"
+
+    def obtener(self, clave:str) -> bytes:
+        return self.cliente.ejecutar("GET", self.clave_respuesta(clave))
+
+    def clave_generacion(self) -> str:
+        return f"{self.prefijo}generacion"
+
+    def guardar(self, clave:str, valor:bytes, ttl:float, etiquetas, generacion:int = None) -> bool:
+        """Guarda la respuesta y sus etiquetas en una transaccion MULTI / EXEC. Con generacion se vigila (WATCH)
+        el contador, si otro worker invalida entre la lectura y el EXEC el servidor no aplica nada"""
+        milisegundos = max(int(ttl * 1000), 1)
+        transaccion = [("SET", self.clave_respuesta(clave), valor, "PX", milisegundos)]
+        for etiqueta in set(etiquetas):
+            transaccion.append(("SADD", self.clave_etiqueta(etiqueta), self.clave_respuesta(clave)))
+            transaccion.append(("PEXPIRE", self.clave_etiqueta(etiqueta), milisegundos))
+        if generacion is not None:
+            actual = self.cliente.ejecutar_varios(("WATCH", self.clave_generacion()), ("GET", self.clave_generacion()))[1]
+            if int(actual or 0) != generacion:
+                self.cliente.ejecutar("UNWATCH")
+                return False
+        resultado = self.cliente.ejecutar_varios(("MULTI",), *transaccion, ("EXEC",))[-1]
+        if resultado is None:
+            return False
+        for respuesta in resultado:
+            if isinstance(respuesta, ErrorRESP):
+                raise respuesta
+        return True
+
+    def invalidar(self, etiquetas) -> int:
+        self.cliente.ejecutar("INCR", self.clave_generacion())
+        cantidad = 0
+        for etiqueta in etiquetas:
+            claves = self.cliente.ejecutar("SMEMBERS", self.clave_etiqueta(etiqueta)) or []
+            if claves:
+                cantidad += self.cliente.ejecutar("DEL", *claves)
+            self.cliente.ejecutar("DEL", self.clave_etiqueta(etiqueta))
+        return cantidad
+
+    def generacion(self) -> int:
+        return int(self.cliente.ejecutar("GET", self.clave_generacion()) or 0)
+
+    def limpiar(self):
+        self.cliente.ejecutar("INCR", self.clave_generacion())
+        cursor = b"0"
+        while True:
+            cursor, claves = self.cliente.ejecutar("SCAN", cursor, "MATCH", f"{self.prefijo}[re]:*", "COUNT", 500)
+            if claves:
+                self.cliente.ejecutar("DEL", *claves)
+            if cursor in (b"0", 0):
+                return
+
+    def estado(self) -> dict:
+        return {"servidor": f"{self.cliente.host}:{self.cliente.port}/{self.cliente.db}", "prefijo": self.prefijo}
+
+
+def crear_backend(max_bytes:int, nombre:str = None):
+    """Crea el backend indicado en MONDAY_CACHE_BACKEND: memoria (por defecto), sqlite o redis"""
+    nombre = (nombre or os.getenv("MONDAY_CACHE_BACKEND", "memoria")).lower()
+    if nombre == "sqlite":
+        return BackendSQLite(max_bytes=max_bytes)
+    if nombre == "redis":
+        return BackendRedis()
+    if nombre != "memoria":
+        logger.warning(f"MONDAY_CACHE_BACKEND={nombre} no es valido, se usa el cache en memoria")
+    return BackendMemoria(max_bytes)
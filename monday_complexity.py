@@ -0,0 +1,137 @@
+""" Registro del presupuesto de complejidad de la API de Monday
+
+Monday cobra cada query en puntos de complejidad por minuto. Cada query enviada por el
+servicio pide ademas el campo complexity { before after query reset_in_x_seconds } y con
+esas respuestas se mantiene un modelo del presupuesto disponible, compartido por todo el
+proceso, que el limitador de velocidad consulta antes de cada request.
+"""
+
+import logging
+import time
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+CAMPO_COMPLEJIDAD = "complexity { before after query reset_in_x_seconds }"
+
+
+def agregar_complejidad(query:str) -> str:
+    """Agrega el campo complexity a la seleccion principal de la query o mutation"""
+    if "complexity" in query:
+        return query
+    profundidad = 0
+    for posicion, caracter in enumerate(query):
+        if caracter == "(":
+            profundidad += 1
+        elif caracter == ")":
+            profundidad -= 1
+        elif caracter == "{" and profundidad == 0:
+            return f"{query[:posicion + 1]} {CAMPO_COMPLEJIDAD} {query[posicion + 1:]}"
+    return query
+
+
+class PresupuestoComplejidad:
+    """Modelo del presupuesto de complejidad disponible en la cuenta de Monday"""
+    limite:int
+    disponible_monday:int
+    costo_promedio:float
+    costo_total:int
+    cantidad_consultas:int
+
+    def __init__(self):
+        self.limite = None
+        self.disponible_monday = None
+        self.costo_promedio = 0.0
+        self.costo_total = 0
+        self.cantidad_consultas = 0
+        self._disponible_estimado = None
+        self._reset_hasta = 0.0
+        self._lock = Lock()
+
+    def registrar(self, complexity:dict):
+        """Actualiza el modelo con el campo complexity devuelto por Monday"""
+        if not complexity:
+            return
+        with self._lock:
+            before = complexity.get("before")
+            after = complexity.get("after")
+            costo = complexity.get("query") or 0
+            reset = complexity.get("reset_in_x_seconds") or 0
+            if before is not None:
+                self.limite = max(self.limite or 0, before)
+            self.disponible_monday = after
+            self._disponible_estimado = after
+            self._reset_hasta = time.monotonic() + reset
+            self.costo_total += costo
+            self.cantidad_consultas += 1
+            if self.costo_promedio == 0:
+                self.costo_promedio = float(costo)
+            else:
+                self.costo_promedio = self.costo_promedio * 0.8 + costo * 0.2
+
+    def registrar_respuesta(self, response):
+        """Extrae el campo complexity de la respuesta de Monday y lo registra"""
+        data = response.get("data") if isinstance(response, dict) else None
+        if isinstance(data, dict) and "complexity" in data:
+            self.registrar(data.pop("complexity"))
+        return response
+
+    def disponible(self):
+        """Puntos disponibles estimados, None si todavia no hubo respuestas"""
+        if self._disponible_estimado is None:
+            return None
+        if time.monotonic() >= self._reset_hasta:
+            return self.limite
+        return self._disponible_estimado
+
+    def reservar(self, costo:float = None) -> float:
+        """Descuenta el costo estimado de un request y devuelve los segundos a esperar si no alcanza el presupuesto"""
+        with self._lock:
+            costo = costo or self.costo_promedio
+            disponible = self.disponible()
+            if disponible is None or costo <= 0:
+                return 0.0
+            ahora = time.monotonic()
+            if ahora >= self._reset_hasta:
+                self._disponible_estimado = self.limite
+            if disponible >= costo:
+                self._disponible_estimado = disponible - costo
+                return 0.0
+            return max(0.0, self._reset_hasta - ahora)
+
+    def estado(self):
+        """Devuelve el estado del modelo para el endpoint de metricas"""
+        with self._lock:
+            return {
+                "limite": self.limite,
+                "disponible_monday": self.disponible_monday,
+                "disponible_estimado": self.disponible(),
+                "reset_en_segundos": round(max(0.0, self._reset_hasta - time.monotonic()), 2),
+                "costo_promedio": round(self.costo_promedio, 1),
+                "costo_total": self.costo_total,
+                "cantidad_consultas": self.cantidad_consultas,
+            }
+
+
+def medir_complejidad(graphql_client, presupuesto:PresupuestoComplejidad):
+    """Envuelve el execute de un GraphQLClient del SDK de monday para pedir y registrar la complejidad"""
+    execute = graphql_client.execute
+
+    def execute_con_complejidad(query, variables = None):
+        response = execute(agregar_complejidad(query), variables)
+        return presupuesto.registrar_respuesta(response)
+
+    graphql_client.execute = execute_con_complejidad
+
+
+_presupuesto = None
+_presupuesto_lock = Lock()
+
+
+def get_presupuesto() -> PresupuestoComplejidad:
+    """Devuelve el presupuesto de complejidad compartido por todo el proceso"""
+    global _presupuesto
+    with _presupuesto_lock:
+        if _presupuesto is None:
+            _presupuesto = PresupuestoComplejidad()
+        return _presupuesto
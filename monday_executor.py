@@ -0,0 +1,103 @@
+""" Ejecucion de las llamadas bloqueantes al SDK de Monday en un pool de hilos acotado """
+
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+
+class MetricaLlamada:
+    """Acumula tiempos de espera en cola y de ejecucion de una operacion de Monday"""
+    cantidad:int
+    espera_total:float
+    espera_max:float
+    ejecucion_total:float
+    ejecucion_max:float
+
+    def __init__(self):
+        self.cantidad = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+        self.ejecucion_total = 0.0
+        self.ejecucion_max = 0.0
+
+    def registrar(self, espera:float, ejecucion:float):
+        self.cantidad += 1
+        self.espera_total += espera
+        self.espera_max = max(self.espera_max, espera)
+        self.ejecucion_total += ejecucion
+        self.ejecucion_max = max(self.ejecucion_max, ejecucion)
+
+    def to_dict(self):
+        return {
+            "cantidad": self.cantidad,
+            "espera_promedio_ms": round(self.espera_total / self.cantidad * 1000, 3) if self.cantidad else 0,
+            "espera_max_ms": round(self.espera_max * 1000, 3),
+            "ejecucion_promedio_ms": round(self.ejecucion_total / self.cantidad * 1000, 3) if self.cantidad else 0,
+            "ejecucion_max_ms": round(self.ejecucion_max * 1000, 3),
+        }
+
+
+class MondayExecutor:
+    """Corre las llamadas sincronicas del SDK de Monday fuera del event loop.
+
+    El pool tiene un limite propio (MONDAY_THREADPOOL_SIZE) para que una llamada lenta,
+    por ejemplo fetch_items_by_board_id sobre un tablero grande, no frene al resto de
+    los requests del worker ni agote el threadpool por defecto de starlette.
+    """
+    max_workers:int
+
+    def __init__(self, max_workers = None):
+        self.max_workers = int(max_workers or os.getenv("MONDAY_THREADPOOL_SIZE", 8))
+        self._executor = None
+        self._lock = Lock()
+        self._metricas = {}
+
+    def get_executor(self) -> ThreadPoolExecutor:
+        """Devuelve el pool de hilos, creandolo en el primer uso"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="monday")
+            return self._executor
+
+    async def ejecutar(self, operacion, *args, **kwargs):
+        """Ejecuta la operacion en el pool de hilos y registra espera en cola y tiempo de ejecucion"""
+        nombre = getattr(operacion, "__qualname__", repr(operacion))
+        encolado = time.perf_counter()
+
+        def tarea():
+            inicio = time.perf_counter()
+            try:
+                return operacion(*args, **kwargs)
+            finally:
+                fin = time.perf_counter()
+                self.registrar(nombre, inicio - encolado, fin - inicio)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.get_executor(), tarea)
+
+    def registrar(self, nombre:str, espera:float, ejecucion:float):
+        """Registra los tiempos de una llamada"""
+        with self._lock:
+            metrica = self._metricas.get(nombre)
+            if metrica is None:
+                metrica = MetricaLlamada()
+                self._metricas[nombre] = metrica
+            metrica.registrar(espera, ejecucion)
+        logger.debug(f"{nombre} espera: {espera * 1000:.1f} ms ejecucion: {ejecucion * 1000:.1f} ms")
+
+    def get_metricas(self):
+        """Devuelve las metricas acumuladas por operacion"""
+        with self._lock:
+            return {nombre: metrica.to_dict() for nombre, metrica in self._metricas.items()}
+
+    def cerrar(self):
+        """Detiene el pool de hilos"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
@@ -0,0 +1,90 @@
+""" Cliente de Monday compartido por toda la aplicacion sobre un pool de conexiones keep-alive """
+
+import logging
+import os
+from threading import Lock
+
+import urllib3
+
+from monday_complexity import get_presupuesto, medir_complejidad
+
+logger = logging.getLogger(__name__)
+
+
+class MondayClientPool:
+    """Mantiene una unica instancia de cliente de Monday por proceso.
+
+    Todos los recursos del SDK (boards, items, groups, ...) comparten un mismo
+    urllib3.PoolManager, de modo que las conexiones TLS con api.monday.com se
+    reutilizan entre requests en lugar de abrirse en cada endpoint.
+    """
+    pool_size:int
+    timeout:float
+    connect_timeout:float
+
+    def __init__(self, pool_size = None, timeout = None, connect_timeout = None):
+        self.pool_size = int(pool_size or os.getenv("MONDAY_POOL_SIZE", 10))
+        self.timeout = float(timeout or os.getenv("MONDAY_TIMEOUT", 60))
+        self.connect_timeout = float(connect_timeout or os.getenv("MONDAY_CONNECT_TIMEOUT", 10))
+        self._clients = {}
+        self._http = None
+        self._lock = Lock()
+
+    def get_client(self, factory, api_key = None):
+        """Devuelve el cliente creado con factory, instanciandolo solo la primera vez"""
+        if api_key is None:
+            api_key = os.getenv("MONDAY_API_KEY")
+        key = (factory, api_key)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = factory(api_key)
+                self.compartir_conexiones(client)
+                self._clients[key] = client
+                logger.info(f"Cliente de Monday creado: {client} pool_size={self.pool_size}")
+        return client
+
+    def get_http(self) -> urllib3.PoolManager:
+        """Devuelve el PoolManager compartido, creandolo si no existe"""
+        if self._http is None:
+            self._http = urllib3.PoolManager(
+                num_pools=2,
+                maxsize=self.pool_size,
+                block=True,
+                timeout=self.get_timeout(),
+                retries=False
+            )
+        return self._http
+
+    def get_timeout(self) -> urllib3.Timeout:
+        """Timeout de conexion y lectura para las llamadas a Monday"""
+        return urllib3.Timeout(connect=self.connect_timeout, read=self.timeout)
+
+    def compartir_conexiones(self, client):
+        """Reemplaza el pool de conexiones propio de cada recurso del SDK por el pool compartido"""
+        if hasattr(client, "configurar_conexiones"):
+            #Cliente asincronico: maneja su propio pool, solo se le pasa la configuracion
+            client.configurar_conexiones(self.pool_size, self.timeout, self.connect_timeout)
+            return
+        for recurso in vars(client).values():
+            for graphql_client in (getattr(recurso, "client", None), getattr(recurso, "file_upload_client", None)):
+                if graphql_client is not None and hasattr(graphql_client, "_http"):
+                    graphql_client._http = self.get_http()
+                    graphql_client.timeout = self.get_timeout()
+            if getattr(recurso, "client", None) is not None and hasattr(recurso.client, "execute"):
+                medir_complejidad(recurso.client, get_presupuesto())
+
+    async def aclose(self):
+        """Cierra las conexiones de los clientes asincronicos y libera el pool"""
+        for client in list(self._clients.values()):
+            if hasattr(client, "aclose"):
+                await client.aclose()
+        self.cerrar()
+
+    def cerrar(self):
+        """Libera los clientes y cierra las conexiones abiertas"""
+        with self._lock:
+            self._clients.clear()
+            if self._http is not None:
+                self._http.clear()
+                self._http = None
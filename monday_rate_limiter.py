@@ -0,0 +1,192 @@
+""" Limitador de velocidad adaptativo para las llamadas a Monday
+
+Un unico token bucket por proceso, compartido por los endpoints y por los hilos del
+importador de excel. La velocidad sube de a poco mientras Monday responde bien y se
+reduce a la mitad (con una pausa de Retry-After) cuando Monday informa que se supero
+el limite de requests o el presupuesto de complejidad. Ademas, antes de cada request se
+consulta el presupuesto de complejidad informado por Monday y, si no alcanza para el costo
+promedio de una query, se espera hasta el reset en lugar de recibir el error.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from threading import Lock
+
+from monday_complexity import PresupuestoComplejidad, get_presupuesto
+
+logger = logging.getLogger(__name__)
+
+#Segundos de pausa cuando Monday informa el limite pero no indica cuanto esperar
+ESPERA_POR_DEFECTO = 10.0
+CODIGOS_LIMITE = ("ComplexityException", "RATE_LIMIT_EXCEEDED", "COMPLEXITY_BUDGET_EXHAUSTED", "maxConcurrencyExceeded", "DAILY_LIMIT_EXCEEDED")
+
+
+def segundos_retry_after(error) -> float:
+    """Devuelve los segundos que Monday pide esperar si el error es por limite de uso, None si es otro tipo de error"""
+    response = getattr(error, "response", None)
+    if response is not None and getattr(response, "status_code", None) == 429:
+        retry_after = response.headers.get("Retry-After")
+        try:
+            return float(retry_after)
+        except (TypeError, ValueError):
+            return ESPERA_POR_DEFECTO
+
+    texto = str(error)
+    if texto.startswith("HTTP 429"):
+        #El SDK sincronico no expone los headers, se intenta leer el cuerpo de la respuesta
+        try:
+            cuerpo = json.loads(texto.split(":", 1)[1])
+            return float(cuerpo.get("retry_in_seconds") or ESPERA_POR_DEFECTO)
+        except (ValueError, IndexError, AttributeError):
+            return ESPERA_POR_DEFECTO
+
+    for error_graphql in getattr(error, "original_errors", None) or []:
+        if not isinstance(error_graphql, dict):
+            continue
+        extensions = error_graphql.get("extensions") or {}
+        if extensions.get("code") in CODIGOS_LIMITE or "retry_in_seconds" in extensions:
+            return float(extensions.get("retry_in_seconds") or ESPERA_POR_DEFECTO)
+
+    reset = re.search(r"reset in (\d+) seconds?", texto)
+    if reset:
+        return float(reset.group(1))
+    if "rate limit" in texto.lower() or "complexity budget" in texto.lower():
+        return ESPERA_POR_DEFECTO
+    return None
+
+
+class MondayRateLimiter:
+    """Token bucket con velocidad adaptativa (aumento aditivo, reduccion multiplicativa)"""
+    tasa_maxima:float
+    tasa_minima:float
+    tasa:float
+    capacidad:float
+    tokens:float
+    pausa_hasta:float
+    cantidad_limites:int
+
+    def __init__(self, requests_por_minuto = None, rafaga = None, presupuesto:PresupuestoComplejidad = None):
+        self.tasa_maxima = float(requests_por_minuto or os.getenv("MONDAY_RATE_LIMIT_RPM", 1000)) / 60
+        self.tasa_minima = self.tasa_maxima / 50
+        self.capacidad = float(rafaga or os.getenv("MONDAY_RATE_LIMIT_BURST", 10))
+        self.tasa = self.tasa_maxima
+        self.tokens = self.capacidad
+        self.pausa_hasta = 0.0
+        self.cantidad_limites = 0
+        self.presupuesto = presupuesto or get_presupuesto()
+        self._ultima_recarga = time.monotonic()
+        self._lock = Lock()
+
+    def _recargar(self, ahora:float):
+        self.tokens = min(self.capacidad, self.tokens + (ahora - self._ultima_recarga) * self.tasa)
+        self._ultima_recarga = ahora
+
+    def reservar(self, costo:float = 1.0) -> float:
+        """Reserva costo tokens y devuelve los segundos que hay que esperar antes de enviar el request"""
+        with self._lock:
+            ahora = time.monotonic()
+            self._recargar(ahora)
+            self.tokens -= costo
+            espera = max(0.0, self.pausa_hasta - ahora)
+            if self.tokens < 0:
+                espera = max(espera, -self.tokens / self.tasa)
+        return max(espera, self.presupuesto.reservar())
+
+    def adquirir(self, costo:float = 1.0):
+        """Bloquea el hilo hasta que haya capacidad para un request"""
+        espera = self.reservar(costo)
+        if espera > 0:
+            time.sleep(espera)
+
+    async def adquirir_async(self, costo:float = 1.0):
+        """Espera, sin bloquear el event loop, hasta que haya capacidad para un request"""
+        espera = self.reservar(costo)
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+    def informar_exito(self):
+        """Monday respondio bien: se recupera velocidad de a poco"""
+        with self._lock:
+            self.tasa = min(self.tasa_maxima, self.tasa + self.tasa_maxima * 0.05)
+
+    def informar_limite(self, segundos:float = None):
+        """Monday informo limite de uso: se reduce la velocidad a la mitad y se pausa el envio"""
+        with self._lock:
+            self.tasa = max(self.tasa_minima, self.tasa / 2)
+            self.tokens = min(self.tokens, 0.0)
+            self.pausa_hasta = max(self.pausa_hasta, time.monotonic() + (segundos or ESPERA_POR_DEFECTO))
+            self.cantidad_limites += 1
+        logger.warning(f"Limite de Monday alcanzado, pausa de {segundos} segundos, velocidad: {self.tasa * 60:.0f} requests/min")
+
+    def informar_error(self, error):
+        """Analiza un error de Monday y ajusta la velocidad si corresponde a un limite de uso"""
+        segundos = segundos_retry_after(error)
+        if segundos is not None:
+            self.informar_limite(segundos)
+
+    def llamar(self, operacion, *args, **kwargs):
+        """Ejecuta una operacion sincronica respetando el limite"""
+        self.adquirir()
+        try:
+            resultado = operacion(*args, **kwargs)
+        except Exception as e:
+            self.informar_error(e)
+            raise
+        self.informar_exito()
+        return resultado
+
+    def estado(self):
+        """Devuelve el estado actual del limitador"""
+        with self._lock:
+            return {
+                "requests_por_minuto": round(self.tasa * 60, 1),
+                "requests_por_minuto_max": round(self.tasa_maxima * 60, 1),
+                "tokens": round(self.tokens, 2),
+                "pausa_restante": round(max(0.0, self.pausa_hasta - time.monotonic()), 2),
+                "cantidad_limites": self.cantidad_limites,
+            }
+
+
+class RecursoLimitado:
+    """Recurso de un cliente de Monday cuyas operaciones pasan por el limitador"""
+
+    def __init__(self, recurso, limitador:MondayRateLimiter):
+        self._recurso = recurso
+        self._limitador = limitador
+
+    def __getattr__(self, nombre):
+        atributo = getattr(self._recurso, nombre)
+        if not callable(atributo):
+            return atributo
+
+        def operacion_limitada(*args, **kwargs):
+            return self._limitador.llamar(atributo, *args, **kwargs)
+        return operacion_limitada
+
+
+class ClienteLimitado:
+    """Envuelve un cliente sincronico de Monday para que todas sus llamadas respeten el limitador"""
+
+    def __init__(self, client, limitador:MondayRateLimiter):
+        self._client = client
+        self._limitador = limitador
+
+    def __getattr__(self, nombre):
+        return RecursoLimitado(getattr(self._client, nombre), self._limitador)
+
+
+_rate_limiter = None
+_rate_limiter_lock = Lock()
+
+
+def get_rate_limiter() -> MondayRateLimiter:
+    """Devuelve el limitador compartido por todo el proceso"""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = MondayRateLimiter()
+        return _rate_limiter
@@ -0,0 +1,175 @@
+""" Reintentos con backoff exponencial para las llamadas del importador a Monday
+
+Los errores transitorios (limite de uso, errores 5xx, cortes de conexion y timeouts)
+se reintentan con backoff exponencial con jitter, respetando el Retry-After que informa
+Monday y un tiempo total maximo por operacion. El resto de los errores (validaciones,
+ids inexistentes, permisos) son definitivos y se lanzan en el primer intento.
+
+Las mutaciones que crean elementos (create_*, duplicate_*) no son idempotentes: solo se
+reenvian si el pedido no llego a Monday (error de conexion) o si Monday lo rechazo por
+limite de uso o complejidad. Si fallan despues de enviarse (timeout de lectura, 5xx, corte
+de la conexion) se lanza ResultadoIncierto para que el llamador busque el elemento antes
+de volver a crearlo.
+"""
+
+import logging
+import os
+import random
+import re
+import time
+from threading import Lock
+
+import httpx
+import urllib3
+
+from monday_rate_limiter import segundos_retry_after
+
+logger = logging.getLogger(__name__)
+
+#Codigos de error GraphQL de Monday que indican una falla transitoria del servidor
+CODIGOS_TRANSITORIOS = ("INTERNAL_SERVER_ERROR", "API_TEMPORARILY_BLOCKED", "SERVICE_UNAVAILABLE")
+
+#Mutaciones que crean un elemento nuevo cada vez que se envian
+_MUTACION_NO_IDEMPOTENTE = re.compile(r"\b(?:create|duplicate)_\w+\s*\(")
+
+
+class ResultadoIncierto(Exception):
+    """Una mutacion que crea elementos fallo despues de enviarse, no se sabe si Monday la aplico"""
+
+    def __init__(self, nombre:str, error:Exception):
+        super().__init__(f"{nombre}: no se sabe si Monday aplico la mutacion: {error}")
+        self.nombre = nombre
+        self.error = error
+
+
+def no_fue_enviado(error) -> bool:
+    """Indica si el error ocurrio antes de que el pedido llegara a Monday (conexion rechazada o sin establecer)"""
+    if isinstance(error, urllib3.exceptions.MaxRetryError):
+        error = error.reason
+    return isinstance(error, (
+        httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout, ConnectionRefusedError,
+        urllib3.exceptions.NewConnectionError, urllib3.exceptions.ConnectTimeoutError,
+    ))
+
+
+def es_idempotente(metodo:str, args, kwargs) -> bool:
+    """Las consultas y las mutaciones que modifican o borran se pueden reenviar, las que crean elementos no"""
+    if metodo.startswith(("create_", "duplicate_")):
+        return False
+    query = args[0] if args else kwargs.get("query")
+    if not isinstance(query, str) or not query.lstrip().startswith("mutation"):
+        return True
+    return _MUTACION_NO_IDEMPOTENTE.search(query) is None
+
+
+def es_reintentable(error, idempotente:bool = True) -> bool:
+    """Indica si el error es transitorio y la operacion puede reintentarse.
+    Una operacion no idempotente solo se reintenta si Monday no la recibio o la rechazo por limite de uso"""
+    if segundos_retry_after(error) is not None:
+        return True
+    if not idempotente:
+        return no_fue_enviado(error)
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    if isinstance(error, (httpx.TransportError, ConnectionError, TimeoutError)):
+        return True
+    if isinstance(error, urllib3.exceptions.HTTPError):
+        #El SDK sincronico informa los errores http como "HTTP <status>: <cuerpo>"
+        status = re.match(r"HTTP (\d{3})", str(error))
+        if status:
+            return int(status.group(1)) >= 500
+        return True
+    for error_graphql in getattr(error, "original_errors", None) or []:
+        if isinstance(error_graphql, dict) and (error_graphql.get("extensions") or {}).get("code") in CODIGOS_TRANSITORIOS:
+            return True
+    return False
+
+
+class PoliticaReintento:
+    """Backoff exponencial con jitter completo, acotado por intentos y por tiempo total de la operacion"""
+    max_intentos:int
+    espera_base:float
+    espera_maxima:float
+    tiempo_maximo:float
+
+    def __init__(self, max_intentos = None, espera_base = None, espera_maxima = None, tiempo_maximo = None, contadores:dict = None):
+        self.max_intentos = int(max_intentos or os.getenv("MONDAY_RETRY_MAX_INTENTOS", 6))
+        self.espera_base = float(espera_base or os.getenv("MONDAY_RETRY_ESPERA_BASE", 1))
+        self.espera_maxima = float(espera_maxima or os.getenv("MONDAY_RETRY_ESPERA_MAXIMA", 60))
+        self.tiempo_maximo = float(tiempo_maximo or os.getenv("MONDAY_RETRY_TIEMPO_MAXIMO", 300))
+        #Reintentos realizados por operacion, se guardan en el estado del proceso
+        self.contadores = contadores if contadores is not None else {}
+        self._lock = Lock()
+
+    def calcular_espera(self, intento:int, error = None) -> float:
+        """Segundos a esperar antes del intento siguiente, nunca menos de lo que pide Monday"""
+        espera = random.uniform(0, min(self.espera_maxima, self.espera_base * 2 ** intento))
+        retry_after = segundos_retry_after(error) if error is not None else None
+        if retry_after is not None:
+            espera = max(espera, retry_after)
+        return espera
+
+    def registrar_reintento(self, nombre:str):
+        with self._lock:
+            self.contadores[nombre] = self.contadores.get(nombre, 0) + 1
+
+    def ejecutar(self, nombre:str, operacion, *args, **kwargs):
+        """Ejecuta la operacion reintentando los errores transitorios"""
+        return self._ejecutar(nombre, operacion, args, kwargs, True)
+
+    def ejecutar_mutacion(self, nombre:str, operacion, *args, **kwargs):
+        """Ejecuta una mutacion que crea elementos, si falla despues de enviarse lanza ResultadoIncierto en vez de reenviarla"""
+        return self._ejecutar(nombre, operacion, args, kwargs, False)
+
+    def _ejecutar(self, nombre:str, operacion, args, kwargs, idempotente:bool):
+        inicio = time.monotonic()
+        intento = 0
+        while True:
+            try:
+                return operacion(*args, **kwargs)
+            except Exception as e:
+                intento += 1
+                if not es_reintentable(e, idempotente):
+                    if not idempotente and es_reintentable(e):
+                        raise ResultadoIncierto(nombre, e) from e
+                    raise
+                if intento >= self.max_intentos:
+                    raise
+                espera = self.calcular_espera(intento, e)
+                if time.monotonic() - inicio + espera > self.tiempo_maximo:
+                    logger.error(f"{nombre}: se agoto el tiempo maximo de reintentos ({self.tiempo_maximo} s)")
+                    raise
+                self.registrar_reintento(nombre)
+                logger.warning(f"{nombre}: error transitorio, reintento {intento} en {espera:.1f} s: {e}")
+                time.sleep(espera)
+
+
+class RecursoConReintentos:
+    """Recurso de un cliente de Monday cuyas operaciones se reintentan ante errores transitorios"""
+
+    def __init__(self, nombre:str, recurso, politica:PoliticaReintento):
+        self._nombre = nombre
+        self._recurso = recurso
+        self._politica = politica
+
+    def __getattr__(self, nombre):
+        atributo = getattr(self._recurso, nombre)
+        if not callable(atributo):
+            return atributo
+
+        def operacion_con_reintentos(*args, **kwargs):
+            if es_idempotente(nombre, args, kwargs):
+                return self._politica.ejecutar(f"{self._nombre}.{nombre}", atributo, *args, **kwargs)
+            return self._politica.ejecutar_mutacion(f"{self._nombre}.{nombre}", atributo, *args, **kwargs)
+        return operacion_con_reintentos
+
+
+class ClienteConReintentos:
+    """Envuelve un cliente sincronico de Monday para que todas sus llamadas apliquen la politica de reintentos"""
+
+    def __init__(self, client, politica:PoliticaReintento):
+        self._client = client
+        self._politica = politica
+
+    def __getattr__(self, nombre):
+        return RecursoConReintentos(nombre, getattr(self._client, nombre), self._politica)
@@ -0,0 +1,93 @@
+""" Agrupacion de queries identicas concurrentes (single-flight)
+
+Cuando varias sesiones piden al mismo tiempo la misma consulta (por ejemplo las columnas o
+los items de un tablero que todos abren durante un incidente) solo la primera se envia a
+Monday y las demas esperan su resultado. La clave es el documento GraphQL normalizado (sin
+espacios, comas ni comentarios que no cambian su significado) mas las variables. Las
+mutations no se agrupan nunca.
+"""
+
+import asyncio
+import copy
+import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+#Strings (de bloque o simples), comentarios, separadores ignorados por GraphQL y el resto
+_TOKEN = re.compile(r'"""[\s\S]*?"""|"(?:\\.|[^"\\])*"|#[^\n\r]*|[\s,]+|[^\s,"#]+|"')
+
+
+def es_caracter_nombre(caracter:str) -> bool:
+    return caracter.isalnum() or caracter == "_"
+
+
+def normalizar_query(query:str) -> str:
+    """Documento GraphQL sin espacios, saltos de linea, comas ni comentarios, el contenido de los strings no se modifica"""
+    partes = []
+    separado = False
+    for token in _TOKEN.findall(query):
+        if token[0] == "#" or not token.strip(", \t\r\n"):
+            separado = True
+            continue
+        if separado and partes and es_caracter_nombre(partes[-1][-1]) and es_caracter_nombre(token[0]):
+            partes.append(" ")
+        partes.append(token)
+        separado = False
+    return "".join(partes)
+
+
+def es_mutacion(query_normalizada:str) -> bool:
+    return query_normalizada.startswith(("mutation", "subscription"))
+
+
+def clave_query(query_normalizada:str, variables:dict = None) -> str:
+    return f"{query_normalizada}\n{json.dumps(variables, sort_keys=True, default=str) if variables else ''}"
+
+
+class SingleFlight:
+    """Comparte el resultado de una llamada en curso con las llamadas concurrentes de la misma clave"""
+
+    def __init__(self):
+        #clave -> futuro con el resultado de la llamada que se esta ejecutando
+        self.en_curso = {}
+        self.ejecutadas = 0
+        self.compartidas = 0
+
+    async def ejecutar(self, clave:str, operacion):
+        """Ejecuta operacion (funcion asincronica sin parametros) o espera la que ya esta en curso con la misma clave.
+        Las llamadas que esperan reciben una copia del resultado, o la misma excepcion"""
+        futuro = self.en_curso.get(clave)
+        if futuro is not None:
+            self.compartidas += 1
+            try:
+                return copy.deepcopy(await asyncio.shield(futuro))
+            except asyncio.CancelledError:
+                if not futuro.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                #Se cancelo la llamada que estaba en curso y no esta, se vuelve a intentar
+                return await self.ejecutar(clave, operacion)
+
+        futuro = asyncio.get_running_loop().create_future()
+        self.en_curso[clave] = futuro
+        self.ejecutadas += 1
+        try:
+            resultado = await operacion()
+        except asyncio.CancelledError:
+            futuro.cancel()
+            raise
+        except Exception as e:
+            futuro.set_exception(e)
+            #Marca la excepcion como leida para no registrar un aviso si nadie estaba esperando
+            futuro.exception()
+            raise
+        else:
+            futuro.set_result(resultado)
+            return resultado
+        finally:
+            if self.en_curso.get(clave) is futuro:
+                del self.en_curso[clave]
+
+    def estado(self) -> dict:
+        return {"en_curso": len(self.en_curso), "ejecutadas": self.ejecutadas, "compartidas": self.compartidas}
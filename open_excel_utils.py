@@ -5,14 +5,117 @@ from monday.resources.types import BoardKind
 import requests
 import os
 import time
-import shutil
 import json
-from threading import Thread
-from datetime import datetime,timedelta
+from threading import Lock
 from jinja2 import Environment, FileSystemLoader
+import math
+import importlib.util
+import itertools
+import tracemalloc
+import openpyxl
+from graphql_batcher import COMPLEJIDAD_MUTACION_ESTIMADA, MutationBatcher
+from monday_rate_limiter import ClienteLimitado, MondayRateLimiter, get_rate_limiter
+from monday_complexity import get_presupuesto
+from monday_retry import ClienteConReintentos, PoliticaReintento, ResultadoIncierto
+from excel_planner import ArmadorPlan, EjecutorPlan, NodoPlan, PlanImportacion, armar_plan
+from excel_process_pool import get_pool_parseo
+from excel_file_cache import get_cache_archivos
+from excel_journal import JournalImportacion, leer_journal
+from monday_cache import get_cache_respuestas
 
 logger = logging.getLogger(__name__)
 
+#Complejidad estimada de las queries de lectura del importador (reconciliacion de filas en curso)
+COMPLEJIDAD_QUERY_ESTIMADA = 1000
+
+#Board plantilla con las columnas del importador, se crea una vez y se guarda en MONDAY_PLANTILLA_PATH
+_plantilla = None
+_plantilla_lock = Lock()
+_plantilla_creacion_lock = Lock()
+
+#Mutaciones para crear la plantilla: board, 2 columnas, item y subitem auxiliares, 2 columnas del sub board y borrar el item
+MUTACIONES_PLANTILLA = 8
+#Borrado de las 3 columnas por defecto del sub board de la plantilla, agrupadas
+MUTACIONES_AGRUPADAS_PLANTILLA = 3
+
+
+def get_path_plantilla():
+    return os.getenv("MONDAY_PLANTILLA_PATH", "monday_plantilla.json")
+
+
+def get_plantilla():
+    """Devuelve la plantilla guardada (board_id, columnas, columnas_sub) o None si todavia no se creo"""
+    global _plantilla
+    with _plantilla_lock:
+        if _plantilla is None and os.path.exists(get_path_plantilla()):
+            with open(get_path_plantilla(), 'r') as input:
+                _plantilla = json.load(input)
+        return _plantilla
+
+
+def set_plantilla(plantilla:dict):
+    """Guarda la plantilla, con None se descarta para crearla de nuevo"""
+    global _plantilla
+    with _plantilla_lock:
+        _plantilla = plantilla
+        if plantilla is None:
+            if os.path.exists(get_path_plantilla()):
+                os.remove(get_path_plantilla())
+            return
+        with open(f"{get_path_plantilla()}.tmp", 'w') as outfile:
+            json.dump(plantilla, outfile)
+        os.replace(f"{get_path_plantilla()}.tmp",get_path_plantilla())
+
+
+#Codigos de error de monday cuando el board pedido no existe o fue eliminado
+CODIGOS_BOARD_INEXISTENTE = ("ResourceNotFoundException", "InvalidBoardIdException")
+
+
+def es_board_inexistente(error) -> bool:
+    """Indica si monday rechazo la operacion porque el board no existe"""
+    for error_graphql in getattr(error, "original_errors", None) or []:
+        if isinstance(error_graphql, dict) and (error_graphql.get("extensions") or {}).get("code") in CODIGOS_BOARD_INEXISTENTE:
+            return True
+    texto = str(error).lower()
+    return "board" in texto and ("not found" in texto or "does not exist" in texto)
+
+
+#Mediciones de memoria en curso en el proceso, tracemalloc se detiene cuando termina la ultima
+_mediciones_memoria = 0
+_mediciones_memoria_lock = Lock()
+
+
+def get_motor_excel():
+    """Motor de lectura de xlsx: MONDAY_EXCEL_ENGINE o calamine si esta instalado, si no openpyxl (pandas lo abre en modo read_only)"""
+    motor = os.getenv("MONDAY_EXCEL_ENGINE", "auto")
+    if motor != "auto":
+        return motor
+    if importlib.util.find_spec("python_calamine") is not None:
+        return "calamine"
+    return "openpyxl"
+
+
+def iniciar_medicion_memoria() -> int:
+    """Empieza a medir la memoria asignada en el proceso actual, devuelve la memoria asignada al inicio en bytes"""
+    global _mediciones_memoria
+    with _mediciones_memoria_lock:
+        if _mediciones_memoria == 0:
+            tracemalloc.start()
+        _mediciones_memoria += 1
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+
+def finalizar_medicion_memoria(inicio:int) -> float:
+    """Memoria pico en MB asignada desde iniciar_medicion_memoria. Con lecturas simultaneas en el mismo proceso el pico es compartido"""
+    global _mediciones_memoria
+    with _mediciones_memoria_lock:
+        pico = tracemalloc.get_traced_memory()[1]
+        _mediciones_memoria -= 1
+        if _mediciones_memoria == 0:
+            tracemalloc.stop()
+    return round(max(pico - inicio, 0) / 1024 / 1024, 1)
+
 class AnalisisItem():
     """Objeto para analizar y mostar la informacion de un item de monday"""
     row_inicio:int
@@ -31,6 +134,40 @@ class AnalisisItem():
         return f"item: {self.item_name} max_outline: {self.max_outline} inicio:{self.row_inicio +1} fin:{self.row_fin +1}"
 
 
+class SimulacionImportacion():
+    """Resultado de simular una importacion sin llamar a monday"""
+    boards:int
+    groups:int
+    items:int
+    subitems:int
+    columnas:int
+    mutaciones:int
+    requests:int
+    complejidad:int
+    niveles:int
+    segundos_estimados:float
+
+    def __init__(self):
+        self.boards = 0
+        self.groups = 0
+        self.items = 0
+        self.subitems = 0
+        self.columnas = 0
+        self.mutaciones = 0
+        self.requests = 0
+        self.complejidad = 0
+        self.niveles = 0
+        self.segundos_estimados = 0.0
+        self.huerfanos = []
+        self.errores_fechas = []
+        self.estadisticas_lectura = {}
+
+    def get_duracion(self):
+        """Duracion estimada en formato HH:MM:SS"""
+        segundos = int(round(self.segundos_estimados))
+        return f"{segundos // 3600:02d}:{segundos % 3600 // 60:02d}:{segundos % 60:02d}"
+
+
 class ExcelUtilsWorks:
     """Utilidades para el directorio de procesamiento"""
     directorio:str = 'procesa_archivos'
@@ -74,7 +211,7 @@ class ExcelUtilsMonday:
     sub_board_id_column_fecha_inicio = None
     sub_board_id_column_fecha_fin = None
     pos = 0
-    wait_time = 1
+    #Si esperar es verdadero las llamadas a monday pasan por el limitador de velocidad adaptativo compartido
     esperar = True
     proceso_completo = False
     error = False
@@ -84,12 +221,44 @@ class ExcelUtilsMonday:
     procesando = True
     sub_board_columns_creadas = False
     format_fecha_string = "%B %d, %Y %I:%M %p"
+    #Desfase horario que se suma a las fechas del excel
+    horas_desfase = 3
+    #Fechas que no se pudieron parsear: fila, columna y valor
+    errores_fechas:list = None
+    #Motor, tiempo y memoria de la lectura del excel
+    estadisticas_lectura:dict = None
+    #Avance, velocidad y reintentos de la descarga del archivo
+    descarga:dict = None
+    #Ids creados que todavia no estan en data.json, ver excel_journal
+    journal:JournalImportacion = None
     #Esto permite que los niveles 5 en adelante se carguen como subitems si se setea esta variable como true
     cargar_lvl_superirores_a_como_subitems = False
     titulo_column_name = "Name"
     fecha_inicio_column_name = "Start"
     fecha_fin_column_name = "Finish"
     nivel_column_name = "Outline Level"
+    #Agrupa las mutaciones independientes (valores de columnas, borrado de columnas) en un solo request
+    batcher:MutationBatcher = None
+    batch_max_operaciones = None
+    batch_max_complejidad = None
+    #Los errores transitorios de Monday se reintentan con backoff, reintentos cuenta los reintentos por operacion
+    politica_reintento:PoliticaReintento = None
+    reintentos:dict = None
+    #Hilos que crean en paralelo las ramas independientes del plan de importacion
+    max_workers_importacion = None
+    #Id de monday creado para cada fila del excel (clave: NodoPlan.clave), permite continuar un proceso sin repetir filas
+    ids_filas:dict = None
+    #Filas cuya mutacion de creacion se envio sin confirmar el id, al continuar se buscan en monday
+    filas_en_curso:dict = None
+    #Sub board de cada board (id y columnas de fecha), se llena con la respuesta del primer create_subitem
+    sub_boards:dict = None
+    #Los boards se crean con duplicate_board de la plantilla, que ya tiene las columnas de fecha del board y del sub board
+    usar_plantilla:bool = False
+    #Columnas de fecha (inicio, fin) de cada board creado
+    columnas_fecha:dict = None
+    #Lee el excel por bloques de filas y crea cada bloque en monday antes de leer el siguiente
+    streaming:bool = False
+    tamano_bloque_lectura:int = 2000
 
     def __init__(self):
         self.local_filename = ""
@@ -109,7 +278,6 @@ class ExcelUtilsMonday:
         self.sub_board_id_column_fecha_inicio = None
         self.sub_board_id_column_fecha_fin = None
         self.pos = 0
-        self.wait_time = 1
         self.esperar = True
         self.proceso_completo = False
         self.error = False
@@ -119,11 +287,32 @@ class ExcelUtilsMonday:
         self.procesando = True
         self.sub_board_columns_creadas = False
         self.format_fecha_string = "%B %d, %Y %I:%M %p"
+        self.horas_desfase = 3
+        self.errores_fechas = []
+        self.estadisticas_lectura = {}
+        self.descarga = {}
+        self.journal = None
         self.cargar_lvl_superirores_a_como_subitems = False
         self.titulo_column_name = "Name"
         self.fecha_inicio_column_name = "Start"
         self.fecha_fin_column_name = "Finish"
         self.nivel_column_name = "Outline Level"
+        self.batcher = None
+        self.batch_max_operaciones = None
+        self.batch_max_complejidad = None
+        self.politica_reintento = None
+        self.reintentos = {}
+        self.max_workers_importacion = None
+        self.ids_filas = {}
+        self.filas_en_curso = {}
+        self.sub_boards = {}
+        self.usar_plantilla = False
+        self._locks_sub_board = {}
+        self.columnas_fecha = {}
+        self.streaming = False
+        self.tamano_bloque_lectura = int(os.getenv("MONDAY_EXCEL_BLOQUE", 2000))
+        self._lock_sub_board = Lock()
+        self._lock_grupo_inicial = Lock()
 
 
     def clean_files(self,purga_completa = True):
@@ -138,6 +327,8 @@ class ExcelUtilsMonday:
             if self.uid is not None and self.uid != "" and os.path.exists(data_json):
                 logger.info(f"elimina:{data_json}")
                 os.remove(data_json)
+            if self.uid is not None and self.uid != "" and os.path.exists(self.get_path_journal()):
+                os.remove(self.get_path_journal())
 
             #proceso para purgar completamente el directorio
             if purga_completa and self.uid is not None and self.uid != "" and self.proceso_completo:
@@ -168,20 +359,25 @@ class ExcelUtilsMonday:
             return None
 
     def download_file(self,url, local_filename):
-        """Descarga un archivo desde internet"""
+        """Descarga un archivo desde internet, si ya esta en el cache de archivos solo se revalida"""
         try:
-            with requests.get(url, stream=True,timeout=30) as r:
-                #r.raise_for_status()
-                if r.status_code == 200:
-                    with open(local_filename, 'wb') as f:
-                        for chunk in r.iter_content(chunk_size=8192): 
-                            f.write(chunk)
-                    self.local_filename = local_filename
-                    return True
+            get_cache_archivos().archivo_url(url,local_filename,self.registrar_progreso_descarga)
+            self.local_filename = local_filename
+            return True
         except Exception as e:
             logger.error(str(e))
+            self.descarga["error"] = str(e)
             return False
-        return False
+
+    def registrar_progreso_descarga(self,descargados:int,total:int,bytes_por_segundo:float,reintentos:int):
+        """Avance de la descarga, se muestra en el estado del proceso"""
+        self.descarga = {
+            "mb":round(descargados / 1048576,2),
+            "total_mb":round(total / 1048576,2) if total else None,
+            "porcentaje":round(descargados * 100 / total,1) if total else None,
+            "mb_por_segundo":round(bytes_por_segundo / 1048576,2) if bytes_por_segundo else None,
+            "reintentos":reintentos,
+        }
 
     def get_file(self,uid,filename):
         """descarga el archivo"""
@@ -195,11 +391,12 @@ class ExcelUtilsMonday:
                 
                 if not self.download_file(filename,file_path):
                     self.error = True
-                    self.message = "No se pudo descargar el archivo"
+                    self.message = f"No se pudo descargar el archivo: {self.descarga.get('error')}"
                 logger.info(f"descarga {filename} {file_path}")
             else:
                 file_path= self.get_local_file_name(uid,"archivo.xlsx")
-                shutil.copy(filename,file_path)
+                #Hardlink al contenido en el cache, solo se copia si el archivo cambio
+                get_cache_archivos().archivo_local(filename,file_path)
             self.local_filename = file_path
             return self.local_filename
 
@@ -212,7 +409,7 @@ class ExcelUtilsMonday:
             return None
         else:
             logger.info(f"abriendo:{file_path}")
-            df = pd.read_excel(file_path)
+            df = self.leer_dataframe(file_path)
             logger.info(f"Retorna pandas:{file_path}")
             #logger.info(df)
             #logger.info(df.columns.values)
@@ -221,6 +418,58 @@ class ExcelUtilsMonday:
             else:
                 return None
 
+    def leer_dataframe(self,file_path):
+        """Lee solo las columnas que usa el importador, con el motor mas rapido disponible, y registra tiempo y memoria de la lectura"""
+        requeridas = {self.titulo_column_name,self.fecha_inicio_column_name,self.fecha_fin_column_name,self.nivel_column_name}
+        motor = get_motor_excel()
+        memoria = iniciar_medicion_memoria()
+        inicio = time.perf_counter()
+        try:
+            df = pd.read_excel(file_path,engine=motor,usecols=lambda columna: columna in requeridas)
+        finally:
+            memoria_pico_mb = finalizar_medicion_memoria(memoria)
+        self.estadisticas_lectura = {
+            "motor":motor,
+            "segundos":round(time.perf_counter() - inicio,3),
+            "memoria_pico_mb":memoria_pico_mb,
+            "filas":len(df.index),
+            "columnas":len(df.columns),
+        }
+        logger.info(f"Lectura de {file_path}: {self.estadisticas_lectura}")
+        return df
+
+    def get_config_parseo(self):
+        """Configuracion que necesita parsear_excel para leer el archivo en otro proceso"""
+        return {
+            "titulo_column_name":self.titulo_column_name,
+            "fecha_inicio_column_name":self.fecha_inicio_column_name,
+            "fecha_fin_column_name":self.fecha_fin_column_name,
+            "nivel_column_name":self.nivel_column_name,
+            "format_fecha_string":self.format_fecha_string,
+            "horas_desfase":self.horas_desfase,
+            "cargar_lvl_superirores_a_como_subitems":self.cargar_lvl_superirores_a_como_subitems,
+        }
+
+    def leer_excel(self,filename,download=False,uid = None):
+        """Obtiene el archivo y lo parsea en el pool de procesos, devuelve los registros (titulo, inicio, fin, nivel) y el plan de importacion"""
+        if download:
+            self.download = True
+        file_path = self.get_file(uid,filename)
+        if self.error:
+            return None, None
+        logger.info(f"abriendo:{file_path}")
+        resultado = get_pool_parseo().ejecutar(parsear_excel,os.path.abspath(file_path),self.get_config_parseo())
+        self.estadisticas_lectura = resultado["estadisticas_lectura"]
+        if resultado["error"]:
+            self.error = True
+            self.message = resultado["error"]
+            return None, None
+        self.errores_fechas = resultado["errores_fechas"]
+        filas = list(zip(*resultado["columnas"]))
+        plan = PlanImportacion.desde_columnas(filas,resultado["plan"])
+        logger.info(f"Parseado:{file_path} filas:{len(filas)}")
+        return filas, plan
+
     def list_columns(self,df:pd.DataFrame):
         """lista columnas del documento pandas/excel"""
         return df.columns.values
@@ -230,8 +479,6 @@ class ExcelUtilsMonday:
         if row_id < 0 or row_id >= len(df):
             return None
         arr_cols = df.columns.values
-        logger.info("cantidad columnas")
-        logger.info(len(arr_cols))
         if len(arr_cols) > 0:
             #index_col = -1
             index_col = next((index for index, col in enumerate(arr_cols) if col == column_name), -1)
@@ -250,6 +497,85 @@ class ExcelUtilsMonday:
         else:
             return None
 
+    def extraer_filas(self,df:pd.DataFrame):
+        """Extrae una unica vez las columnas que usa el importador, devuelve una lista de registros (titulo, inicio, fin, nivel).
+        Las fechas se devuelven ya parseadas y las invalidas quedan en errores_fechas"""
+        self.errores_fechas = []
+        fechas_inicio = self.parsear_fechas(df[self.fecha_inicio_column_name],self.fecha_inicio_column_name)
+        fechas_fin = self.parsear_fechas(df[self.fecha_fin_column_name],self.fecha_fin_column_name)
+        if self.errores_fechas:
+            logger.warning(f"Fechas invalidas en el excel: {len(self.errores_fechas)}")
+        return list(zip(df[self.titulo_column_name].tolist(),fechas_inicio,fechas_fin,df[self.nivel_column_name].tolist()))
+
+    def parsear_fechas(self,valores,columna:str = None,fila_inicio:int = 0):
+        """Parsea una columna de fechas en una sola pasada, devuelve una lista de textos 'YYYY-MM-DD HH:MM:SS' o None si la fecha es invalida"""
+        serie = pd.Series(valores,dtype=object).reset_index(drop=True)
+        fechas = pd.to_datetime(serie.astype(str),format=self.format_fecha_string,errors="coerce")
+        fechas = fechas + pd.Timedelta(hours=self.horas_desfase)
+        textos = fechas.dt.strftime("%Y-%m-%d %H:%M:%S").astype(object).where(fechas.notna(),None)
+        if columna is not None:
+            invalidas = serie.notna() & fechas.isna()
+            for fila in invalidas[invalidas].index:
+                self.errores_fechas.append({"fila":int(fila) + fila_inicio,"columna":columna,"valor":str(serie[fila])})
+        return textos.tolist()
+
+    def iterar_filas(self,file_path):
+        """Lee el excel con openpyxl en modo read_only y devuelve los registros (titulo, inicio, fin, nivel) de a uno.
+        Solo se mantiene en memoria un bloque de tamano_bloque_lectura filas, donde se parsean las fechas"""
+        self.errores_fechas = []
+        inicio = time.perf_counter()
+        cantidad_filas = 0
+        #La memoria se mide mientras se lee y parsea cada bloque, no mientras se importa en monday
+        memoria_pico_mb = 0
+        memoria = iniciar_medicion_memoria()
+        libro = None
+        try:
+            libro = openpyxl.load_workbook(file_path,read_only=True,data_only=True)
+            filas = libro.active.iter_rows(values_only=True)
+            encabezado = list(next(filas,()))
+            if not self.validar_archivo_excel(pd.DataFrame(columns=encabezado)):
+                return
+            columnas = [self.titulo_column_name,self.fecha_inicio_column_name,self.fecha_fin_column_name,self.nivel_column_name]
+            indices = [encabezado.index(columna) for columna in columnas]
+            bloque = []
+            for valores in filas:
+                bloque.append(tuple(valores[indice] if indice < len(valores) else None for indice in indices))
+                if len(bloque) >= self.tamano_bloque_lectura:
+                    registros = self.parsear_bloque(bloque,cantidad_filas)
+                    memoria_pico_mb = max(memoria_pico_mb,finalizar_medicion_memoria(memoria))
+                    memoria = None
+                    yield from registros
+                    cantidad_filas += len(bloque)
+                    bloque = []
+                    memoria = iniciar_medicion_memoria()
+            registros = self.parsear_bloque(bloque,cantidad_filas)
+            memoria_pico_mb = max(memoria_pico_mb,finalizar_medicion_memoria(memoria))
+            memoria = None
+            yield from registros
+            cantidad_filas += len(bloque)
+        finally:
+            if libro is not None:
+                libro.close()
+            if memoria is not None:
+                memoria_pico_mb = max(memoria_pico_mb,finalizar_medicion_memoria(memoria))
+            #El tiempo incluye la importacion de las filas, la lectura se intercala con las llamadas a monday
+            self.estadisticas_lectura = {
+                "motor":"openpyxl-streaming",
+                "segundos":round(time.perf_counter() - inicio,3),
+                "memoria_pico_mb":memoria_pico_mb,
+                "filas":cantidad_filas,
+                "columnas":4,
+            }
+
+    def parsear_bloque(self,bloque:list,fila_inicio:int):
+        """Parsea las fechas de un bloque de registros leidos en modo streaming"""
+        if not bloque:
+            return []
+        titulos, fechas_inicio, fechas_fin, niveles = zip(*bloque)
+        fechas_inicio = self.parsear_fechas(fechas_inicio,self.fecha_inicio_column_name,fila_inicio)
+        fechas_fin = self.parsear_fechas(fechas_fin,self.fecha_fin_column_name,fila_inicio)
+        return list(zip(titulos,fechas_inicio,fechas_fin,niveles))
+
     def salvar_estado(self,error=False):
         """Salva el estado del proceso en un archivo json data.json"""
         data = {
@@ -266,11 +592,74 @@ class ExcelUtilsMonday:
             "sub_board_id_column_fecha_inicio":str(self.sub_board_id_column_fecha_inicio),
             "sub_board_id_column_fecha_fin":str(self.sub_board_id_column_fecha_fin),
             "sub_board_columns_creadas":str(self.sub_board_columns_creadas),
+            "reintentos":self.reintentos,
+            "errores_fechas":self.errores_fechas,
+            "estadisticas_lectura":self.estadisticas_lectura,
+            "descarga":self.descarga,
+            "ids_filas":self.ids_filas,
+            "filas_en_curso":self.filas_en_curso,
+            "sub_boards":self.sub_boards,
+            "columnas_fecha":self.columnas_fecha,
         }
         text_json = json.dumps(data)
         logging.info(text_json)
-        with open(f'{self.get_local_uid_path(self.uid)}/data.json', 'w') as outfile:
-            json.dump(data, outfile)
+        #Se escribe en un temporal y se reemplaza, una caida durante la escritura no deja un data.json a medias
+        path = f'{self.get_local_uid_path(self.uid)}/data.json'
+        with open(f'{path}.tmp', 'w') as outfile:
+            outfile.write(text_json)
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        os.replace(f'{path}.tmp',path)
+        #data.json ya tiene todos los ids, el journal se reinicia
+        if self.journal is not None:
+            self.journal.eliminar()
+
+    def get_path_journal(self):
+        return f'{self.get_local_uid_path(self.uid)}/journal.jsonl'
+
+    def abrir_journal(self,continuar:bool):
+        """Crea el journal del proceso, un proceso nuevo descarta el journal de una ejecucion anterior con el mismo uid"""
+        self.journal = JournalImportacion(self.get_path_journal())
+        if not continuar:
+            self.journal.eliminar()
+
+    def registrar_en_journal(self,entrada:dict,forzar:bool = False):
+        if self.journal is not None:
+            self.journal.registrar(entrada,forzar)
+
+    def registrar_en_curso(self,nodos:list):
+        """Confirma en el journal, con una sola escritura, la intencion de crear los nodos de un nivel antes de enviar sus mutaciones.
+        Si el proceso se corta, al continuar esos nodos se buscan en monday en vez de crearlos otra vez"""
+        for nodo in nodos:
+            self.filas_en_curso[nodo.clave()] = nodo.fila
+        if self.journal is not None:
+            self.journal.registrar_varios([{"en_curso":nodo.clave(),"fila":nodo.fila} for nodo in nodos],True)
+
+    def aplicar_journal(self):
+        """Aplica sobre el estado leido las entradas del journal que no llegaron a data.json, devuelve si habia entradas"""
+        entradas = leer_journal(self.get_path_journal())
+        for entrada in entradas:
+            if "en_curso" in entrada:
+                self.filas_en_curso[entrada["en_curso"]] = entrada["fila"]
+            elif "fila" in entrada:
+                self.ids_filas[entrada["clave"]] = entrada["id"]
+                self.filas_en_curso.pop(entrada["clave"],None)
+                if entrada["tipo"] == "board":
+                    self.board_id = entrada["id"]
+                    self.columnas_fecha[str(entrada["id"])] = entrada["columnas"]
+                    self.id_column_fecha_inicio, self.id_column_fecha_fin = entrada["columnas"]
+                elif entrada["tipo"] == "group":
+                    self.group_id = entrada["id"]
+                elif entrada["tipo"] == "item":
+                    self.item_id_l1 = entrada["id"]
+            if "sub_board" in entrada:
+                self.sub_board_id = entrada["sub_board"]
+                self.sub_board_id_column_fecha_inicio, self.sub_board_id_column_fecha_fin = entrada["columnas"]
+                self.sub_board_columns_creadas = True
+                self.sub_boards[str(entrada.get("board",self.board_id))] = {"id":entrada["sub_board"],"columnas":entrada["columnas"]}
+        if entradas:
+            logger.info(f"Journal: {len(entradas)} entradas aplicadas sobre el estado guardado")
+        return len(entradas) > 0
 
     def listar_estado_texto(self):
         """Aplica un template jinja a la información de estado"""
@@ -284,9 +673,10 @@ class ExcelUtilsMonday:
         return message
 
     def read_estado(self):
-        """Recupera el estado del proceso del archivo json data.json"""
+        """Recupera el estado del proceso del archivo json data.json y del journal de ids creados despues"""
         path = f'{self.get_local_uid_path(self.uid)}/data.json'
-        if os.path.exists(path):
+        existe = os.path.exists(path)
+        if existe:
             with open(path, 'r') as input:
                 data = json.load(input)
             self.board_id = data["board_id"]
@@ -310,6 +700,25 @@ class ExcelUtilsMonday:
                 self.sub_board_id_column_fecha_fin = data["sub_board_id_column_fecha_fin"]
             if "sub_board_columns_creadas" in data:
                 self.sub_board_columns_creadas = data["sub_board_columns_creadas"]
+            if "reintentos" in data:
+                self.reintentos = data["reintentos"]
+            if "errores_fechas" in data:
+                self.errores_fechas = data["errores_fechas"]
+            if "estadisticas_lectura" in data:
+                self.estadisticas_lectura = data["estadisticas_lectura"]
+            if "descarga" in data:
+                self.descarga = data["descarga"]
+            if "ids_filas" in data:
+                self.ids_filas = data["ids_filas"]
+            if "filas_en_curso" in data:
+                self.filas_en_curso = data["filas_en_curso"]
+            if "sub_boards" in data:
+                self.sub_boards = data["sub_boards"]
+            elif str(data.get("sub_board_columns_creadas")) == "True" and self.board_id:
+                #Estado anterior al cache por board: un unico sub board, el del ultimo board
+                self.sub_boards[str(self.board_id)] = {"id":self.sub_board_id,"columnas":[self.sub_board_id_column_fecha_inicio,self.sub_board_id_column_fecha_fin]}
+            if "columnas_fecha" in data:
+                self.columnas_fecha = data["columnas_fecha"]
             logger.info("Fin de proceso")
             logger.info(self.board_id)
             logger.info(self.group_id)
@@ -317,8 +726,7 @@ class ExcelUtilsMonday:
             logger.info(self.pos)
             logger.info(self.error)
             logger.info(self.local_filename)
-            return True
-        return False
+        return self.aplicar_journal() or existe
 
     def validar_archivo_excel(self,df):
         """Valida si el archivo excel posee todas las columnas requeridas"""
@@ -362,20 +770,8 @@ class ExcelUtilsMonday:
 
     def parse_date(self,fecha:str):
         """parsea una fecha"""
-        logger.info(fecha)
-        logger.info(self.format_fecha_string)
         if fecha is not None:
-            try:
-                dt_fecha = datetime.strptime(f"{fecha}",self.format_fecha_string)
-                time_delta = timedelta(hours=3)
-                dt_fecha = dt_fecha + time_delta
-                resp_fecha = str(dt_fecha)
-                logger.info(resp_fecha)
-                return resp_fecha
-            except Exception as e:
-                logger.error(str(e))
-                logger.info(f"no se pudo parsear la fecha {fecha}")
-                return None
+            return self.parsear_fechas([fecha])[0]
         else:
             return None
   
@@ -384,15 +780,18 @@ class ExcelUtilsMonday:
         self.error = False
         self.message = ""
         self.continuar = continuar
+        if self.streaming:
+            self.process_excel_streaming(filename,download,monday_client,uid,rows,continuar)
+            return
         #Actualmente sobrescribe el archivo si continua
         logger.info(download)
-        df = self.get_pandas(filename,download,uid)
-        if self.error or df is None:
+        #El parseo y el plan se arman en el pool de procesos, aca solo queda la fase de llamadas a monday
+        filas, plan_completo = self.leer_excel(filename,download,uid)
+        if self.error or filas is None:
             self.salvar_estado(self.error)
         else:
-            logger.info(self.list_columns(df))
             logger.info(uid)
-            cant_total_filas = len(df.index)
+            cant_total_filas = len(filas)
             cantidad_a_procesar = 0
             self.procesando = True
             if rows == 0:
@@ -406,69 +805,36 @@ class ExcelUtilsMonday:
                     cantidad_a_procesar = cant_total_filas
             if not continuar:
                 self.pos = 0
+            self.abrir_journal(continuar)
             logger.info(f"se procesaran {rows} {self.pos} de {cantidad_a_procesar} registros")
             if continuar:
-                if self.error:
+                if self.error and not self.ids_filas:
                     self.pos = self.pos -1 # Si termino en estado de error retomo desde el ultimo registro que no se pudo procesar
 
                 self.eliminado_grupo_inicial = True # Seteo en verdadero que el grupo inicial fue eliminado para que no dispare el error de que el grupo inicial no existe
                 self.error = False
             logger.info("Cantidad de rows:")
             logger.info(cantidad_a_procesar)
+            monday_client = self.preparar_cliente(monday_client)
             try:
-                for i in range(cantidad_a_procesar):
-                    if not continuar or (continuar and i > self.pos):
-                        self.pos = i
-                        title = self.read_cell(df,self.titulo_column_name,i)
-                        dt_inicio = self.read_cell(df,self.fecha_inicio_column_name,i)
-                        dt_fin = self.read_cell(df,self.fecha_fin_column_name,i)
-                        fecha_inicio = self.parse_date(dt_inicio)
-                        fecha_fin = self.parse_date(dt_fin)
-                        outline_lvl = self.read_cell(df,self.nivel_column_name,i)
-                        message = f"Row: {i}"
-                        logger.info(message)
-                        logger.info(title)
-                        logger.info(outline_lvl)
-                        logger.info(self.identify_type(outline_lvl))
-                        if self.identify_type(outline_lvl) == 'board':
-                            self.board_id = self.xls_create_board(monday_client,title,'public')
-                            self.id_column_fecha_inicio = self.xls_create_column(monday_client,self.board_id,"Inicio","Fecha inicio","date")
-                            self.id_column_fecha_fin = self.xls_create_column(monday_client,self.board_id,"Fin","Fecha fin","date")
-                        if self.identify_type(outline_lvl) == 'group':
-                            self.group_id = self.xls_create_group(monday_client,title,self.board_id)
-                        if self.identify_type(outline_lvl) == 'item':
-                            self.item_id_l1 = self.xls_create_item(monday_client,title,self.board_id,self.group_id)
-                            self.xls_asign_value_to_column(monday_client,self.board_id,self.item_id_l1,self.id_column_fecha_inicio,fecha_inicio)
-                            self.xls_asign_value_to_column(monday_client,self.board_id,self.item_id_l1,self.id_column_fecha_fin,fecha_fin)
-                        if self.identify_type(outline_lvl) == 'subiteml1':
-                            self.item_id_l2 = self.xls_create_sub_item(monday_client,title,self.item_id_l1,fecha_inicio)
-                            if not self.sub_board_columns_creadas:
-                                self.sub_board_id = self.get_sub_board_id_sub_item(monday_client,self.item_id_l1)
-                                self.sub_board_id_column_fecha_inicio = self.xls_create_column(monday_client,self.sub_board_id,"Inicio","Fecha inicio","date")
-                                self.sub_board_id_column_fecha_fin = self.xls_create_column(monday_client,self.sub_board_id,"Fin","Fecha fin","date")
-                                self.sub_board_columns_creadas = True
-                            self.get_sub_board_id_sub_item(monday_client,self.item_id_l1)
-                            self.xls_asign_value_to_column(monday_client,self.sub_board_id,self.item_id_l2,self.sub_board_id_column_fecha_inicio,fecha_inicio)
-                            self.xls_asign_value_to_column(monday_client,self.sub_board_id,self.item_id_l2,self.sub_board_id_column_fecha_fin,fecha_fin)
-                        if self.identify_type(outline_lvl) == 'subiteml2' and self.cargar_lvl_superirores_a_como_subitems:
-                            self.item_id_l3 = self.xls_create_sub_item(monday_client,title,self.item_id_l1,fecha_inicio)
-                        if self.identify_type(outline_lvl) == 'subiteml3' and self.cargar_lvl_superirores_a_como_subitems:
-                            self.item_id_l4 = self.xls_create_sub_item(monday_client,title,self.item_id_l1,fecha_inicio)
-                        if self.identify_type(outline_lvl) == 'subiteml4' and self.cargar_lvl_superirores_a_como_subitems:
-                            self.item_id_l5 = self.xls_create_sub_item(monday_client,title,self.item_id_l1,fecha_inicio)
-                        if self.esperar:
-                            time.sleep(self.wait_time)  # Pauses execution for 3 seconds.
-                        if self.detener:
-                            break
-                if self.sub_board_id is not None:
-                    self.xls_delete_column(monday_client,self.sub_board_id,"person")
-                    self.xls_delete_column(monday_client,self.sub_board_id,"status")
-                    self.xls_delete_column(monday_client,self.sub_board_id,"date0")
+                plan = PlanImportacion.desde_columnas(filas,plan_completo.to_columnas(),cantidad_a_procesar)
+                logger.info(f"Plan de importacion: {plan.contar()} niveles: {len(plan.niveles())}")
+                if continuar:
+                    self.marcar_creados(plan)
+                    self.reconciliar_en_curso(monday_client,plan)
+                ejecutor = EjecutorPlan(lambda nodo: self.crear_nodo(monday_client,nodo),self.max_workers_importacion,lambda: self.detener,self.registrar_en_curso)
+                try:
+                    ejecutor.ejecutar(plan)
+                finally:
+                    self.pos = plan.ultima_fila_completa()
+                self.finalizar_importacion(monday_client)
             except Exception as e:
                 self.error = True
                 self.message = str(e)
                 logger.error(str(e))
                 self.procesando = False
+                self.enviar_mutaciones_pendientes()
+            logger.info(f"Mutaciones agrupadas: {self.batcher.cantidad_mutaciones} en {self.batcher.cantidad_requests} requests")
             logger.info("Fin de proceso")
             logger.info(self.board_id)
             logger.info(self.group_id)
@@ -483,6 +849,440 @@ class ExcelUtilsMonday:
             self.clean_files()
             self.procesando = False
 
+    def process_excel_streaming(self,filename,download:bool,monday_client:MondayClient,uid = None,rows=0,continuar:bool = False):
+        """Procesa el excel leyendo las filas por bloques: cada bloque se agrega al plan y se crea en monday antes de leer el siguiente,
+        asi la primera llamada sale sin esperar a leer todo el archivo y la memoria no crece con la cantidad de filas"""
+        if download:
+            self.download = True
+        file_path = self.get_file(uid,filename)
+        if self.error:
+            self.salvar_estado(self.error)
+            return
+        self.procesando = True
+        if continuar:
+            logger.info("Continua proceso")
+            self.read_estado()
+            if self.error and not self.ids_filas:
+                self.pos = self.pos -1
+            self.eliminado_grupo_inicial = True
+            self.error = False
+        else:
+            self.pos = 0
+        self.abrir_journal(continuar)
+        lector = self.iterar_filas(file_path)
+        filas = lector
+        if rows != 0:
+            filas = itertools.islice(lector,self.pos + rows + 1 if continuar else 0)
+        monday_client = self.preparar_cliente(monday_client)
+        ejecutor = EjecutorPlan(lambda nodo: self.crear_nodo(monday_client,nodo),self.max_workers_importacion,lambda: self.detener,self.registrar_en_curso)
+        plan = PlanImportacion()
+        armador = ArmadorPlan(plan,self.identify_type,self.cargar_lvl_superirores_a_como_subitems)
+        try:
+            for fila, registro in enumerate(filas):
+                armador.agregar(fila,registro)
+                plan.cantidad_filas = fila + 1
+                if plan.cantidad_filas - plan.fila_inicio >= self.tamano_bloque_lectura:
+                    self.ejecutar_bloque(monday_client,ejecutor,plan,continuar)
+                if self.detener:
+                    break
+            if not self.error and not self.detener:
+                self.ejecutar_bloque(monday_client,ejecutor,plan,continuar)
+                self.finalizar_importacion(monday_client)
+        except Exception as e:
+            self.error = True
+            self.message = str(e)
+            logger.error(str(e))
+            self.procesando = False
+            self.enviar_mutaciones_pendientes()
+        finally:
+            lector.close()
+        logger.info(f"Lectura streaming: {self.estadisticas_lectura}")
+        if self.batcher is not None:
+            logger.info(f"Mutaciones agrupadas: {self.batcher.cantidad_mutaciones} en {self.batcher.cantidad_requests} requests")
+        if plan.cantidad_filas == self.pos:
+            self.proceso_completo = True
+        self.salvar_estado(self.error)
+        self.clean_files()
+        self.procesando = False
+
+    def ejecutar_bloque(self,monday_client:MondayClient,ejecutor:EjecutorPlan,plan:PlanImportacion,continuar:bool):
+        """Crea en monday los nodos del bloque de filas leido y los descarta del plan"""
+        if continuar:
+            self.marcar_creados(plan)
+            self.reconciliar_en_curso(monday_client,plan)
+        try:
+            ejecutor.ejecutar(plan)
+        finally:
+            self.pos = plan.ultima_fila_completa()
+        plan.descartar_creados()
+
+    def preparar_cliente(self,monday_client:MondayClient):
+        """Envuelve el cliente con el limitador y los reintentos, y crea el batcher de mutaciones"""
+        if self.esperar:
+            monday_client = ClienteLimitado(monday_client,get_rate_limiter())
+        #Cada intento pasa por el limitador, los reintentos se acumulan en el estado del proceso
+        self.politica_reintento = PoliticaReintento(contadores=self.reintentos)
+        monday_client = ClienteConReintentos(monday_client,self.politica_reintento)
+        self.batcher = MutationBatcher(monday_client,self.batch_max_operaciones,self.batch_max_complejidad)
+        return monday_client
+
+    def finalizar_importacion(self,monday_client:MondayClient):
+        """Elimina las columnas por defecto del sub board y envia las mutaciones agrupadas pendientes"""
+        pendientes = [sub_board for sub_board in self.sub_boards.values() if not sub_board.get("limpio")]
+        for sub_board in pendientes:
+            self.xls_delete_column(monday_client,sub_board["id"],"person")
+            self.xls_delete_column(monday_client,sub_board["id"],"status")
+            self.xls_delete_column(monday_client,sub_board["id"],"date0")
+        self.batcher.ejecutar()
+        for sub_board in pendientes:
+            sub_board["limpio"] = True
+        #Los tableros creados por la importacion tienen que aparecer en el listado de tableros
+        get_cache_respuestas().invalidar("boards")
+
+    def simular_importacion(self,filename,download,uid = None,limitador:MondayRateLimiter = None):
+        """Arma el plan de importacion del excel sin llamar a monday y estima llamadas, complejidad y duracion"""
+        filas, plan = self.leer_excel(filename,download,uid)
+        if self.error or filas is None:
+            return None
+        simulacion = self.estimar_plan(plan,limitador)
+        self.proceso_completo = True
+        self.clean_files()
+        return simulacion
+
+    def llamadas_nodo(self,nodo:NodoPlan,primer_subitem:bool):
+        """Mutaciones y queries que hace crear_nodo para un nodo, sin contar las mutaciones agrupadas en el batcher"""
+        if nodo.tipo == 'board':
+            #create_board y las dos columnas de fecha, o un duplicate_board de la plantilla
+            return (1, 0) if self.usar_plantilla else (3, 0)
+        if nodo.tipo == 'group':
+            #El primer grupo de cada board elimina el grupo inicial
+            return (2, 0) if nodo.padre.hijos[0] is nodo else (1, 0)
+        if nodo.tipo == 'subiteml1' and primer_subitem and not self.usar_plantilla:
+            #El primer subitem de cada board crea el sub board y sus dos columnas
+            return 3, 0
+        return 1, 0
+
+    def estimar_plan(self,plan:PlanImportacion,limitador:MondayRateLimiter = None):
+        """Estima la cantidad de llamadas, la complejidad y la duracion de ejecutar el plan con la configuracion actual"""
+        limitador = limitador or get_rate_limiter()
+        simulacion = SimulacionImportacion()
+        cantidades = plan.contar()
+        simulacion.boards = cantidades.get('board',0)
+        simulacion.groups = cantidades.get('group',0)
+        simulacion.items = cantidades.get('item',0)
+        simulacion.subitems = sum(cantidad for tipo, cantidad in cantidades.items() if tipo.startswith('subitem'))
+        simulacion.huerfanos = [nodo.fila for nodo in plan.huerfanos]
+        simulacion.errores_fechas = self.errores_fechas
+        simulacion.estadisticas_lectura = self.estadisticas_lectura
+        boards_con_subitems = len({id(nodo.padre.padre.padre) for nodo in plan.nodos if nodo.tipo == 'subiteml1'})
+        simulacion.columnas = simulacion.boards * 2 + boards_con_subitems * 2
+        if self.usar_plantilla:
+            #Las columnas vienen de la plantilla, solo se crean si todavia no existe
+            simulacion.columnas = 4 if simulacion.boards > 0 and get_plantilla() is None else 0
+
+        workers = int(self.max_workers_importacion or os.getenv("MONDAY_IMPORT_WORKERS", 4))
+        latencia = float(os.getenv("MONDAY_LATENCIA_ESTIMADA", 0.5))
+        queries = 0
+        requests_camino_critico = 0
+        boards_sub_board = set()
+        niveles = plan.niveles()
+        simulacion.niveles = len(niveles)
+        for nivel in niveles:
+            #Los hijos de un mismo padre se crean en orden, los de padres distintos en paralelo
+            por_padre = {}
+            for nodo in nivel:
+                primer_subitem = nodo.tipo == 'subiteml1' and id(nodo.padre.padre.padre) not in boards_sub_board
+                if primer_subitem:
+                    boards_sub_board.add(id(nodo.padre.padre.padre))
+                mutaciones_nodo, queries_nodo = self.llamadas_nodo(nodo,primer_subitem)
+                simulacion.mutaciones += mutaciones_nodo
+                queries += queries_nodo
+                simulacion.requests += mutaciones_nodo + queries_nodo
+                por_padre[id(nodo.padre)] = por_padre.get(id(nodo.padre),0) + mutaciones_nodo + queries_nodo
+            requests_nivel = sum(por_padre.values())
+            requests_camino_critico += max(max(por_padre.values()),math.ceil(requests_nivel / workers))
+
+        #Mutaciones agrupadas: por sub board, fechas del primer subitem y borrado de las 3 columnas por defecto
+        mutaciones_agrupadas = 4 * boards_con_subitems
+        if self.usar_plantilla:
+            mutaciones_agrupadas = 0
+            if simulacion.boards > 0 and get_plantilla() is None:
+                #La plantilla se crea antes del primer board y sus borrados se envian en ese momento
+                simulacion.mutaciones += MUTACIONES_PLANTILLA
+                simulacion.requests += MUTACIONES_PLANTILLA
+                requests_camino_critico += MUTACIONES_PLANTILLA
+                mutaciones_agrupadas = MUTACIONES_AGRUPADAS_PLANTILLA
+        if mutaciones_agrupadas:
+            batch_size = int(self.batch_max_operaciones or os.getenv("MONDAY_BATCH_SIZE", 25))
+            simulacion.mutaciones += mutaciones_agrupadas
+            simulacion.requests += math.ceil(mutaciones_agrupadas / batch_size)
+            requests_camino_critico += math.ceil(mutaciones_agrupadas / batch_size)
+        simulacion.complejidad = simulacion.mutaciones * COMPLEJIDAD_MUTACION_ESTIMADA + queries * COMPLEJIDAD_QUERY_ESTIMADA
+
+        #La duracion es la mayor entre el limite de requests, el presupuesto de complejidad y el camino critico del arbol
+        estado = limitador.estado()
+        requests_por_segundo = estado["requests_por_minuto"] / 60
+        segundos_limitador = max(0, simulacion.requests - limitador.capacidad) / requests_por_segundo
+        complejidad_por_minuto = get_presupuesto().limite or int(os.getenv("MONDAY_COMPLEJIDAD_POR_MINUTO", 10000000))
+        segundos_complejidad = max(0, simulacion.complejidad - complejidad_por_minuto) / complejidad_por_minuto * 60
+        segundos_camino_critico = requests_camino_critico * latencia
+        simulacion.segundos_estimados = max(segundos_limitador,segundos_complejidad,segundos_camino_critico) + estado["pausa_restante"]
+        return simulacion
+
+    def marcar_creados(self,plan:PlanImportacion):
+        """Al continuar un proceso asigna a cada nodo del plan el id de monday creado en la ejecucion anterior"""
+        if self.ids_filas:
+            for nodo in plan.nodos:
+                #Estados guardados antes de la clave con hash usan solo el numero de fila
+                nodo.monday_id = self.ids_filas.get(nodo.clave(),self.ids_filas.get(str(nodo.fila)))
+            return
+        #Estado guardado sin mapa de ids: las filas hasta pos ya se procesaron y solo se conocen el ultimo board, grupo e item
+        ids_conocidos = {"board":self.board_id,"group":self.group_id,"item":self.item_id_l1}
+        for nodo in reversed(plan.nodos):
+            if nodo.fila <= self.pos:
+                nodo.monday_id = ids_conocidos.pop(nodo.tipo,"")
+
+    def reconciliar_en_curso(self,monday_client:MondayClient,plan:PlanImportacion):
+        """Busca en monday los nodos cuya creacion quedo sin confirmar en la ejecucion anterior, asi no se crean dos veces"""
+        if not self.filas_en_curso:
+            return
+        for nivel in plan.niveles():
+            for nodo in nivel:
+                clave = nodo.clave()
+                if nodo.monday_id is not None or clave not in self.filas_en_curso:
+                    continue
+                if nodo.padre is not None and not nodo.padre.monday_id:
+                    #El padre no existe, el nodo no se pudo haber creado
+                    self.filas_en_curso.pop(clave,None)
+                    continue
+                monday_id = self.buscar_existente(monday_client,nodo)
+                logger.info(f"Reconciliacion fila {nodo.fila} {nodo.tipo} {nodo.titulo}: {monday_id}")
+                self.filas_en_curso.pop(clave,None)
+                if monday_id is not None:
+                    nodo.monday_id = monday_id
+                    self.ids_filas[clave] = monday_id
+                    if nodo.tipo == 'board':
+                        #Las columnas de fecha se crean junto con el board, se vuelven a buscar por titulo
+                        self.columnas_fecha[str(monday_id)] = self.buscar_columnas_fecha(monday_client,monday_id)
+
+    def buscar_existente(self,monday_client:MondayClient,nodo:NodoPlan):
+        """Id del elemento con el titulo del nodo bajo su padre en monday, None si no existe.
+        Se descartan los ids ya asignados a otras filas (hermanos con el mismo titulo) y se elige el creado mas recientemente"""
+        titulo = self.limpiar_nombre(nodo.titulo)
+        usados = {str(monday_id) for monday_id in self.ids_filas.values()}
+        if nodo.tipo == 'board':
+            #Solo boards del tipo que crea el importador, la plantilla nunca es un board importado
+            query = 'query { boards (limit: 25, order_by: created_at, board_kind: public, state: active) { id name } }'
+            elementos = monday_client.custom._query(query)["data"]["boards"]
+            plantilla = get_plantilla()
+            if plantilla is not None:
+                usados.add(str(plantilla["board_id"]))
+        elif nodo.tipo == 'group':
+            query = 'query { boards (ids: %s) { groups { id name: title } } }' % nodo.padre.monday_id
+            elementos = monday_client.custom._query(query)["data"]["boards"][0]["groups"]
+        elif nodo.tipo == 'item':
+            query = """query { items_page_by_column_values (board_id: %s, limit: 25, columns: [{column_id: "name", column_values: ["%s"]}]) {
+                items { id name group { id } } } }""" % (nodo.padre.padre.monday_id,titulo)
+            elementos = monday_client.custom._query(query)["data"]["items_page_by_column_values"]["items"]
+            elementos = [elemento for elemento in elementos if elemento["group"]["id"] == nodo.padre.monday_id]
+        else:
+            query = 'query { items (ids: %s) { subitems { id name } } }' % nodo.padre.monday_id
+            items = monday_client.custom._query(query)["data"]["items"]
+            elementos = items[0]["subitems"] if items else []
+        ids = [elemento["id"] for elemento in elementos
+               if elemento["name"] in (titulo, str(nodo.titulo)) and str(elemento["id"]) not in usados]
+        if not ids:
+            return None
+        if nodo.tipo == 'group':
+            #Los ids de los grupos son texto, create_group agrega el grupo nuevo arriba del board
+            return ids[0]
+        #Los ids de monday son numeros crecientes, el mayor es el ultimo creado
+        return max(ids, key=lambda monday_id: int(monday_id) if str(monday_id).isdigit() else 0)
+
+    def buscar_columnas_fecha(self,monday_client:MondayClient,board_id:str):
+        """Ids de las columnas Inicio y Fin de un board"""
+        query = 'query { boards (ids: %s) { columns { id title } } }' % board_id
+        columnas = {columna["title"]:columna["id"] for columna in monday_client.custom._query(query)["data"]["boards"][0]["columns"]}
+        return [columnas.get("Inicio"),columnas.get("Fin")]
+
+    def crear_nodo(self,monday_client:MondayClient,nodo:NodoPlan):
+        """Crea en monday el elemento de un nodo del plan, su padre ya debe estar creado"""
+        clave = nodo.clave()
+        #La intencion ya quedo confirmada en registrar_en_curso para todo el nivel
+        self.filas_en_curso[clave] = nodo.fila
+        if nodo.tipo == 'board':
+            if self.usar_plantilla:
+                board_id, (columna_inicio, columna_fin) = self.duplicar_plantilla(monday_client,nodo.titulo)
+            else:
+                board_id = self.xls_create_board(monday_client,nodo.titulo,'public')
+                columna_inicio = self.xls_create_column(monday_client,board_id,"Inicio","Fecha inicio","date")
+                columna_fin = self.xls_create_column(monday_client,board_id,"Fin","Fecha fin","date")
+            self.columnas_fecha[str(board_id)] = [columna_inicio,columna_fin]
+            self.board_id = board_id
+            self.id_column_fecha_inicio = columna_inicio
+            self.id_column_fecha_fin = columna_fin
+            nodo.monday_id = board_id
+        elif nodo.tipo == 'group':
+            board = nodo.padre
+            #El grupo inicial se elimina al crear el primer grupo de un board nuevo
+            with self._lock_grupo_inicial:
+                eliminar_grupo_inicial = board.creado and not board.grupo_inicial_eliminado
+                if eliminar_grupo_inicial:
+                    board.grupo_inicial_eliminado = True
+            nodo.monday_id = self.crear_o_reconciliar(monday_client,nodo,
+                lambda: self.xls_create_group(monday_client,nodo.titulo,board.monday_id,eliminar_grupo_inicial))
+            self.group_id = nodo.monday_id
+        elif nodo.tipo == 'item':
+            board_id = nodo.padre.padre.monday_id
+            columna_inicio, columna_fin = self.columnas_fecha.get(str(board_id),[self.id_column_fecha_inicio,self.id_column_fecha_fin])
+            column_values = self.armar_column_values_fechas(columna_inicio,nodo.fecha_inicio,columna_fin,nodo.fecha_fin)
+            nodo.monday_id = self.crear_o_reconciliar(monday_client,nodo,
+                lambda: self.xls_create_item(monday_client,nodo.titulo,board_id,nodo.padre.monday_id,column_values))
+            self.item_id_l1 = nodo.monday_id
+        elif nodo.tipo == 'subiteml1':
+            nodo.monday_id = self.crear_subitem_nivel_1(monday_client,nodo)
+            self.item_id_l2 = nodo.monday_id
+        else:
+            nodo.monday_id = self.crear_o_reconciliar(monday_client,nodo,
+                lambda: self.xls_create_sub_item(monday_client,nodo.titulo,nodo.padre.monday_id,nodo.fecha_inicio))
+        self.ids_filas[clave] = nodo.monday_id
+        self.filas_en_curso.pop(clave,None)
+        entrada = {"fila":nodo.fila,"clave":clave,"tipo":nodo.tipo,"id":nodo.monday_id}
+        if nodo.tipo == 'board':
+            entrada["columnas"] = self.columnas_fecha[str(nodo.monday_id)]
+        self.registrar_en_journal(entrada)
+
+    def crear_subitem_nivel_1(self,monday_client:MondayClient,nodo:NodoPlan):
+        """Crea un subitem de nivel 4, el primero de cada board tambien crea las columnas de fecha del sub board"""
+        item_id = nodo.padre.monday_id
+        board_id = str(nodo.padre.padre.padre.monday_id)
+        with self._lock_sub_board:
+            lock = self._locks_sub_board.setdefault(board_id,Lock())
+        with lock:
+            if board_id not in self.sub_boards and self.usar_plantilla:
+                #Los boards duplicados de la plantilla ya tienen las columnas del sub board, el id llega con el primer subitem
+                self.sub_boards[board_id] = {"id":None,"columnas":get_plantilla()["columnas_sub"],"limpio":True}
+            if board_id not in self.sub_boards:
+                #El sub board se crea con el primer subitem, su id viene en la respuesta y recien ahi se pueden crear sus columnas
+                subitem_id, sub_board_id = self.crear_subitem(monday_client,nodo.titulo,item_id)
+                columnas = [
+                    self.xls_create_column(monday_client,sub_board_id,"Inicio","Fecha inicio","date"),
+                    self.xls_create_column(monday_client,sub_board_id,"Fin","Fecha fin","date"),
+                ]
+                self.sub_boards[board_id] = {"id":sub_board_id,"columnas":columnas}
+                self.sub_board_id = sub_board_id
+                self.sub_board_id_column_fecha_inicio, self.sub_board_id_column_fecha_fin = columnas
+                self.sub_board_columns_creadas = True
+                #Las columnas del sub board se crean una sola vez, se confirman en el journal sin esperar el lote
+                self.registrar_en_journal({"sub_board":sub_board_id,"board":board_id,"columnas":columnas},True)
+                column_values = self.armar_column_values_fechas(columnas[0],nodo.fecha_inicio,columnas[1],nodo.fecha_fin)
+                self.xls_asign_values_to_columns(monday_client,sub_board_id,subitem_id,column_values)
+                return subitem_id
+        #Las columnas del sub board ya existen, las fechas se envian en la misma mutacion de creacion
+        columna_inicio, columna_fin = self.sub_boards[board_id]["columnas"]
+        column_values = self.armar_column_values_fechas(columna_inicio,nodo.fecha_inicio,columna_fin,nodo.fecha_fin)
+        subitem = {}
+
+        def crear():
+            subitem["id"], subitem["sub_board"] = self.crear_subitem(monday_client,nodo.titulo,item_id,column_values)
+            return subitem["id"]
+        subitem_id = self.crear_o_reconciliar(monday_client,nodo,crear)
+        if self.sub_boards[board_id]["id"] is None and "sub_board" in subitem:
+            self.sub_boards[board_id]["id"] = subitem["sub_board"]
+        return subitem_id
+
+    def crear_o_reconciliar(self,monday_client:MondayClient,nodo:NodoPlan,crear):
+        """Ejecuta crear, la mutacion que crea el elemento del nodo. Si fallo despues de enviarse no se sabe si monday
+        la aplico, se busca el elemento antes de reenviarla. Los boards y el primer subitem de cada board crean
+        tambien columnas, si quedan inciertos la importacion se detiene y se reconcilian al continuar"""
+        try:
+            return crear()
+        except ResultadoIncierto as e:
+            if any(hermano is not nodo and hermano.titulo == nodo.titulo and hermano.clave() in self.filas_en_curso
+                   for hermano in nodo.padre.hijos):
+                #Un hermano con el mismo titulo se esta creando en paralelo, no se puede saber cual es cual
+                raise
+            monday_id = self.buscar_existente(monday_client,nodo)
+            logger.warning(f"Reconciliacion fila {nodo.fila} {nodo.tipo} {nodo.titulo} despues de {e.error}: {monday_id}")
+            if monday_id is not None:
+                return monday_id
+            return crear()
+
+    def duplicar_plantilla(self,monday_client:MondayClient,board_name):
+        """Crea un board duplicando la estructura de la plantilla, devuelve el id y las columnas de fecha.
+        Si la plantilla guardada ya no existe en monday se crea de nuevo"""
+        plantilla = self.obtener_plantilla(monday_client)
+        try:
+            board_id = self.xls_duplicate_board(monday_client,plantilla["board_id"],board_name)
+        except Exception as e:
+            if not es_board_inexistente(e):
+                raise
+            logger.warning(f"No se pudo duplicar la plantilla {plantilla['board_id']}, se crea una nueva: {e}")
+            set_plantilla(None)
+            plantilla = self.obtener_plantilla(monday_client)
+            board_id = self.xls_duplicate_board(monday_client,plantilla["board_id"],board_name)
+        #El board duplicado conserva el grupo inicial de la plantilla
+        self.eliminado_grupo_inicial = False
+        return board_id, plantilla["columnas"]
+
+    def obtener_plantilla(self,monday_client:MondayClient):
+        """Devuelve la plantilla guardada o crea el board plantilla con sus columnas y las del sub board"""
+        plantilla = get_plantilla()
+        if plantilla is not None:
+            return plantilla
+        with _plantilla_creacion_lock:
+            plantilla = get_plantilla()
+            if plantilla is not None:
+                return plantilla
+            logger.info("Creando board plantilla del importador")
+            board_id = self.xls_create_board(monday_client,"Plantilla importacion excel",'public')
+            columnas = [
+                self.xls_create_column(monday_client,board_id,"Inicio","Fecha inicio","date"),
+                self.xls_create_column(monday_client,board_id,"Fin","Fecha fin","date"),
+            ]
+            #El sub board solo existe despues de crear un subitem, se usa un item auxiliar que despues se borra
+            item_id = self.xls_create_item(monday_client,"Plantilla",board_id,"topics")
+            subitem_id, sub_board_id = self.crear_subitem(monday_client,"Plantilla",item_id)
+            columnas_sub = [
+                self.xls_create_column(monday_client,sub_board_id,"Inicio","Fecha inicio","date"),
+                self.xls_create_column(monday_client,sub_board_id,"Fin","Fecha fin","date"),
+            ]
+            self.xls_delete_item(monday_client,item_id)
+            self.xls_delete_column(monday_client,sub_board_id,"person")
+            self.xls_delete_column(monday_client,sub_board_id,"status")
+            self.xls_delete_column(monday_client,sub_board_id,"date0")
+            if self.batcher is not None:
+                #La plantilla tiene que quedar limpia antes del primer duplicate_board
+                self.batcher.ejecutar()
+            plantilla = {"board_id":board_id,"columnas":columnas,"columnas_sub":columnas_sub}
+            set_plantilla(plantilla)
+            return plantilla
+
+    def xls_duplicate_board(self,monday_client:MondayClient,board_id,board_name):
+        """Duplica solo la estructura de un board (columnas, grupos y sub board) con otro nombre"""
+        mutation = """
+            mutation {
+                duplicate_board (
+                    board_id: %s,
+                    duplicate_type: duplicate_board_with_structure,
+                    board_name: "%s"
+                ) {
+                    board { id }
+                }
+            }
+        """ % (board_id,self.limpiar_nombre(board_name))
+        logger.info(mutation)
+        response = monday_client.custom._query(mutation)
+        logger.info(response)
+        return response["data"]["duplicate_board"]["board"]["id"]
+
+    def xls_delete_item(self,monday_client:MondayClient,item_id):
+        """Elimina un item y sus subitems"""
+        mutation = "mutation { delete_item (item_id: %s) { id } }" % item_id
+        response = monday_client.custom._query(mutation)
+        logger.info(response)
+        return response["data"]["delete_item"]["id"]
+
     def limpiar_nombre(self,texto:str):
         """Limpia el texto de un titulo"""
         texto_con_escapeo = str(texto).replace("\\","\\\\")
@@ -494,7 +1294,6 @@ class ExcelUtilsMonday:
         text = f"Create board: {board_name} {board_kind}"
         logger.info(text)
 
-        #Crear logica de reintento
         actual_board_kind = BoardKind(board_kind)
         respuesta = monday_client.boards.create_board(
             board_name= self.limpiar_nombre(board_name)
@@ -506,15 +1305,22 @@ class ExcelUtilsMonday:
         self.eliminado_grupo_inicial = False
         return  board_id
     
+    def enviar_mutaciones_pendientes(self):
+        """Envia las mutaciones que quedaron en el batcher, por ejemplo ante un error de otra fila"""
+        if self.batcher is not None and self.batcher.pendientes() > 0:
+            try:
+                self.batcher.ejecutar()
+            except Exception as e:
+                logger.error(f"No se pudieron enviar las mutaciones pendientes: {e}")
+
     def xls_delete_column(self,monday_client:MondayClient,board_id:str,column_id):
         """Elimina una columna de monday.com"""
-        mutation = """
-        mutation {
-            delete_column (board_id: %s, column_id: "%s") {
+        campo = """delete_column (board_id: %s, column_id: "%s") {
                 id
-            }
-        }
-        """ % (board_id,column_id)
+            }""" % (board_id,column_id)
+        if self.batcher is not None:
+            return self.batcher.agregar(campo)
+        mutation = "mutation { %s }" % campo
         logger.info(mutation)
         response = monday_client.custom._query(mutation)
         logger.info(response)
@@ -544,12 +1350,11 @@ class ExcelUtilsMonday:
         logger.info(id_col)
         return id_col
 
-    def xls_create_group(self,monday_client:MondayClient,group_name,board_id):
-        """Crea un grupo"""
+    def xls_create_group(self,monday_client:MondayClient,group_name,board_id,eliminar_grupo_inicial = None):
+        """Crea un grupo, eliminar_grupo_inicial indica si hay que borrar el grupo que monday crea con el board (por defecto usa eliminado_grupo_inicial)"""
         text = f"Create group: {group_name} {board_id}"
         logger.info(text)
         
-        #Crear logica de reintento
         respuesta = monday_client.groups.create_group(
             group_name= self.limpiar_nombre(group_name),
             board_id=board_id
@@ -558,8 +1363,9 @@ class ExcelUtilsMonday:
 
         group_id = respuesta['data']['create_group']['id']
 
-        if not self.eliminado_grupo_inicial:
-            #Crear logica de reintento
+        if eliminar_grupo_inicial is None:
+            eliminar_grupo_inicial = not self.eliminado_grupo_inicial
+        if eliminar_grupo_inicial:
             respuesta2 = monday_client.groups.delete_group(
                 board_id=board_id
                 ,group_id='topics'
@@ -569,12 +1375,11 @@ class ExcelUtilsMonday:
 
         return  group_id
 
-    def xls_create_item(self,monday_client:MondayClient,item_name,board_id,group_id):
-        """Crea un item"""
+    def xls_create_item(self,monday_client:MondayClient,item_name,board_id,group_id,column_values = None):
+        """Crea un item, column_values permite asignar los valores de las columnas en la misma mutacion"""
         text = f"Create Item: {item_name} {board_id} {group_id}"
         logger.info(text)
-        #Crear logica de reintento
-        respuesta = monday_client.items.create_item( item_name= self.limpiar_nombre(item_name) ,board_id=board_id ,group_id=group_id)
+        respuesta = monday_client.items.create_item( item_name= self.limpiar_nombre(item_name) ,board_id=board_id ,group_id=group_id ,column_values=column_values)
         #item_name_limpio = self.limpiar_nombre(item_name)
         #mutation = """mutation {
         #create_item(
@@ -594,18 +1399,48 @@ class ExcelUtilsMonday:
         return item_id
     
     def xls_asign_value_to_column(self,monday_client:MondayClient,board_id:str,item_id:str,column_id:str,column_value:str):
-        """Asigna un valor a una columna"""
-        mutation = """
-        mutation {
-            change_simple_column_value (board_id: %s, item_id: %s, column_id: "%s", value: "%s") {
+        """Asigna un valor a una columna, si hay un batcher activo la mutacion se envia junto con otras"""
+        campo = """change_simple_column_value (board_id: %s, item_id: %s, column_id: "%s", value: "%s") {
                 id
-            }
-        }
-        """ % (board_id,item_id,column_id,column_value)
+            }""" % (board_id,item_id,column_id,column_value)
+        if self.batcher is not None:
+            return self.batcher.agregar(campo)
+        mutation = "mutation { %s }" % campo
+        logger.info(mutation)
+        response = monday_client.custom._query(mutation)
+        logger.info(response)
+
+    def xls_asign_values_to_columns(self,monday_client:MondayClient,board_id:str,item_id:str,column_values:dict):
+        """Asigna varios valores de columnas en una sola mutacion"""
+        if not column_values:
+            return None
+        campo = """change_multiple_column_values (board_id: %s, item_id: %s, column_values: %s) {
+                id
+            }""" % (board_id,item_id,json.dumps(json.dumps(column_values)))
+        if self.batcher is not None:
+            return self.batcher.agregar(campo)
+        mutation = "mutation { %s }" % campo
         logger.info(mutation)
         response = monday_client.custom._query(mutation)
         logger.info(response)
 
+    def valor_columna_fecha(self,fecha:str):
+        """Convierte una fecha 'YYYY-MM-DD HH:MM:SS' al valor json de una columna date de monday"""
+        partes = str(fecha).split(" ")
+        valor = {"date": partes[0]}
+        if len(partes) > 1:
+            valor["time"] = partes[1]
+        return valor
+
+    def armar_column_values_fechas(self,column_fecha_inicio,fecha_inicio,column_fecha_fin,fecha_fin):
+        """Arma el column_values con las fechas de inicio y fin para enviarlo al crear el item o subitem"""
+        column_values = {}
+        if column_fecha_inicio is not None and fecha_inicio is not None:
+            column_values[column_fecha_inicio] = self.valor_columna_fecha(fecha_inicio)
+        if column_fecha_fin is not None and fecha_fin is not None:
+            column_values[column_fecha_fin] = self.valor_columna_fecha(fecha_fin)
+        return column_values
+
     def get_sub_board_id_sub_item(self,monday_client:MondayClient,item_id:str):
         """Asigna un valor a una columna"""
         mutation = """
@@ -634,30 +1469,44 @@ class ExcelUtilsMonday:
                 logger.info(sub_board_id)
         return sub_board_id
 
-    def xls_create_sub_item(self,monday_client:MondayClient,item_name,item_id,fecha_inicio:str):
-        """Crea un subitem"""
+    def xls_create_sub_item(self,monday_client:MondayClient,item_name,item_id,fecha_inicio:str,column_values = None):
+        """Crea un subitem, column_values permite asignar los valores de las columnas en la misma mutacion"""
+        subitem_id, sub_board_id = self.crear_subitem(monday_client,item_name,item_id,column_values)
+        return subitem_id
+
+    def crear_subitem(self,monday_client:MondayClient,item_name,item_id,column_values = None):
+        """Crea un subitem y devuelve su id y el id del sub board, sin pedir los column_values que devuelve la mutacion del sdk"""
         text = f"Create sub item: {item_name} {item_id}"
         logger.info(text)
-        subitem_name_limpio = self.limpiar_nombre(item_name)
-        respuesta = monday_client.items.create_subitem(subitem_name = subitem_name_limpio,parent_item_id = item_id)
+        mutation = """
+            mutation {
+                create_subitem (
+                    parent_item_id: %s,
+                    item_name: "%s",
+                    column_values: %s
+                ) {
+                    id
+                    board { id }
+                }
+            }
+        """ % (item_id,self.limpiar_nombre(item_name),json.dumps(json.dumps(column_values or {})))
+        respuesta = monday_client.custom._query(mutation)
         logger.info(respuesta)
-        item_id = respuesta['data']['create_subitem']['id']
-        logger.info(item_id)
-        return  item_id
-    
+        subitem = respuesta['data']['create_subitem']
+        return subitem['id'], subitem['board']['id']
+
     def analizar_excel(self,filename, download ,uid = None):
         """Analiza los niveles de profundidad del archivo excel"""
         arr_analisis_items = []
         if os.path.exists(filename):
-            df = self.get_pandas(filename,download,uid)
-            if df is not None:
-                cant_total_filas = len(df.index)
+            filas, plan = self.leer_excel(filename,download,uid)
+            if filas is not None:
+                cant_total_filas = len(filas)
                 analisis_item = AnalisisItem()
                 primer_item = True
                 for i in range(cant_total_filas):
                     self.pos = i
-                    title = self.read_cell(df,"Name",i)
-                    outline_lvl = self.read_cell(df,"Outline Level",i)
+                    title, fecha_inicio, fecha_fin, outline_lvl = filas[i]
                     tipo = self.identify_type(outline_lvl)
                     logger.debug(tipo)
                     logger.debug(outline_lvl)
@@ -679,9 +1528,21 @@ class ExcelUtilsMonday:
                 self.proceso_completo = True
         return arr_analisis_items
 
-class Hilo():
-    hilo:Thread
-    proceso_excel:ExcelUtilsMonday
-
-    def __init__(self):
-        pass
\ No newline at end of file
+def parsear_excel(file_path:str,config:dict):
+    """Lee y valida el excel, extrae las filas y arma el plan de importacion. Se ejecuta en el pool de procesos,
+    devuelve listas por columna para que el resultado viaje compacto entre procesos"""
+    excel_monday = ExcelUtilsMonday()
+    for nombre, valor in config.items():
+        setattr(excel_monday,nombre,valor)
+    df = excel_monday.leer_dataframe(file_path)
+    if not excel_monday.validar_archivo_excel(df):
+        return {"error":excel_monday.message,"estadisticas_lectura":excel_monday.estadisticas_lectura}
+    filas = excel_monday.extraer_filas(df)
+    plan = armar_plan(filas,excel_monday.identify_type,excel_monday.cargar_lvl_superirores_a_como_subitems)
+    return {
+        "error":None,
+        "columnas":[list(columna) for columna in zip(*filas)] if filas else [[],[],[],[]],
+        "plan":plan.to_columnas(),
+        "errores_fechas":excel_monday.errores_fechas,
+        "estadisticas_lectura":excel_monday.estadisticas_lectura,
+    }
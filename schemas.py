@@ -193,6 +193,10 @@ class OpenExcel(BaseModel):
     uid:Optional[str] = None
     continuar:Optional[str] = "False"
     esperar:Optional[str] = "True"
+    dry_run:Optional[str] = "False"
+    prioridad:Optional[int] = 0
+    streaming:Optional[str] = "False"
+    plantilla:Optional[str] = "False"
 
 class ProcessExcelStatus(BaseModel):
     detener:Optional[str] = "False"
@@ -2,6 +2,7 @@
 
 from fastapi import FastAPI, Request
 from pydantic import BaseModel
+import httpx
 import requests
 from requests.auth import HTTPBasicAuth
 from uuid import uuid4
@@ -16,15 +17,28 @@ from utils import dict_read_property,dict_read_property_into_array,dict_list_pro
 
 from schemas import ResponseMessageModel, OutputModel, CreateBoardParams, CreateBoardGroupParams, CreateItemParams, ListBoardsParams, GetBoardGroupsParams, UpdateItemParams, CreateUpdateCommentParams,FetchItemsByBoardId, DeleteItemByIdParams,MoveItemToGroup,GetItemUpdatesParams,GetItemByIdParams, ListItemsInGroupsParams, OpenExcel, ListSubitemsParams, GetBoardColumnsParams, CreateDocParams, DeleteGroupByIdParams, ArchiveItemParams, GetDocsParams, GetDocContentParams, AddDocBlockParams, CreateColumnParams,CreateSubitemParams,ProcessExcelStatus, DeleteColumnByIdParams, CreateDocWorkspaceParams, CreateDocItemParams
 
-from monday import MondayClient
+from monday import MondayClient as MondaySdkClient
 from monday.resources.types import BoardKind
+from monday_pool import MondayClientPool
+from monday_executor import MondayExecutor
+from monday_rate_limiter import get_rate_limiter
+from monday_complexity import get_presupuesto
+from excel_process_pool import get_pool_parseo
+from excel_file_cache import get_cache_archivos
+from monday_cache import etiqueta_board, get_cache_respuestas
+from excel_jobs import ColaTrabajos, PoolImportaciones, Trabajo, DETENIDO, ERROR, FINALIZADO, PROCESANDO, ESTADOS_ACTIVOS
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from open_excel_utils import *
+#Los endpoints usan el cliente asincronico, el importador de excel sigue usando el SDK sincronico en su hilo
+from monday_async_client import AsyncMondayClient as MondayClient
 
 from response_classes import *
 
 import json
-from threading import Thread
+import inspect
+import sqlite3
+from contextlib import asynccontextmanager
 # Clase para usar en el template para listar usuarios
 from usuarios_response import Usuario 
 from workspace_response import Workspace 
@@ -36,7 +50,6 @@ from item_response import ItemResponse
 from subitem_response import SubItem 
 
 load_dotenv()
-hilos = []
 
 logging.basicConfig(
 
@@ -54,7 +67,80 @@ template_env = Environment(loader=FileSystemLoader("templates"))
 
 T = TypeVar('T', bound=BaseModel)
 
-app = FastAPI()
+#Errores de conexion con Monday: requests del SDK sincronico y httpx del cliente asincronico
+ERRORES_CONEXION = (requests.RequestException, httpx.HTTPError)
+
+#Cliente de Monday compartido por todos los endpoints (pool de conexiones keep-alive)
+monday_pool = MondayClientPool()
+#Pool de hilos acotado para las llamadas sincronicas al SDK de Monday
+monday_executor = MondayExecutor()
+#Limitador de velocidad compartido con el importador de excel
+rate_limiter = get_rate_limiter()
+#Cache de las respuestas de los endpoints de listado, se invalida desde los endpoints que modifican tableros
+cache_respuestas = get_cache_respuestas()
+#async: cliente asincronico (por defecto), threadpool: SDK sincronico ejecutado en monday_executor
+monday_client_mode = os.getenv("MONDAY_CLIENT_MODE", "async")
+
+def get_monday_client() -> MondayClient:
+    """Devuelve el cliente de Monday de la aplicacion, se crea una unica vez por proceso"""
+    if monday_client_mode == "threadpool":
+        return get_monday_sdk_client()
+    return monday_pool.get_client(MondayClient)
+
+def get_monday_sdk_client() -> MondaySdkClient:
+    """Devuelve el cliente sincronico del SDK de Monday, usado por los procesos que corren en hilos"""
+    return monday_pool.get_client(MondaySdkClient)
+
+async def monday_call(operacion, *args, **kwargs):
+    """Ejecuta una operacion del cliente de Monday sin bloquear el event loop.
+    Las operaciones asincronicas se esperan directamente y las sincronicas se envian al pool de hilos."""
+    await rate_limiter.adquirir_async()
+    try:
+        if inspect.iscoroutinefunction(operacion):
+            resultado = await operacion(*args, **kwargs)
+        else:
+            resultado = await monday_executor.ejecutar(operacion, *args, **kwargs)
+    except Exception as e:
+        rate_limiter.informar_error(e)
+        raise
+    rate_limiter.informar_exito()
+    return resultado
+
+async def cache_ejecutar(operacion, *args):
+    """Ejecuta una operacion de cache_respuestas, las del backend sqlite o redis hacen I/O y van al pool de hilos"""
+    if cache_respuestas.compartido:
+        return await run_in_threadpool(operacion, *args)
+    return operacion(*args)
+
+async def monday_call_cache(cache_operacion:str, cache_parametros:dict, cache_etiquetas, operacion, *args, **kwargs):
+    """Ejecuta una consulta de lectura con monday_call reutilizando la respuesta guardada en cache_respuestas.
+    Solo se guardan las respuestas sin errores de Monday."""
+    respuesta = await cache_ejecutar(cache_respuestas.obtener, cache_operacion, cache_parametros)
+    if respuesta is not None:
+        return respuesta
+    generacion = await cache_ejecutar(cache_respuestas.generacion)
+    respuesta = await monday_call(operacion, *args, **kwargs)
+    if isinstance(respuesta, dict) and not respuesta.get("errors"):
+        await cache_ejecutar(cache_respuestas.guardar, cache_operacion, cache_parametros, respuesta, cache_etiquetas, generacion)
+    return respuesta
+
+async def invalidar_cache(*etiquetas:str):
+    """Invalida las respuestas de cache_respuestas afectadas por una modificacion"""
+    await cache_ejecutar(cache_respuestas.invalidar, *etiquetas)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Crea el cliente de Monday y arranca el pool de importaciones al iniciar el servicio, al finalizar cierra las conexiones"""
+    get_monday_client()
+    cola_trabajos.recuperar_interrumpidos()
+    pool_importaciones.iniciar()
+    yield
+    pool_importaciones.detener()
+    get_pool_parseo().cerrar()
+    await monday_pool.aclose()
+    monday_executor.cerrar()
+
+app = FastAPI(lifespan=lifespan)
 
 #______________________________________________________________________________________________________________
 #___________________________ CREATE____________________________________________________________________________
@@ -80,8 +166,8 @@ async def create_board(request: Request) -> OutputModel:
     message = ""        
    
     try: 
-        monday_client = MondayClient(os.getenv("MONDAY_API_KEY"))
-    except requests.RequestException as e:
+        monday_client = get_monday_client()
+    except ERRORES_CONEXION as e:
         return OutputModel(
         invocationId=invocation_id,        
         response=[ResponseMessageModel(message="Error de conexión con el cliente de Monday: {e}")]
@@ -97,9 +183,10 @@ async def create_board(request: Request) -> OutputModel:
         )
 
     actual_board_kind = BoardKind(params.board_kind)
-    board = monday_client.boards.create_board(
+    board = await monday_call(monday_client.boards.create_board,
     board_name=params.board_name, board_kind=actual_board_kind
     )
+    await invalidar_cache("boards")
 
     #message = f"Created monday board {params.board_name} of kind {params.board_kind}. ID of the new board: {board['data']['create_board']['id']}"
     
@@ -130,8 +217,8 @@ async def create_board_group(request: Request) -> OutputModel:
     invocation_id = str(uuid4())
 
     try: 
-        monday_client = MondayClient(os.getenv("MONDAY_API_KEY"))
-    except requests.RequestException as e:
+        monday_client = get_monday_client()
+    except ERRORES_CONEXION as e:
         return OutputModel(
         invocationId=invocation_id,        
         response=[ResponseMessageModel(message="Error de conexión con el cliente de Monday: {e}")]
@@ -155,7 +242,8 @@ async def create_board_group(request: Request) -> OutputModel:
     
     try:
         #llamada al servicio de monday
-        response = monday_client.groups.create_group(board_id=params.board_id, group_name=params.group_name)
+        response = await monday_call(monday_client.groups.create_group, board_id=params.board_id, group_name=params.group_name)
+        await invalidar_cache(etiqueta_board("grupos", params.board_id))
 
         #Imprimo la respuesta
         logger.info(response)
@@ -211,8 +299,8 @@ async def create_item(request: Request) -> OutputModel:
     data = await request.json()
     
     try: 
-        monday_client = MondayClient(os.getenv("MONDAY_API_KEY"))
-    except requests.RequestException as e:
+        monday_client = get_monday_client()
+    except ERRORES_CONEXION as e:
         return OutputModel(
         invocationId=invocation_id,        
         response=[ResponseMessageModel(message="Error de conexión con el cliente de Monday: {e}")]
@@ -234,7 +322,7 @@ async def create_item(request: Request) -> OutputModel:
     response = None
 
     try:
-        response = monday_client.items.create_item(
+        response = await monday_call(monday_client.items.create_item,
                 board_id=params.board_id,
                 group_id=params.group_id,
                 item_name=params.item_name,
@@ -293,8 +381,8 @@ async def create_subitem(request: Request) -> OutputModel:
     data = await request.json()
     
     try: 
-        monday_client = MondayClient(os.getenv("MONDAY_API_KEY"))
-    except requests.RequestException as e:
+        monday_client = get_monday_client()
+    except ERRORES_CONEXION as e:
         return OutputModel(
         invocationId=invocation_id,        
         response=[ResponseMessageModel(message="Error de conexión con el cliente de Monday: {e}")]
@@ -316,7 +404,7 @@ async def create_subitem(request: Request) -> OutputModel:
     response = None
 
     try:
-        response = monday_client.items.create_subitem (
+        response = await monday_call(monday_client.items.create_subitem,
                 parent_item_id=params.parent_item_id,
                 subitem_name=params.subitem_name,
                 column_values=params.column_values,
@@ -369,8 +457,8 @@ async def create_update_comment(request: Request) -> OutputModel:
     invocation_id = str(uuid4())
 
     try: 
-        monday_client = MondayClient(os.getenv("MONDAY_API_KEY"))
-    except requests.RequestException as e:
+        monday_client = get_monday_client()
+    except ERRORES_CONEXION as e:
         return OutputModel(
         invocationId=invocation_id,        
         response=[ResponseMessageModel(message="Error de conexión con el cliente de Monday: {e}")]
@@ -392,7 +480,7 @@ async def create_update_comment(request: Request) -> OutputModel:
     response = None
     try:
         #llamada al servicio de monday
-        response = monday_client.updates.create_update(item_id=params.item_id, update_value=params.update_value)
+        response = await monday_call(monday_client.updates.create_update, item_id=params.item_id, update_value=params.update_value)
 
         #Imprimo la respuesta
         logger.info(response)
@@ -440,8 +528,8 @@ async def create_doc(request: Request) -> OutputModel:
     logger.info(invocation_id)
 
     try:
-        monday_client = MondayClient(os.getenv("MONDAY_API_KEY"))
-    except requests.RequestException as e:
+        monday_client = get_monday_client()
+    except ERRORES_CONEXION as e:
         return OutputModel(
             invocationId=invocation_id,
             response=[ResponseMessageModel(message=f"Error de conexión con el cliente de Monday: {e}")]
@@ -490,7 +578,7 @@ async def create_doc(request: Request) -> OutputModel:
     """
     logger.info(mutation)
     try:
-        response = monday_client.custom._query(mutation)
+        response = await monday_call(monday_client.custom._query, mutation)
         logger.info(response)
     except Exception as e:
         logger.info("sin respuesta")
@@ -584,8 +672,8 @@ async def create_doc_by_workspace(request: Request) -> OutputModel:
     logger.info(invocation_id)
 
     try:
-        monday_client = MondayClient(os.getenv("MONDAY_API_KEY"))
-    except requests.RequestException as e:
+        monday_client = get_monday_client()
+    except ERRORES_CONEXION as e:
         return OutputModel(
             invocationId=invocation_id,
             response=[ResponseMessageModel(message=f"Error de conexión con el cliente de Monday: {e}")]
@@ -618,7 +706,7 @@ async def create_doc_by_workspace(request: Request) -> OutputModel:
     """
     logger.info(mutation)
     try:
-        response = monday_client.custom._query(mutation)
+        response = await monday_call(monday_client.custom._query, mutation)
         logger.info(response)
     except Exception as e:
         logger.info("sin respuesta")
@@ -682,8 +770,8 @@ async def create_doc_by_item_column(request: Request) -> OutputModel:
     logger.info(invocation_id)
 
     try:
-        monday_client = MondayClient(os.getenv("MONDAY_API_KEY"))
-    except requests.RequestException as e:
+        monday_client = get_monday_client()
+    except ERRORES_CONEXION as e:
         return OutputModel(
             invocationId=invocation_id,
             response=[ResponseMessageModel(message=f"Error de conexión con el cliente de Monday: {e}")]
@@ -719,7 +807,7 @@ async def create_doc_by_item_column(request: Request) -> OutputModel:
     """
     logger.info(mutation)
     try:
-        response = monday_client.custom._query(mutation)
+        response = await monday_call(monday_client.custom._query, mutation)
         logger.info(response)
     except Exception as e:
         logger.info("sin respuesta")
@@ -809,8 +897,8 @@ async def create_column(request: Request) -> OutputModel:
     invocation_id = str(uuid4())
     try: 
         #Abro conexion
-        monday_client = MondayClient(os.getenv("MONDAY_API_KEY"))
-    except requests.RequestException as e:
+        monday_client = get_monday_client()
+    except ERRORES_CONEXION as e:
         return OutputModel(
         invocationId=invocation_id, 
         response=[ResponseMessageModel(message="Error de conexión con el cliente de Monday: {e}")]
@@ -857,9 +945,10 @@ async def create_column(request: Request) -> OutputModel:
 
     # Ejecutar mutación
     try:
-        response = monday_client.custom._query(mutation)
+        response = await monday_call(monday_client.custom._query, mutation)
+        await invalidar_cache(etiqueta_board("columnas", params.board_id))
         logger.info(response)
-    except requests.RequestException as e:
+    except ERRORES_CONEXION as e:
         return OutputModel(
             invocationId=invocation_id,
             status="error",
@@ -911,8 +1000,8 @@ async def listBoards(request: Request) -> OutputModel:
     """
     invocation_id = str(uuid4())
     try: 
-        monday_client = MondayClient(os.getenv("MONDAY_API_KEY"))
-    except requests.RequestException as e:
+        monday_client = get_monday_client()
+    except ERRORES_CONEXION as e:
         return OutputModel(
         invocationId=invocation_id,        
         response=[ResponseMessageModel(message="Error de conexión con el cliente de Monday: {e}")]
@@ -921,7 +1010,8 @@ async def listBoards(request: Request) -> OutputModel:
     try:
         data = await request.json()
         params = ListBoardsParams(**data)
-        response = monday_client.boards.fetch_boards(limit=params.limit, page=params.page)
+        response = await monday_call_cache("boards", {"limit": params.limit, "page": params.page}, ["boards"],
+            monday_client.boards.fetch_boards, limit=params.limit, page=params.page)
         boards_data = response["data"]["boards"]
         
     except Exception as e:
@@ -967,8 +1057,8 @@ async def getBoardGroups(request: Request) -> OutputModel:
     invocation_id = str(uuid4())
 
     try: 
-        monday_client = MondayClient(os.getenv("MONDAY_API_KEY"))
-    except requests.RequestException as e:
+        monday_client = get_monday_client()
+    except ERRORES_CONEXION as e:
         return OutputModel(
         invocationId=invocation_id,        
         response=[ResponseMessageModel(message="Error de conexión con el cliente de Monday: {e}")]
@@ -992,7 +1082,8 @@ async def getBoardGroups(request: Request) -> OutputModel:
     
     try:
         #llamada al servicio de monday
-        response = monday_client.groups.get_groups_by_board(board_ids=params.board_id)
+        response = await monday_call_cache("groups", {"board_id": params.board_id}, [etiqueta_board("grupos", params.board_id)],
+            monday_client.groups.get_groups_by_board, board_ids=params.board_id)
         
         #Imprimo la respuesta
         logger.info(response)
@@ -1031,8 +1122,8 @@ async def list_items_in_groups(request: Request) -> OutputModel:
     invocation_id = str(uuid4())
 
     try:
-        monday_client = MondayClient(os.getenv("MONDAY_API_KEY"))
-    except requests.RequestException as e:
+        monday_client = get_monday_client()
+    except ERRORES_CONEXION as e:
         return OutputModel(
             invocationId=invocation_id,
             response=[ResponseMessageModel(message=f"Error de conexión con el cliente de Monday: {e}")]
@@ -1070,9 +1161,9 @@ async def list_items_in_groups(request: Request) -> OutputModel:
     """
 
     try:
-        response = monday_client.custom._query(query)
+        response = await monday_call(monday_client.custom._query, query)
         logger.info(response)
-    except requests.RequestException as e:
+    except ERRORES_CONEXION as e:
         return OutputModel(
             invocationId=invocation_id,
             response=[ResponseMessageModel(message=f"Error de respuesta al solicitar la lista de tareas de los grupos, de un tablero de Monday.com: {e}")]
@@ -1148,8 +1239,8 @@ async def list_subitems_in_items(request: Request) -> OutputModel:
     invocation_id = str(uuid4())
 
     try:
-        monday_client = MondayClient(os.getenv("MONDAY_API_KEY"))
-    except requests.RequestException as e:
+        monday_client = get_monday_client()
+    except ERRORES_CONEXION as e:
         return OutputModel(
             invocationId=invocation_id,
             response=[ResponseMessageModel(message=f"Error de conexión con el cliente de Monday: {e}")]
@@ -1182,9 +1273,9 @@ async def list_subitems_in_items(request: Request) -> OutputModel:
     """
 
     try:
-        response = monday_client.custom._query(query)
+        response = await monday_call(monday_client.custom._query, query)
         logger.info(response)
-    except requests.RequestException as e:
+    except ERRORES_CONEXION as e:
         return OutputModel(
             invocationId=invocation_id,
             response=[ResponseMessageModel(message=f"Error de respuesta al solicitar la lista de subtareas de tareas especificadas en Monday.com: {e}")]
@@ -1239,8 +1330,8 @@ async def get_item_updates(request: Request) -> OutputModel:
     invocation_id = str(uuid4())
     monday_client = None
     try: 
-        monday_client = MondayClient(os.getenv("MONDAY_API_KEY"))
-    except requests.RequestException as e:
+        monday_client = get_monday_client()
+    except ERRORES_CONEXION as e:
         return OutputModel(
         invocationId=invocation_id,
         status="error",
@@ -1262,7 +1353,7 @@ async def get_item_updates(request: Request) -> OutputModel:
     response = None
     try:
         #llamada al servicio de monday
-        response = monday_client.updates.fetch_updates_for_item(
+        response = await monday_call(monday_client.updates.fetch_updates_for_item,
             item_id=params.item_id,
             limit=params.limit
         )
@@ -1350,8 +1441,8 @@ async def get_docs(request: Request) -> OutputModel:
     logger.info(invocation_id)
      
     try:
-        monday_client = MondayClient(os.getenv("MONDAY_API_KEY"))
-    except requests.RequestException as e:
+        monday_client = get_monday_client()
+    except ERRORES_CONEXION as e:
         return OutputModel(
             invocationId=invocation_id,
             response=[ResponseMessageModel(message=f"Error de conexión con el cliente de Monday: {e}")]
@@ -1389,9 +1480,9 @@ async def get_docs(request: Request) -> OutputModel:
         """
         
     try:
-        response = monday_client.custom._query(query)
+        response = await monday_call(monday_client.custom._query, query)
         logger.info(response)
-    except requests.RequestException as e:
+    except ERRORES_CONEXION as e:
         logger.info("sin respuesta")
         return OutputModel(
             invocationId=invocation_id,
@@ -1448,8 +1539,8 @@ async def get_doc_content(request: Request) -> OutputModel:
     logger.info(invocation_id)
 
     try:
-        monday_client = MondayClient(os.getenv("MONDAY_API_KEY"))
-    except requests.RequestException as e:
+        monday_client = get_monday_client()
+    except ERRORES_CONEXION as e:
         return OutputModel(
             invocationId=invocation_id,
             response=[ResponseMessageModel(message=f"Error de conexión con el cliente de Monday: {e}")]
@@ -1487,9 +1578,9 @@ async def get_doc_content(request: Request) -> OutputModel:
         }}
     """
     try:
-        response = monday_client.custom._query(query)
+        response = await monday_call(monday_client.custom._query, query)
         logger.info(response)
-    except requests.RequestException as e:
+    except ERRORES_CONEXION as e:
         logger.info("sin respuesta")
         return OutputModel(
             invocationId=invocation_id,
@@ -1580,8 +1671,8 @@ async def listUsers() -> OutputModel:
     invocation_id = str(uuid4())
        
     try: 
-        monday_client = MondayClient(os.getenv("MONDAY_API_KEY"))
-    except requests.RequestException as e:
+        monday_client = get_monday_client()
+    except ERRORES_CONEXION as e:
         return OutputModel(
         invocationId=invocation_id,        
         response=[ResponseMessageModel(message="Error de conexión con el cliente de Monday: {e}")]
@@ -1594,7 +1685,7 @@ async def listUsers() -> OutputModel:
    # )
 
    # message = "Usuarios disponibles en Monday.com: \n %s" % (users_list) 
-    response = monday_client.users.fetch_users()
+    response = await monday_call_cache("users", {}, ["users"], monday_client.users.fetch_users)
     users = response["data"]["users"]
     usuarios = []
     for user in users:
@@ -1629,8 +1720,8 @@ async def listWorkspaces(request: Request) -> OutputModel:
 
     # Conectar con el cliente Monday
     try:
-        monday_client = MondayClient(os.getenv("MONDAY_API_KEY"))
-    except requests.RequestException as e:
+        monday_client = get_monday_client()
+    except ERRORES_CONEXION as e:
         return OutputModel(
             invocationId=invocation_id,
             response=[ResponseMessageModel(message=f"Error de conexión con el cliente de Monday: {e}")]
@@ -1649,9 +1740,9 @@ async def listWorkspaces(request: Request) -> OutputModel:
     """
 
     try:
-        response = monday_client.custom._query(query)
+        response = await monday_call_cache("workspaces", {}, ["workspaces"], monday_client.custom._query, query)
         logger.info(response)
-    except requests.RequestException as e:
+    except ERRORES_CONEXION as e:
         return OutputModel(
             invocationId=invocation_id,
             response=[ResponseMessageModel(message=f"Error al solicitar la lista de workspaces de Monday.com: {e}")]
@@ -1703,8 +1794,8 @@ async def get_item_by_id(request: Request) -> OutputModel:
     invocation_id = str(uuid4())
     monday_client = None
     try: 
-        monday_client = MondayClient(os.getenv("MONDAY_API_KEY"))
-    except requests.RequestException as e:
+        monday_client = get_monday_client()
+    except ERRORES_CONEXION as e:
         return OutputModel(
         invocationId=invocation_id,
         status="error",
@@ -1727,7 +1818,7 @@ async def get_item_by_id(request: Request) -> OutputModel:
     response = None
     try:
         #llamada al servicio de monday
-        response = monday_client.items.fetch_items_by_id(
+        response = await monday_call(monday_client.items.fetch_items_by_id,
             ids = json.dumps(params.items_id)
         )
         #Imprimo la respuesta
@@ -1804,8 +1895,8 @@ async def get_board_columns(request: Request) -> OutputModel:
     invocation_id = str(uuid4())
 
     try: 
-        monday_client = MondayClient(os.getenv("MONDAY_API_KEY"))
-    except requests.RequestException as e:
+        monday_client = get_monday_client()
+    except ERRORES_CONEXION as e:
         return OutputModel(
         invocationId=invocation_id,        
         response=[ResponseMessageModel(message="Error de conexión con el cliente de Monday: {e}")]
@@ -1841,7 +1932,8 @@ async def get_board_columns(request: Request) -> OutputModel:
     """     
 
     #Llamada al servicio de Monday
-    response = monday_client.custom._query(query)
+    response = await monday_call_cache("columns", {"board_id": params.board_id}, [etiqueta_board("columnas", params.board_id)],
+        monday_client.custom._query, query)
 
     #Imprime la respuesta
     logger.info(response)
@@ -1902,8 +1994,8 @@ async def update_item(request: Request) -> OutputModel:
     invocation_id = str(uuid4())
 
     try: 
-        monday_client = MondayClient(os.getenv("MONDAY_API_KEY"))
-    except requests.RequestException as e:
+        monday_client = get_monday_client()
+    except ERRORES_CONEXION as e:
         return OutputModel(
         invocationId=invocation_id,        
         response=[ResponseMessageModel(message="Error de conexión con el cliente de Monday: {e}")]
@@ -1934,7 +2026,7 @@ async def update_item(request: Request) -> OutputModel:
 
     try:
         #llamada al servicio de monday
-        response = monday_client.items.change_multiple_column_values(
+        response = await monday_call(monday_client.items.change_multiple_column_values,
             board_id=params.board_id, 
             item_id=params.item_id, 
             column_values=params.column_values,
@@ -1984,8 +2076,8 @@ async def move_item_to_group(request: Request) -> OutputModel:
     invocation_id = str(uuid4())
     monday_client = None
     try:
-        monday_client = MondayClient(os.getenv("MONDAY_API_KEY"))
-    except requests.RequestException as e:
+        monday_client = get_monday_client()
+    except ERRORES_CONEXION as e:
         return OutputModel(
         invocationId=invocation_id,
         status="error",
@@ -2006,7 +2098,7 @@ async def move_item_to_group(request: Request) -> OutputModel:
     response = None
     try:
         #llamada al servicio de monday
-        response = monday_client.items.move_item_to_group(
+        response = await monday_call(monday_client.items.move_item_to_group,
             item_id= params.item_id,
             group_id= params.group_id
         )
@@ -2048,8 +2140,8 @@ async def archive_item_by_id(request: Request) -> OutputModel:
     invocation_id = str(uuid4())
     monday_client = None
     try:
-        monday_client = MondayClient(os.getenv("MONDAY_API_KEY"))
-    except requests.RequestException as e:
+        monday_client = get_monday_client()
+    except ERRORES_CONEXION as e:
         return OutputModel(
         invocationId=invocation_id,
         status="error",
@@ -2069,7 +2161,7 @@ async def archive_item_by_id(request: Request) -> OutputModel:
             )
     response = None
     try:
-        response = monday_client.items.archive_item_by_id(
+        response = await monday_call(monday_client.items.archive_item_by_id,
             item_id= params.item_id
         )
         logger.info(response)
@@ -2115,8 +2207,8 @@ async def monday_add_doc_block(request: Request) -> OutputModel:
     invocation_id = str(uuid4())
     monday_client = None
     try: 
-        monday_client = MondayClient(os.getenv("MONDAY_API_KEY"))
-    except requests.RequestException as e:
+        monday_client = get_monday_client()
+    except ERRORES_CONEXION as e:
         return OutputModel(
         invocationId=invocation_id,
         status="error",        
@@ -2168,9 +2260,9 @@ async def monday_add_doc_block(request: Request) -> OutputModel:
     logger.info("el mutation es: ")
     logger.info(mutation)
     try:
-        response = monday_client.custom._query(mutation)
+        response = await monday_call(monday_client.custom._query, mutation)
         logger.info(response)
-    except requests.RequestException as e:
+    except ERRORES_CONEXION as e:
        logger.info(e)
        return OutputModel(
             invocationId=invocation_id,
@@ -2218,8 +2310,8 @@ async def delete_group_by_id(request: Request) -> OutputModel:
     invocation_id = str(uuid4())
     monday_client = None
     try: 
-        monday_client = MondayClient(os.getenv("MONDAY_API_KEY"))
-    except requests.RequestException as e:
+        monday_client = get_monday_client()
+    except ERRORES_CONEXION as e:
         return OutputModel(
         invocationId=invocation_id,
         status="error",        
@@ -2239,10 +2331,11 @@ async def delete_group_by_id(request: Request) -> OutputModel:
             )
     response = None
     try:
-        response = monday_client.groups.delete_group(
+        response = await monday_call(monday_client.groups.delete_group,
             board_id = params.board_id,
             group_id = params.group_id
         )
+        await invalidar_cache(etiqueta_board("grupos", params.board_id))
         logger.info(response)
     except Exception as e:
             message = f"Error de respuesta al solicitar la eliminación del grupo especificado, en Monday.com: {e}"
@@ -2283,8 +2376,8 @@ async def delete_item_by_id(request: Request) -> OutputModel:
     invocation_id = str(uuid4())
     monday_client = None
     try: 
-        monday_client = MondayClient(os.getenv("MONDAY_API_KEY"))
-    except requests.RequestException as e:
+        monday_client = get_monday_client()
+    except ERRORES_CONEXION as e:
         return OutputModel(
         invocationId=invocation_id,
         status="error",        
@@ -2304,7 +2397,7 @@ async def delete_item_by_id(request: Request) -> OutputModel:
             )
     response = None
     try:
-        response = monday_client.items.delete_item_by_id(
+        response = await monday_call(monday_client.items.delete_item_by_id,
             item_id= params.item_id
         )
         logger.info(response)
@@ -2342,8 +2435,8 @@ async def delete_column_by_id(request: Request) -> OutputModel:
     invocation_id = str(uuid4())
     monday_client = None
     try: 
-        monday_client = MondayClient(os.getenv("MONDAY_API_KEY"))
-    except requests.RequestException as e:
+        monday_client = get_monday_client()
+    except ERRORES_CONEXION as e:
         return OutputModel(
         invocationId=invocation_id,
         status="error",        
@@ -2377,9 +2470,10 @@ async def delete_column_by_id(request: Request) -> OutputModel:
     logger.info("el mutation es: ")
     logger.info(mutation)
     try:
-        response = monday_client.custom._query(mutation)
+        response = await monday_call(monday_client.custom._query, mutation)
+        await invalidar_cache(etiqueta_board("columnas", params.board_id))
         logger.info(response)
-    except requests.RequestException as e:
+    except ERRORES_CONEXION as e:
        logger.info(e)
        return OutputModel(
             invocationId=invocation_id,
@@ -2427,26 +2521,26 @@ async def fetch_items_by_board_id(request: Request) -> OutputModel:
     monday_client = None
     try:
         params = FetchItemsByBoardId(**data)
-    except requests.RequestException as e:
+    except ERRORES_CONEXION as e:
         return OutputModel(
         invocationId=invocation_id,        
         response=[ResponseMessageModel(message="Error al recuperar el parámetro, verifique que el ID del tablero proporcionado, exista en Monday.com: {e}")]
     )
 
     try: 
-        monday_client = MondayClient(os.getenv("MONDAY_API_KEY"))
-    except requests.RequestException as e:
+        monday_client = get_monday_client()
+    except ERRORES_CONEXION as e:
         return OutputModel(
         invocationId=invocation_id,        
         response=[ResponseMessageModel(message="Error de conexión con el cliente de Monday: {e}")]
     )
     
     try:
-        board = monday_client.boards.fetch_items_by_board_id(
+        board = await monday_call(monday_client.boards.fetch_items_by_board_id,
             board_ids= params.board_id
         )
         logger.info(board)
-    except requests.RequestException as e:
+    except ERRORES_CONEXION as e:
         return OutputModel(
         invocationId=invocation_id,        
         response=[ResponseMessageModel(message=f"Error de respuesta al solicitar el listado de las tareas que posee un tablero especificado en Monday.com: {e}")]
@@ -2544,22 +2638,47 @@ async def fetch_items_by_board_id(request: Request) -> OutputModel:
             response=[ResponseMessageModel(message=message)]
     )
 
-def process_excel(hilo:Hilo,params:OpenExcel,monday_client:MondayClient,invocation_id:str):
+def estado_singleflight() -> dict:
+    """Queries identicas concurrentes agrupadas por el cliente asincronico, None con el SDK sincronico"""
+    singleflight = getattr(getattr(get_monday_client(), "graphql", None), "singleflight", None)
+    return singleflight.estado() if singleflight is not None else None
+
+@app.get("/monday/metricas")
+async def metricas() -> JSONResponse:
+    """Devuelve las metricas de las llamadas a Monday ejecutadas en el pool de hilos, el estado del limitador, el presupuesto de complejidad, los caches de archivos y respuestas y las queries agrupadas"""
+    return JSONResponse(content={
+        "modo_cliente": monday_client_mode,
+        "threadpool_size": monday_executor.max_workers,
+        "llamadas": monday_executor.get_metricas(),
+        "limitador": rate_limiter.estado(),
+        "complejidad": get_presupuesto().estado(),
+        "cache_archivos": get_cache_archivos().estado(),
+        "cache_respuestas": cache_respuestas.estado(),
+        "singleflight": estado_singleflight()
+    })
+
+def process_excel(trabajo:Trabajo):
     """
-        Proceso que se dispara en un hilo separado desde open_excel
+        Procesa un trabajo de la cola de importaciones, se ejecuta en un worker de pool_importaciones
     """
+    params = OpenExcel(**trabajo.params)
     excel_monday = ExcelUtilsMonday()
-    hilo.proceso_excel = excel_monday
+    pool_importaciones.registrar_activo(trabajo.uid,excel_monday)
     excel_monday.esperar = (params.esperar == "True")
-    excel_monday.wait_time = 3
-    uid = invocation_id
+    excel_monday.streaming = (params.streaming == "True")
+    excel_monday.usar_plantilla = (params.plantilla == "True")
     continuar = (params.continuar == "True")
     descargar = (params.download == "True")
-    if continuar:
-        logger.info("Entro")
-        uid = params.uid
-        logger.info(uid)
-    excel_monday.process_excel_monday(params.file_name,descargar,monday_client,uid,params.rows,continuar)
+    excel_monday.process_excel_monday(params.file_name,descargar,get_monday_sdk_client(),trabajo.uid,params.rows,continuar)
+    if excel_monday.detener:
+        return DETENIDO, excel_monday.message
+    if excel_monday.error:
+        return ERROR, excel_monday.message
+    return FINALIZADO, excel_monday.message
+
+#Cola persistente de importaciones y workers que la procesan (MONDAY_IMPORT_CONCURRENCIA a la vez)
+cola_trabajos = ColaTrabajos()
+pool_importaciones = PoolImportaciones(cola_trabajos,process_excel)
 
 @app.post("/monday/estado_proceso_excel")
 async def estado_proceso(request: Request) -> OutputModel:
@@ -2588,23 +2707,17 @@ async def estado_proceso(request: Request) -> OutputModel:
     arr_proceso_antiguos = []
 
     if purgar_inactivos:
-        arr = []
-        for hilo in hilos:
-            if not hilo.proceso_excel.procesando:
-                arr.append(hilo)
-        for hilo in arr:
-            hilos.remove(hilo)
+        cola_trabajos.purgar_finalizados()
         msg_error = "Se purgaron los procesos inactivos"
         arr_msg.append(msg_error)
 
+    trabajos_activos = cola_trabajos.listar(ESTADOS_ACTIVOS)
+    uids_activos = [trabajo.uid for trabajo in trabajos_activos]
     util =  ExcelUtilsWorks()
     
     for item in util.listar():
         logger.info(item)
-        encontro = False
-        for hilo in hilos:
-            if item == hilo.proceso_excel.uid:
-                encontro = True
+        encontro = item in uids_activos
         if not encontro:
             arr_proceso_antiguos.append(item)
         if purgar_procesos_antiguos:
@@ -2616,16 +2729,14 @@ async def estado_proceso(request: Request) -> OutputModel:
 
     if detener:
         if not uid == None and uid != "":
-            encontro = False
-            for hilo in hilos:
-                if hilo.proceso_excel.uid == uid:
-                    hilo.proceso_excel.detener = True
-                    msg_error = f"Deteniendo proceso {uid}"
-                    arr_msg.append(msg_error)
-                    encontro = True
-            if not encontro:
+            if uid in pool_importaciones.activos:
+                pool_importaciones.activos[uid].detener = True
+                msg_error = f"Deteniendo proceso {uid}"
+            elif cola_trabajos.cancelar(uid):
+                msg_error = f"Se cancelo el proceso pendiente {uid}"
+            else:
                 msg_error = f"No se encontro el proceso {uid}"
-                arr_msg.append(msg_error)
+            arr_msg.append(msg_error)
         else:
             msg_error = "Debe proporcionarse un uid para poder detener un proceso"
             arr_msg.append(msg_error)
@@ -2633,15 +2744,23 @@ async def estado_proceso(request: Request) -> OutputModel:
     message = ""
     informacion_uid = ""
     if uid != None and uid != "":
-        excel_monday = ExcelUtilsMonday()
-        excel_monday.uid = uid
-        if excel_monday.read_estado():
-            informacion_uid = excel_monday.listar_estado_texto()
+        trabajo = cola_trabajos.get(uid)
+        if trabajo is not None:
+            informacion_uid = f"Trabajo {uid}: {trabajo.estado} prioridad: {trabajo.prioridad} intentos: {trabajo.intentos} {trabajo.mensaje}\n"
+        #Si el proceso esta corriendo se muestra su avance, si no el ultimo estado guardado
+        excel_monday = pool_importaciones.activos.get(uid)
+        if excel_monday is None:
+            excel_monday = ExcelUtilsMonday()
+            excel_monday.uid = uid
+            if not excel_monday.read_estado():
+                excel_monday = None
+        if excel_monday is not None:
+            informacion_uid += excel_monday.listar_estado_texto()
 
     template = template_env.get_template("response_template_estado_proceso_excel.jinja")
-    cant_procesos = len(hilos)
+    cant_procesos = len(trabajos_activos)
     message = template.render(
-        procesos_activos = hilos,
+        procesos_activos = trabajos_activos,
         cant_procesos = cant_procesos,
         msg_error = arr_msg,
         arr_proceso_antiguos = arr_proceso_antiguos,
@@ -2678,12 +2797,14 @@ async def analizar_excel(request: Request) -> OutputModel:
     descargar = (params.download == "True")
     if continuar:
         uid = params.uid
-    arr_analisis = excel_monday.analizar_excel(params.file_name,descargar,uid)
+    #El parseo corre en el pool de procesos, se espera sin bloquear el event loop
+    arr_analisis = await run_in_threadpool(excel_monday.analizar_excel,params.file_name,descargar,uid)
 
     message = ""
     template = template_env.get_template("response_template_analiza_excel.jinja")
     message = template.render(
-        arr_analisis = arr_analisis
+        arr_analisis = arr_analisis,
+        errores_fechas = excel_monday.errores_fechas
     )
     logger.info(message)
     return OutputModel(
@@ -2701,7 +2822,10 @@ async def open_excel(request: Request) -> OutputModel:
         rows = si el parametro rows es = 0 se procesaran todas las filas del documento si es otro numero se procesaran la cantidad de filas especificadas
         uid = si se desea continuar un proceso que finalizo con error o un proceso parcial se debe proporcionar el identificador de la transaccion previa
         continuar = si se desea continuar un proceso finalizado con error o un proceso parcial este parametro debe estar en True
-        esperar = este parametro espera un tiempo antes de mandar el siguiente request a monday para evitar errores de conexion debe estar en true para aplicar los tiempos de espera
+        esperar = si esta en True los requests a monday pasan por el limitador de velocidad adaptativo, que acelera mientras haya presupuesto y espera solo cuando monday lo indica
+        dry_run = si esta en True no se llama a monday, se arma el plan de importacion y se informa la cantidad de elementos, mutaciones, complejidad y la duracion estimada
+        streaming = si esta en True el excel se lee por bloques de filas (MONDAY_EXCEL_BLOQUE) y cada bloque se crea en monday antes de leer el siguiente, para archivos muy grandes
+        plantilla = si esta en True cada board se crea con duplicate_board de un board plantilla que ya tiene las columnas de fecha del board y del sub board
     """
     
     # Guardar hora de inicio     
@@ -2723,23 +2847,50 @@ async def open_excel(request: Request) -> OutputModel:
                 status="error",
                 response=[ResponseMessageModel(message=message)]
         )
+    if str(params.dry_run).lower() == "true":
+        excel_monday = ExcelUtilsMonday()
+        excel_monday.usar_plantilla = (params.plantilla == "True")
+        simulacion = await run_in_threadpool(excel_monday.simular_importacion,params.file_name,(params.download == "True"),invocation_id,rate_limiter)
+        if simulacion is None:
+            return OutputModel(
+                    invocationId=invocation_id,
+                    status="error",
+                    response=[ResponseMessageModel(message=excel_monday.message)]
+            )
+        template = template_env.get_template("response_template_simulacion_excel.jinja")
+        message = template.render(
+            file_name = params.file_name,
+            simulacion = simulacion
+        )
+        return OutputModel(
+            invocationId=invocation_id,
+            status="sucess",
+            response=[ResponseMessageModel(message=message)]
+        )
+    #La importacion se encola, la procesa el primer worker libre del pool
+    uid = invocation_id
+    if params.continuar == "True" and params.uid:
+        uid = params.uid
     try:
-        monday_client = MondayClient(os.getenv("MONDAY_API_KEY"))
-        hilo = Hilo()
-        hilo.hilo = Thread(target=process_excel,args=(hilo,params,monday_client,invocation_id))
-        hilo.hilo.start()
-        hilos.append(hilo)
-
-    except requests.RequestException as e:
+        trabajo = pool_importaciones.encolar(uid,params.model_dump(),params.prioridad or 0)
+    except sqlite3.Error as e:
         return OutputModel(
             invocationId=invocation_id,
-            response=[ResponseMessageModel(message=f"Error de conexión con el cliente de Monday: {e}")]
+            status="error",
+            response=[ResponseMessageModel(message=f"No se pudo encolar el proceso: {e}")]
+        )
+    if trabajo.estado == PROCESANDO:
+        #Otro worker ya esta importando este uid, no se encola una segunda ejecucion
+        return OutputModel(
+            invocationId=invocation_id,
+            status="error",
+            response=[ResponseMessageModel(message=f"El proceso {uid} ya se esta ejecutando, consulte su estado con /monday/estado_proceso_excel")]
         )
     #Mensaje de retorno
     template = template_env.get_template("response_template_process_excel.jinja")
     message = template.render(
         file_name = params.file_name,
-        uid = invocation_id
+        uid = uid
     )
 
     # Hora de fin y cálculo de tiempo total
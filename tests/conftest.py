@@ -0,0 +1,10 @@
+import pytest
+
+from monday_cache import get_cache_respuestas
+
+
+@pytest.fixture(autouse=True)
+def limpiar_cache_respuestas():
+    # Cada test arma su propio mock de Monday, no tiene que recibir respuestas de otro test
+    get_cache_respuestas().limpiar()
+    yield
@@ -0,0 +1,118 @@
+import io
+import os
+import zipfile
+
+import pytest
+import requests
+
+import excel_file_cache
+from excel_file_cache import CacheArchivos
+
+
+def contenido_xlsx(texto=b"excel"):
+    archivo = io.BytesIO()
+    with zipfile.ZipFile(archivo, "w") as zip_xlsx:
+        zip_xlsx.writestr("xl/workbook.xml", texto)
+    return archivo.getvalue()
+
+
+class RespuestaFalsa:
+    def __init__(self, status_code, contenido=b"", headers=None):
+        self.status_code = status_code
+        self.contenido = contenido
+        self.headers = headers or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def iter_content(self, chunk_size):
+        for inicio in range(0, len(self.contenido), chunk_size):
+            yield self.contenido[inicio:inicio + chunk_size]
+
+
+def test_archivo_local_se_copia_una_vez_y_se_vincula(tmp_path):
+    origen = tmp_path / "plan.xlsx"
+    origen.write_bytes(b"contenido")
+    cache = CacheArchivos(str(tmp_path / "cache"), max_bytes=1024)
+
+    hash_1 = cache.archivo_local(str(origen), str(tmp_path / "a.xlsx"))
+    hash_2 = cache.archivo_local(str(origen), str(tmp_path / "b.xlsx"))
+    assert hash_1 == hash_2
+    assert (cache.aciertos, cache.fallos) == (1, 1)
+    assert os.stat(tmp_path / "b.xlsx").st_ino == os.stat(cache.get_path_objeto(hash_1)).st_ino
+
+    origen.write_bytes(b"otro contenido")
+    os.utime(origen, ns=(0, 1))
+    assert cache.archivo_local(str(origen), str(tmp_path / "c.xlsx")) != hash_1
+    assert (tmp_path / "c.xlsx").read_bytes() == b"otro contenido"
+
+
+def test_purga_los_objetos_usados_hace_mas_tiempo(tmp_path):
+    cache = CacheArchivos(str(tmp_path / "cache"), max_bytes=10)
+    hashes = []
+    for numero in range(3):
+        origen = tmp_path / f"plan{numero}.xlsx"
+        origen.write_bytes(str(numero).encode() * 6)
+        hashes.append(cache.archivo_local(str(origen), str(tmp_path / f"destino{numero}.xlsx")))
+    assert [cache.existe(hash_contenido) for hash_contenido in hashes] == [False, False, True]
+    # El archivo vinculado sigue disponible aunque se purgue el objeto
+    assert (tmp_path / "destino0.xlsx").read_bytes() == b"000000"
+
+
+def test_archivo_url_revalida_con_etag(tmp_path, monkeypatch):
+    pedidos = []
+
+    def get(url, stream, timeout, headers):
+        pedidos.append(headers)
+        if headers.get("If-None-Match") == '"v1"':
+            return RespuestaFalsa(304)
+        return RespuestaFalsa(200, contenido_xlsx(), {"ETag": '"v1"'})
+
+    monkeypatch.setattr(excel_file_cache.requests, "get", get)
+    cache = CacheArchivos(str(tmp_path / "cache"), max_bytes=1024)
+    cache.archivo_url("https://example.com/plan.xlsx", str(tmp_path / "a.xlsx"))
+    cache.archivo_url("https://example.com/plan.xlsx", str(tmp_path / "b.xlsx"))
+    assert pedidos == [{}, {"If-None-Match": '"v1"'}]
+    assert (tmp_path / "b.xlsx").read_bytes() == contenido_xlsx()
+    assert (cache.aciertos, cache.fallos) == (1, 1)
+
+
+class RespuestaCortada(RespuestaFalsa):
+    def iter_content(self, chunk_size):
+        yield self.contenido[:chunk_size]
+        raise requests.exceptions.ChunkedEncodingError("conexion cortada")
+
+
+def test_archivo_url_retoma_la_descarga_con_range(tmp_path, monkeypatch):
+    monkeypatch.setenv("MONDAY_DESCARGA_CHUNK_KB", "0.1")
+    monkeypatch.setenv("MONDAY_RETRY_ESPERA_BASE", "0.01")
+    contenido = contenido_xlsx(os.urandom(2000))
+    pedidos = []
+
+    def get(url, stream, timeout, headers):
+        pedidos.append(headers)
+        if len(pedidos) == 1:
+            return RespuestaCortada(200, contenido, {"ETag": '"v1"', "Content-Length": str(len(contenido))})
+        inicio = int(headers["Range"][len("bytes="):-1])
+        return RespuestaFalsa(206, contenido[inicio:], {"ETag": '"v1"', "Content-Range": f"bytes {inicio}-{len(contenido) - 1}/{len(contenido)}"})
+
+    monkeypatch.setattr(excel_file_cache.requests, "get", get)
+    avances = []
+    cache = CacheArchivos(str(tmp_path / "cache"), max_bytes=1024 * 1024)
+    cache.archivo_url("https://example.com/plan.xlsx", str(tmp_path / "a.xlsx"), lambda *avance: avances.append(avance))
+    assert pedidos[1] == {"Range": "bytes=102-", "If-Range": '"v1"'}
+    assert (tmp_path / "a.xlsx").read_bytes() == contenido
+    assert avances[-1][:2] == (len(contenido), len(contenido))
+    assert avances[-1][3] == 1
+
+
+def test_descargar_rechaza_un_archivo_que_no_es_xlsx(tmp_path, monkeypatch):
+    monkeypatch.setenv("MONDAY_DESCARGA_INTENTOS", "1")
+    monkeypatch.setattr(excel_file_cache.requests, "get", lambda url, stream, timeout, headers: RespuestaFalsa(200, b"<html>login</html>"))
+    cache = CacheArchivos(str(tmp_path / "cache"), max_bytes=1024)
+    with pytest.raises(excel_file_cache.DescargaInvalida):
+        cache.archivo_url("https://example.com/plan.xlsx", str(tmp_path / "a.xlsx"))
+    assert not (tmp_path / "a.xlsx").exists()
@@ -0,0 +1,102 @@
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+
+from excel_jobs import DETENIDO, ERROR, FINALIZADO, PENDIENTE, PROCESANDO, ColaTrabajos, PoolImportaciones
+
+
+def test_cola_respeta_prioridad_y_orden_de_llegada(tmp_path):
+    cola = ColaTrabajos(str(tmp_path / "trabajos.db"))
+    cola.encolar("a", {"file_name": "a.xlsx"})
+    cola.encolar("b", {"file_name": "b.xlsx"}, prioridad=5)
+    cola.encolar("c", {"file_name": "c.xlsx"})
+    assert [cola.tomar().uid for _ in range(3)] == ["b", "a", "c"]
+    assert cola.tomar() is None
+    assert cola.get("a").estado == PROCESANDO
+    assert cola.get("a").intentos == 1
+
+
+def test_cola_recupera_trabajos_interrumpidos(tmp_path):
+    path = str(tmp_path / "trabajos.db")
+    cola = ColaTrabajos(path)
+    cola.encolar("a", {"file_name": "a.xlsx", "continuar": "False"})
+    cola.encolar("b", {"file_name": "b.xlsx"})
+    cola.tomar()
+    assert cola.cancelar("b")
+
+    # Mientras el proceso dueño sigue vivo el trabajo no se recupera
+    cola = ColaTrabajos(path)
+    assert cola.latir(["a"]) == 1
+    assert cola.recuperar_interrumpidos() == []
+
+    # Otra instancia simula el reinicio del servicio: el dueño ya no existe
+    proceso = subprocess.Popen([sys.executable, "-c", "pass"])
+    proceso.wait()
+    with sqlite3.connect(path) as conexion:
+        conexion.execute("UPDATE trabajos SET duenio = ? WHERE uid = 'a'", (f"{socket.gethostname()}:{proceso.pid}",))
+    assert cola.recuperar_interrumpidos() == ["a"]
+    trabajo = cola.get("a")
+    assert trabajo.estado == PENDIENTE
+    assert trabajo.params["continuar"] == "True"
+    assert trabajo.params["uid"] == "a"
+    assert cola.get("b").estado == DETENIDO
+
+
+def test_cola_recupera_trabajos_de_otro_host_al_vencer_el_latido(tmp_path):
+    path = str(tmp_path / "trabajos.db")
+    cola = ColaTrabajos(path, lease=0.2)
+    cola.encolar("a", {"file_name": "a.xlsx"})
+    cola.tomar()
+    with sqlite3.connect(path) as conexion:
+        conexion.execute("UPDATE trabajos SET duenio = 'otro-host:1' WHERE uid = 'a'")
+    assert cola.recuperar_interrumpidos() == []
+    time.sleep(0.25)
+    assert cola.latir(["a"]) == 0
+    assert cola.recuperar_interrumpidos() == ["a"]
+
+
+def test_pool_limita_las_importaciones_concurrentes(tmp_path):
+    cola = ColaTrabajos(str(tmp_path / "trabajos.db"))
+    activos = []
+    maximo = []
+    lock = threading.Lock()
+
+    def procesar(trabajo):
+        with lock:
+            activos.append(trabajo.uid)
+            maximo.append(len(activos))
+        time.sleep(0.05)
+        with lock:
+            activos.remove(trabajo.uid)
+        if trabajo.uid == "t3":
+            raise ValueError("archivo invalido")
+        return FINALIZADO, ""
+
+    pool = PoolImportaciones(cola, procesar, max_workers=2)
+    for numero in range(6):
+        pool.encolar(f"t{numero}", {"file_name": f"{numero}.xlsx"})
+    limite = time.monotonic() + 5
+    while cola.listar([PENDIENTE, PROCESANDO]) and time.monotonic() < limite:
+        time.sleep(0.02)
+    pool.detener()
+    assert max(maximo) == 2
+    assert cola.get("t0").estado == FINALIZADO
+    assert cola.get("t3").estado == ERROR
+    assert cola.get("t3").mensaje == "archivo invalido"
+
+
+def test_encolar_no_modifica_un_trabajo_en_proceso(tmp_path):
+    cola = ColaTrabajos(str(tmp_path / "trabajos.db"))
+    cola.encolar("a", {"file_name": "a.xlsx"})
+    cola.tomar()
+    # Un continuar para el mismo uid mientras se procesa no lo vuelve a dejar pendiente
+    trabajo = cola.encolar("a", {"file_name": "a.xlsx", "continuar": "True", "uid": "a"})
+    assert trabajo.estado == PROCESANDO
+    assert trabajo.params == {"file_name": "a.xlsx"}
+    assert cola.tomar() is None
+
+    cola.finalizar("a", FINALIZADO)
+    assert cola.encolar("a", {"file_name": "a.xlsx", "continuar": "True", "uid": "a"}).estado == PENDIENTE
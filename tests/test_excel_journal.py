@@ -0,0 +1,20 @@
+from excel_journal import JournalImportacion, leer_journal
+
+
+def test_confirma_por_lotes(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = JournalImportacion(path, cada_filas=2, cada_segundos=60)
+    journal.registrar({"fila": 0, "id": "b1"})
+    assert leer_journal(path) == []
+    journal.registrar({"fila": 1, "id": "g1"})
+    assert leer_journal(path) == [{"fila": 0, "id": "b1"}, {"fila": 1, "id": "g1"}]
+    journal.registrar({"sub_board": "sb1"}, forzar=True)
+    assert leer_journal(path)[-1] == {"sub_board": "sb1"}
+
+
+def test_ignora_la_ultima_linea_incompleta(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    path.write_text('{"fila": 0, "id": "b1"}\n{"fila": 1, "i')
+    assert leer_journal(str(path)) == [{"fila": 0, "id": "b1"}]
+    JournalImportacion(str(path)).eliminar()
+    assert not path.exists()
@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+from excel_planner import EjecutorPlan, NodoPlan, armar_plan
+from open_excel_utils import ExcelUtilsMonday
+
+
+def filas(*niveles):
+    return [(f"fila {i}", None, None, nivel) for i, nivel in enumerate(niveles)]
+
+
+def test_armar_plan_arma_el_arbol_por_outline_level():
+    plan = armar_plan(filas(1, 2, 3, 4, 4, 3, 2, 3, 5), ExcelUtilsMonday().identify_type)
+    assert plan.contar() == {"board": 1, "group": 2, "item": 3, "subiteml1": 2}
+    board = plan.raices[0]
+    assert [grupo.fila for grupo in board.hijos] == [1, 6]
+    assert [item.fila for item in board.hijos[0].hijos] == [2, 5]
+    assert [subitem.fila for subitem in board.hijos[0].hijos[0].hijos] == [3, 4]
+    assert len(plan.niveles()) == 4
+
+
+def test_armar_plan_informa_filas_sin_padre():
+    plan = armar_plan(filas(3, 1, 2, 3, 5), ExcelUtilsMonday().identify_type, cargar_niveles_superiores=True)
+    assert [nodo.fila for nodo in plan.huerfanos] == [0]
+    assert plan.contar() == {"board": 1, "group": 1, "item": 1, "subiteml2": 1}
+
+
+def test_ejecutor_crea_ramas_independientes_en_paralelo():
+    plan = armar_plan(filas(1, 2, 3, 3, 2, 3, 3, 2, 3, 3), ExcelUtilsMonday().identify_type)
+    creados = []
+    en_paralelo = []
+    activos = []
+    lock = threading.Lock()
+
+    def crear_nodo(nodo):
+        assert nodo.padre is None or nodo.padre.monday_id is not None
+        with lock:
+            activos.append(nodo)
+            en_paralelo.append(len(activos))
+        time.sleep(0.02)
+        with lock:
+            activos.remove(nodo)
+            creados.append(nodo.fila)
+        nodo.monday_id = f"id{nodo.fila}"
+
+    EjecutorPlan(crear_nodo, max_workers=4).ejecutar(plan)
+    assert sorted(creados) == list(range(10))
+    # Los items de cada grupo se crean en orden, los de grupos distintos al mismo tiempo
+    assert creados.index(2) < creados.index(3) and creados.index(5) < creados.index(6)
+    assert max(en_paralelo) == 3
+    assert plan.ultima_fila_completa() == 9
+
+
+def test_ejecutor_no_crea_hijos_de_una_rama_con_error():
+    plan = armar_plan(filas(1, 2, 3, 2, 3), ExcelUtilsMonday().identify_type)
+
+    def crear_nodo(nodo):
+        if nodo.fila == 1:
+            raise RuntimeError("falla grupo")
+        nodo.monday_id = f"id{nodo.fila}"
+
+    with pytest.raises(RuntimeError):
+        EjecutorPlan(crear_nodo).ejecutar(plan)
+    # El grupo siguiente del mismo board tampoco se crea para respetar el orden del excel
+    assert [nodo.fila for nodo in plan.pendientes()] == [1, 2, 3, 4]
+    assert plan.ultima_fila_completa() == 0
+
+
+def test_clave_de_fila_depende_de_la_posicion_y_el_titulo():
+    assert NodoPlan(3, "item", "Tarea").clave() == NodoPlan(3, "subiteml1", "Tarea").clave()
+    assert NodoPlan(3, "item", "Tarea").clave() != NodoPlan(4, "item", "Tarea").clave()
+    assert NodoPlan(3, "item", "Tarea").clave() != NodoPlan(3, "item", "Otra").clave()
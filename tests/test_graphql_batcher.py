@@ -0,0 +1,56 @@
+import pytest
+from graphql_batcher import MutationBatcher
+
+
+class MockCustom:
+    def __init__(self):
+        self.documentos = []
+
+    def _query(self, mutation):
+        self.documentos.append(mutation)
+        alias = [linea.strip().split(":")[0] for linea in mutation.splitlines() if linea.strip().startswith("m")]
+        alias = [a for a in alias if a != "mutation {"]
+        return {"data": {a: {"id": f"id_{a}"} for a in alias}}
+
+
+class MockMondayClient:
+    def __init__(self):
+        self.custom = MockCustom()
+
+
+def test_agrupa_mutaciones_y_mapea_resultados():
+    client = MockMondayClient()
+    batcher = MutationBatcher(client, max_operaciones=10)
+    r1 = batcher.agregar('change_simple_column_value (board_id: 1, item_id: 2, column_id: "a", value: "x") { id }')
+    r2 = batcher.agregar('change_simple_column_value (board_id: 1, item_id: 2, column_id: "b", value: "y") { id }')
+    batcher.ejecutar()
+    assert len(client.custom.documentos) == 1
+    assert "m1: change_simple_column_value" in client.custom.documentos[0]
+    assert "m2: change_simple_column_value" in client.custom.documentos[0]
+    assert r1.get() == {"id": "id_m1"}
+    assert r2.get() == {"id": "id_m2"}
+
+
+def test_respeta_limite_de_operaciones_y_complejidad():
+    client = MockMondayClient()
+    batcher = MutationBatcher(client, max_operaciones=3, max_complejidad=25000)
+    for i in range(7):
+        batcher.agregar(f"delete_column (board_id: 1, column_id: \"c{i}\") {{ id }}", complejidad=10000)
+    batcher.ejecutar()
+    assert batcher.cantidad_mutaciones == 7
+    assert batcher.cantidad_requests == 4
+
+
+def test_error_del_lote_se_propaga_a_cada_resultado():
+    class MockCustomError:
+        def _query(self, mutation):
+            raise ConnectionError("Simulated connection error")
+
+    client = MockMondayClient()
+    client.custom = MockCustomError()
+    batcher = MutationBatcher(client)
+    resultado = batcher.agregar("delete_column (board_id: 1, column_id: \"c\") { id }")
+    with pytest.raises(ConnectionError):
+        batcher.ejecutar()
+    with pytest.raises(ConnectionError):
+        resultado.get()
@@ -98,3 +98,60 @@ def test_get_board_groups_empty_success(monkeypatch):
     # Validamos que el mensaje indique que no hay grupos
     assert any("No se encontraron grupos" in msg["message"] for msg in data["response"])
 
+
+# ---------- metricas del pool de hilos ----------
+def test_metricas_registra_llamadas_sincronicas(monkeypatch):
+    class MockBoards:
+        def fetch_boards(self, limit, page):
+            return {"data": {"boards": [{"id": "b1", "name": "Board 1"}]}}
+    class MockMondayClient:
+        def __init__(self, api_key):
+            self.boards = MockBoards()
+    monkeypatch.setattr("server.MondayClient", MockMondayClient)
+
+    client.post("/monday/boards/list", json={"limit": 10, "page": 1})
+    response = client.get("/monday/metricas")
+    assert response.status_code == 200
+    llamadas = response.json()["llamadas"]
+    assert any(nombre.endswith("MockBoards.fetch_boards") and metrica["cantidad"] >= 1 for nombre, metrica in llamadas.items())
+
+
+# ---------- cache de respuestas ----------
+def test_get_board_columns_usa_el_cache_hasta_crear_una_columna(monkeypatch):
+    consultas = []
+    class MockCustom:
+        def _query(self, query):
+            consultas.append(query)
+            if "create_column" in query:
+                return {"data": {"create_column": {"id": "co1"}}}
+            return {"data": {"boards": [{"columns": [{"id": "c1", "title": "Estado", "type": "status", "settings_str": "{}"}]}]}}
+    class MockMondayClient:
+        def __init__(self, api_key):
+            self.custom = MockCustom()
+    monkeypatch.setattr("server.MondayClient", MockMondayClient)
+
+    for _ in range(3):
+        response = client.post("/monday/columns/get", json={"board_id": "b1"})
+        assert "Estado" in str(response.json())
+    assert len(consultas) == 1
+
+    client.post("/monday/columns/create", json={"board_id": "b1", "column_title": "Nueva"})
+    client.post("/monday/columns/get", json={"board_id": "b1"})
+    assert len(consultas) == 3
+    assert client.get("/monday/metricas").json()["cache_respuestas"]["aciertos"] >= 2
+
+
+# ---------- errores de conexion del cliente asincronico ----------
+def test_fetch_items_by_board_id_informa_errores_de_httpx(monkeypatch):
+    import httpx
+    class MockBoards:
+        def fetch_items_by_board_id(self, board_ids):
+            raise httpx.ConnectError("connection refused")
+    class MockMondayClient:
+        def __init__(self, api_key):
+            self.boards = MockBoards()
+    monkeypatch.setattr("server.MondayClient", MockMondayClient)
+
+    response = client.post("/monday/board/fetch_items_by_board_id", json={"board_id": "b1"})
+    assert response.status_code == 200
+    assert "connection refused" in str(response.json())
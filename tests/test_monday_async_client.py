@@ -0,0 +1,60 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+from monday.exceptions import MondayQueryError
+from monday.resources.types import BoardKind
+from monday_async_client import AsyncMondayClient
+
+
+def crear_cliente(handler):
+    return AsyncMondayClient("token", transport=httpx.MockTransport(handler))
+
+
+def test_create_board_envia_query_del_sdk():
+    async def handler(request):
+        body = json.loads(request.content)
+        assert "create_board" in body["query"]
+        assert request.headers["Authorization"] == "token"
+        return httpx.Response(200, json={"data": {"create_board": {"id": "123"}}})
+
+    async def ejecutar():
+        cliente = crear_cliente(handler)
+        response = await cliente.boards.create_board(board_name="Test", board_kind=BoardKind("public"))
+        await cliente.aclose()
+        return response
+
+    response = asyncio.run(ejecutar())
+    assert response["data"]["create_board"]["id"] == "123"
+
+
+def test_errores_graphql_lanzan_monday_query_error():
+    async def handler(request):
+        return httpx.Response(200, json={"errors": [{"message": "Board not found"}]})
+
+    async def ejecutar():
+        cliente = crear_cliente(handler)
+        try:
+            await cliente.custom._query("query { boards { id } }")
+        finally:
+            await cliente.aclose()
+
+    with pytest.raises(MondayQueryError):
+        asyncio.run(ejecutar())
+
+
+def test_llamadas_concurrentes_no_se_serializan():
+    async def handler(request):
+        await asyncio.sleep(0.2)
+        return httpx.Response(200, json={"data": {"boards": []}})
+
+    async def ejecutar():
+        cliente = crear_cliente(handler)
+        inicio = time.perf_counter()
+        await asyncio.gather(*[cliente.boards.fetch_boards(limit=1, page=pagina) for pagina in range(1, 6)])
+        await cliente.aclose()
+        return time.perf_counter() - inicio
+
+    assert asyncio.run(ejecutar()) < 0.6
@@ -0,0 +1,40 @@
+import time
+
+from monday_cache import CacheRespuestas
+
+
+def test_reutiliza_la_respuesta_hasta_el_ttl():
+    cache = CacheRespuestas(max_bytes=1024, ttls={"columns": 0.05})
+    cache.guardar("columns", {"board_id": "1"}, {"data": {"boards": []}}, ["columnas:1"])
+    respuesta = cache.obtener("columns", {"board_id": "1"})
+    assert respuesta == {"data": {"boards": []}}
+    # Cada lectura devuelve una copia
+    respuesta["data"]["boards"].append("x")
+    assert cache.obtener("columns", {"board_id": "1"}) == {"data": {"boards": []}}
+    time.sleep(0.06)
+    assert cache.obtener("columns", {"board_id": "1"}) is None
+    assert (cache.aciertos, cache.fallos) == (2, 1)
+
+
+def test_desaloja_las_respuestas_usadas_hace_mas_tiempo():
+    cache = CacheRespuestas(max_bytes=60, ttls={"groups": 60})
+    for board_id in ("1", "2"):
+        cache.guardar("groups", {"board_id": board_id}, {"grupos": "x" * 10})
+    cache.obtener("groups", {"board_id": "1"})
+    cache.guardar("groups", {"board_id": "3"}, {"grupos": "x" * 10})
+    assert cache.obtener("groups", {"board_id": "2"}) is None
+    assert cache.obtener("groups", {"board_id": "1"}) is not None
+    assert cache.estado()["desalojos"] == 1
+
+
+def test_invalida_por_etiqueta_y_descarta_consultas_en_curso():
+    cache = CacheRespuestas(max_bytes=1024, ttls={"groups": 60, "columns": 60})
+    cache.guardar("groups", {"board_id": "1"}, {"g": 1}, ["grupos:1"])
+    cache.guardar("columns", {"board_id": "1"}, {"c": 1}, ["columnas:1"])
+    generacion = cache.generacion()
+    cache.invalidar("grupos:1")
+    assert cache.obtener("groups", {"board_id": "1"}) is None
+    assert cache.obtener("columns", {"board_id": "1"}) == {"c": 1}
+    # Una consulta iniciada antes de la invalidacion puede traer datos viejos
+    cache.guardar("groups", {"board_id": "1"}, {"g": 0}, ["grupos:1"], generacion)
+    assert cache.obtener("groups", {"board_id": "1"}) is None
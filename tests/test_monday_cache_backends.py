@@ -0,0 +1,194 @@
+import fnmatch
+import socketserver
+import threading
+import time
+
+import pytest
+
+from monday_cache import CacheRespuestas
+from monday_cache_backends import BackendRedis, BackendSQLite, deserializar, serializar
+
+
+class ServidorRESP(socketserver.ThreadingTCPServer):
+    """Servidor local que responde el subconjunto del protocolo de Redis que usa BackendRedis"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), ManejadorRESP)
+        self.datos = {}
+        self.vencimientos = {}
+        #Cantidad de escrituras por clave, para WATCH
+        self.versiones = {}
+        self.lock = threading.Lock()
+
+    def vigente(self, clave):
+        if clave in self.vencimientos and self.vencimientos[clave] <= time.monotonic():
+            self.datos.pop(clave, None)
+            self.vencimientos.pop(clave, None)
+        return self.datos.get(clave)
+
+    def ejecutar(self, comando, *argumentos):
+        comando = comando.upper()
+        for clave in argumentos if comando == b"DEL" else argumentos[:1] if comando in (b"SET", b"SADD", b"PEXPIRE", b"INCR") else ():
+            self.versiones[clave] = self.versiones.get(clave, 0) + 1
+        if comando == b"GET":
+            return self.vigente(argumentos[0])
+        if comando == b"SET":
+            self.datos[argumentos[0]] = argumentos[1]
+            self.vencimientos[argumentos[0]] = time.monotonic() + int(argumentos[3]) / 1000
+            return "OK"
+        if comando == b"SADD":
+            self.datos.setdefault(argumentos[0], set()).add(argumentos[1])
+            return 1
+        if comando == b"PEXPIRE":
+            self.vencimientos[argumentos[0]] = time.monotonic() + int(argumentos[1]) / 1000
+            return 1
+        if comando == b"SMEMBERS":
+            return sorted(self.vigente(argumentos[0]) or [])
+        if comando == b"DEL":
+            return sum(self.datos.pop(clave, None) is not None for clave in argumentos)
+        if comando == b"INCR":
+            self.datos[argumentos[0]] = str(int(self.vigente(argumentos[0]) or 0) + 1).encode()
+            return int(self.datos[argumentos[0]])
+        if comando == b"SCAN":
+            patron = argumentos[2].decode()
+            return [b"0", [clave for clave in list(self.datos) if fnmatch.fnmatchcase(clave.decode(), patron)]]
+        raise ValueError(comando)
+
+
+class ManejadorRESP(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.vigiladas = {}
+        self.transaccion = None
+        while True:
+            linea = self.rfile.readline()
+            if not linea:
+                return
+            argumentos = []
+            for _ in range(int(linea[1:])):
+                largo = int(self.rfile.readline()[1:])
+                argumentos.append(self.rfile.read(largo + 2)[:-2])
+            with self.server.lock:
+                respuesta = self.procesar(*argumentos)
+            self.wfile.write(codificar(respuesta))
+
+    def procesar(self, comando, *argumentos):
+        """Transacciones de la conexion: WATCH, MULTI y EXEC, el resto de los comandos los ejecuta el servidor"""
+        comando = comando.upper()
+        if comando == b"WATCH":
+            for clave in argumentos:
+                self.vigiladas[clave] = self.server.versiones.get(clave, 0)
+            return "OK"
+        if comando == b"UNWATCH":
+            self.vigiladas = {}
+            return "OK"
+        if comando == b"MULTI":
+            self.transaccion = []
+            return "OK"
+        if comando == b"EXEC":
+            comandos, self.transaccion = self.transaccion, None
+            vigiladas, self.vigiladas = self.vigiladas, {}
+            if any(self.server.versiones.get(clave, 0) != version for clave, version in vigiladas.items()):
+                return None
+            return [self.server.ejecutar(*comando) for comando in comandos]
+        if self.transaccion is not None:
+            self.transaccion.append((comando, *argumentos))
+            return "QUEUED"
+        return self.server.ejecutar(comando, *argumentos)
+
+
+def codificar(respuesta):
+    if respuesta is None:
+        return b"$-1\r\n"
+    if isinstance(respuesta, int):
+        return b":%d\r\n" % respuesta
+    if isinstance(respuesta, str):
+        return b"+%s\r\n" % respuesta.encode()
+    if isinstance(respuesta, bytes):
+        return b"$%d\r\n%s\r\n" % (len(respuesta), respuesta)
+    return b"*%d\r\n" % len(respuesta) + b"".join(codificar(elemento) for elemento in respuesta)
+
+
+@pytest.fixture
+def servidor_redis():
+    servidor = ServidorRESP()
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    yield f"redis://127.0.0.1:{servidor.server_address[1]}/0"
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def test_serializa_respuestas_de_monday():
+    respuesta = {"data": {"boards": [{"id": "1", "name": "Tablero ñ", "columns": None}]}}
+    assert deserializar(serializar(respuesta)) == respuesta
+
+
+def test_sqlite_comparte_respuestas_e_invalidaciones_entre_workers(tmp_path):
+    path = str(tmp_path / "cache.db")
+    worker_1 = CacheRespuestas(max_bytes=1024, ttls={"columns": 60}, backend=BackendSQLite(path, 1024))
+    worker_2 = CacheRespuestas(max_bytes=1024, ttls={"columns": 60}, backend=BackendSQLite(path, 1024))
+
+    worker_1.guardar("columns", {"board_id": "1"}, {"c": 1}, ["columnas:1"])
+    assert worker_2.obtener("columns", {"board_id": "1"}) == {"c": 1}
+
+    generacion = worker_1.generacion()
+    worker_2.invalidar("columnas:1")
+    assert worker_1.obtener("columns", {"board_id": "1"}) is None
+    # La consulta de worker_1 empezo antes de la invalidacion de worker_2
+    worker_1.guardar("columns", {"board_id": "1"}, {"c": 0}, ["columnas:1"], generacion)
+    assert worker_2.obtener("columns", {"board_id": "1"}) is None
+
+
+def test_sqlite_desaloja_las_respuestas_usadas_hace_mas_tiempo(tmp_path):
+    backend = BackendSQLite(str(tmp_path / "cache.db"), max_bytes=20)
+    for clave in ("a", "b", "c"):
+        backend.guardar(clave, b"x" * 8, 60, [])
+        time.sleep(0.01)
+    assert backend.obtener("a") is None
+    assert backend.obtener("c") == b"x" * 8
+    assert backend.estado()["desalojos"] == 1
+
+
+def test_redis_comparte_respuestas_e_invalidaciones_entre_workers(servidor_redis):
+    worker_1 = CacheRespuestas(max_bytes=1024, ttls={"groups": 60}, backend=BackendRedis(servidor_redis))
+    worker_2 = CacheRespuestas(max_bytes=1024, ttls={"groups": 60}, backend=BackendRedis(servidor_redis))
+
+    worker_1.guardar("groups", {"board_id": "1"}, {"g": [1, 2]}, ["grupos:1"])
+    assert worker_2.obtener("groups", {"board_id": "1"}) == {"g": [1, 2]}
+    worker_2.invalidar("grupos:1")
+    assert worker_1.obtener("groups", {"board_id": "1"}) is None
+    assert worker_2.invalidaciones == 1
+
+    worker_1.guardar("groups", {"board_id": "2"}, {"g": []}, ["grupos:2"])
+    worker_1.limpiar()
+    assert worker_2.obtener("groups", {"board_id": "2"}) is None
+
+
+def test_redis_no_guarda_si_otro_worker_invalida_durante_el_guardado(servidor_redis):
+    worker_1 = BackendRedis(servidor_redis)
+    worker_2 = BackendRedis(servidor_redis)
+    ejecutar_varios = worker_1.cliente.ejecutar_varios
+
+    def invalidar_despues_de_leer_la_generacion(*comandos):
+        respuestas = ejecutar_varios(*comandos)
+        if comandos[0][0] == "WATCH":
+            worker_2.invalidar(["grupos:1"])
+        return respuestas
+
+    worker_1.cliente.ejecutar_varios = invalidar_despues_de_leer_la_generacion
+    assert not worker_1.guardar("groups:1", b"viejo", 60, ["grupos:1"], worker_1.generacion())
+    assert worker_2.obtener("groups:1") is None
+
+    worker_1.cliente.ejecutar_varios = ejecutar_varios
+    assert worker_1.guardar("groups:1", b"nuevo", 60, ["grupos:1"], worker_1.generacion())
+    assert worker_2.obtener("groups:1") == b"nuevo"
+    assert worker_2.invalidar(["grupos:1"]) == 1
+
+
+def test_redis_caido_consulta_monday_sin_cache():
+    cache = CacheRespuestas(max_bytes=1024, ttls={"users": 60}, backend=BackendRedis("redis://127.0.0.1:1/0"))
+    cache.guardar("users", {}, {"u": 1})
+    assert cache.obtener("users", {}) is None
+    assert cache.errores == 2
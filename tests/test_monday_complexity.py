@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+import httpx
+from graphql_batcher import MutationBatcher
+from monday import MondayClient
+from monday_async_client import AsyncMondayClient
+from monday_complexity import PresupuestoComplejidad, agregar_complejidad, medir_complejidad
+from monday_rate_limiter import MondayRateLimiter
+
+
+def test_agregar_complejidad_en_la_seleccion_principal():
+    query = agregar_complejidad("mutation { create_item (board_id: 1, item_name: \"a {b}\") { id } }")
+    assert query.startswith("mutation { complexity { before after query reset_in_x_seconds }")
+    assert query.count("complexity") == 1
+    assert agregar_complejidad(query) == query
+    assert "complexity" in agregar_complejidad("query ($ids: [ID!]) { boards (ids: $ids) { id } }").split("boards")[0]
+
+
+def test_cliente_async_registra_la_complejidad():
+    async def handler(request):
+        body = json.loads(request.content)
+        assert "complexity { before after query reset_in_x_seconds }" in body["query"]
+        return httpx.Response(200, json={"data": {
+            "boards": [{"id": "1"}],
+            "complexity": {"before": 5000000, "after": 4999000, "query": 1000, "reset_in_x_seconds": 40}
+        }})
+
+    presupuesto = PresupuestoComplejidad()
+
+    async def ejecutar():
+        cliente = AsyncMondayClient("token", transport=httpx.MockTransport(handler), presupuesto=presupuesto)
+        response = await cliente.boards.fetch_boards()
+        await cliente.aclose()
+        return response
+
+    response = asyncio.run(ejecutar())
+    assert "complexity" not in response["data"]
+    estado = presupuesto.estado()
+    assert estado["limite"] == 5000000
+    assert estado["disponible_monday"] == 4999000
+    assert estado["costo_promedio"] == 1000
+    assert 39 <= estado["reset_en_segundos"] <= 40
+
+
+def test_cliente_sdk_registra_la_complejidad():
+    presupuesto = PresupuestoComplejidad()
+    cliente = MondayClient("token")
+    queries = []
+
+    def execute(query, variables=None):
+        queries.append(query)
+        return {"data": {"boards": [], "complexity": {"before": 100, "after": 90, "query": 10, "reset_in_x_seconds": 30}}}
+
+    cliente.boards.client.execute = execute
+    medir_complejidad(cliente.boards.client, presupuesto)
+    response = cliente.boards.fetch_boards()
+    assert "complexity" in queries[0]
+    assert response == {"data": {"boards": []}}
+    assert presupuesto.disponible() == 90
+
+
+def test_limitador_espera_el_reset_si_no_alcanza_el_presupuesto():
+    presupuesto = PresupuestoComplejidad()
+    presupuesto.registrar({"before": 1000, "after": 600, "query": 400, "reset_in_x_seconds": 30})
+    limitador = MondayRateLimiter(requests_por_minuto=6000, rafaga=10, presupuesto=presupuesto)
+    assert limitador.reservar() == 0
+    # El costo estimado se descuenta del presupuesto hasta la proxima respuesta de Monday
+    assert presupuesto.disponible() == 200
+    assert 29 <= limitador.reservar() <= 30
+
+
+def test_batcher_acota_el_lote_al_presupuesto_disponible():
+    class MockCustom:
+        def __init__(self):
+            self.documentos = []
+
+        def _query(self, query):
+            self.documentos.append(query)
+            return {"data": {}}
+
+    class MockClient:
+        custom = MockCustom()
+
+    presupuesto = PresupuestoComplejidad()
+    presupuesto.registrar({"before": 1000000, "after": 30000, "query": 10000, "reset_in_x_seconds": 30})
+    batcher = MutationBatcher(MockClient(), max_operaciones=25, presupuesto=presupuesto)
+    for i in range(6):
+        batcher.agregar(f"delete_item (item_id: {i}) {{ id }}")
+    batcher.ejecutar()
+    assert batcher.cantidad_requests == 2
@@ -0,0 +1,39 @@
+import asyncio
+import time
+
+from monday_executor import MondayExecutor
+
+
+def test_ejecutar_respeta_limite_y_registra_espera():
+    executor = MondayExecutor(max_workers=2)
+
+    def llamada_lenta():
+        time.sleep(0.1)
+        return "ok"
+
+    async def ejecutar():
+        return await asyncio.gather(*[executor.ejecutar(llamada_lenta) for _ in range(4)])
+
+    inicio = time.perf_counter()
+    resultados = asyncio.run(ejecutar())
+    assert time.perf_counter() - inicio >= 0.2
+    assert resultados == ["ok"] * 4
+    metrica = executor.get_metricas()["test_ejecutar_respeta_limite_y_registra_espera.<locals>.llamada_lenta"]
+    assert metrica["cantidad"] == 4
+    assert metrica["espera_max_ms"] >= 90
+    executor.cerrar()
+
+
+def test_event_loop_no_se_bloquea():
+    executor = MondayExecutor(max_workers=1)
+
+    async def ejecutar():
+        lenta = asyncio.ensure_future(executor.ejecutar(time.sleep, 0.3))
+        inicio = time.perf_counter()
+        await asyncio.sleep(0.05)
+        demora = time.perf_counter() - inicio
+        await lenta
+        return demora
+
+    assert asyncio.run(ejecutar()) < 0.2
+    executor.cerrar()
@@ -0,0 +1,26 @@
+import pytest
+from monday import MondayClient
+from monday_pool import MondayClientPool
+
+
+def test_get_client_reutiliza_instancia():
+    class MockMondayClient:
+        def __init__(self, api_key):
+            self.api_key = api_key
+
+    pool = MondayClientPool()
+    cliente = pool.get_client(MockMondayClient, "key")
+    assert pool.get_client(MockMondayClient, "key") is cliente
+    assert pool.get_client(MockMondayClient, "otra_key") is not cliente
+
+
+def test_recursos_comparten_pool_de_conexiones():
+    pool = MondayClientPool(pool_size=4, timeout=5, connect_timeout=2)
+    cliente = pool.get_client(MondayClient, "key")
+    http = pool.get_http()
+    assert cliente.boards.client._http is http
+    assert cliente.items.client._http is http
+    assert cliente.custom.client._http is http
+    assert cliente.items.client.timeout.connect_timeout == 2
+    pool.cerrar()
+    assert pool.get_client(MondayClient, "key") is not cliente
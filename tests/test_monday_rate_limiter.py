@@ -0,0 +1,52 @@
+import time
+
+import httpx
+from monday.exceptions import MondayQueryError
+from monday_rate_limiter import ClienteLimitado, MondayRateLimiter, segundos_retry_after
+
+
+def test_token_bucket_limita_la_velocidad():
+    limitador = MondayRateLimiter(requests_por_minuto=600, rafaga=2)
+    inicio = time.perf_counter()
+    for _ in range(5):
+        limitador.adquirir()
+    # 2 de rafaga y 3 a 10 requests por segundo
+    assert time.perf_counter() - inicio >= 0.25
+
+
+def test_limite_reduce_velocidad_y_exito_la_recupera():
+    limitador = MondayRateLimiter(requests_por_minuto=600, rafaga=2)
+    limitador.informar_limite(0.1)
+    assert limitador.tasa == 5
+    assert limitador.reservar() >= 0.09
+    for _ in range(20):
+        limitador.informar_exito()
+    assert limitador.tasa == limitador.tasa_maxima
+
+
+def test_segundos_retry_after_lee_las_senales_de_monday():
+    response = httpx.Response(429, headers={"Retry-After": "7"}, request=httpx.Request("POST", "https://api.monday.com/v2"))
+    assert segundos_retry_after(httpx.HTTPStatusError("429", request=response.request, response=response)) == 7
+    assert segundos_retry_after(Exception('HTTP 429: {"retry_in_seconds": 12}')) == 12
+    error = MondayQueryError("Complexity budget exhausted", [{"message": "x", "extensions": {"code": "ComplexityException", "retry_in_seconds": 20}}])
+    assert segundos_retry_after(error) == 20
+    assert segundos_retry_after(Exception("Complexity budget exhausted, query cost 30001 budget remaining 6000 out of 1000000 reset in 22 seconds")) == 22
+    assert segundos_retry_after(Exception("Board not found")) is None
+
+
+def test_cliente_limitado_informa_errores_de_limite():
+    class MockCustom:
+        def _query(self, query):
+            raise MondayQueryError("Rate Limit Exceeded", [{"message": "Rate Limit Exceeded", "extensions": {"code": "RATE_LIMIT_EXCEEDED", "retry_in_seconds": 1}}])
+
+    class MockMondayClient:
+        def __init__(self):
+            self.custom = MockCustom()
+
+    limitador = MondayRateLimiter()
+    cliente = ClienteLimitado(MockMondayClient(), limitador)
+    try:
+        cliente.custom._query("query { boards { id } }")
+    except MondayQueryError:
+        pass
+    assert limitador.cantidad_limites == 1
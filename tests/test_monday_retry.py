@@ -0,0 +1,103 @@
+import httpx
+import pytest
+import urllib3
+from monday.exceptions import MondayQueryError
+from monday_retry import ClienteConReintentos, PoliticaReintento, ResultadoIncierto, es_idempotente, es_reintentable
+
+
+def test_clasifica_errores_transitorios_y_definitivos():
+    assert es_reintentable(urllib3.exceptions.HTTPError("HTTP 502: Bad Gateway"))
+    assert es_reintentable(urllib3.exceptions.HTTPError('HTTP 429: {"retry_in_seconds": 3}'))
+    assert es_reintentable(urllib3.exceptions.ReadTimeoutError(None, "/v2", "read timed out"))
+    assert es_reintentable(httpx.ConnectError("connection refused"))
+    assert es_reintentable(MondayQueryError("Internal server error", [{"message": "x", "extensions": {"code": "INTERNAL_SERVER_ERROR"}}]))
+    assert not es_reintentable(urllib3.exceptions.HTTPError("HTTP 400: Bad Request"))
+    assert not es_reintentable(MondayQueryError("Board not found", [{"message": "Board not found"}]))
+    assert not es_reintentable(KeyError("data"))
+
+
+def test_espera_respeta_retry_after():
+    politica = PoliticaReintento(espera_base=0.01, espera_maxima=0.02)
+    error = MondayQueryError("Rate Limit Exceeded", [{"message": "x", "extensions": {"code": "RATE_LIMIT_EXCEEDED", "retry_in_seconds": 5}}])
+    assert politica.calcular_espera(3, error) == 5
+    assert 0 <= politica.calcular_espera(3) <= 0.02
+
+
+def test_reintenta_hasta_exito_y_cuenta_reintentos():
+    contadores = {}
+    politica = PoliticaReintento(espera_base=0.001, contadores=contadores)
+    intentos = []
+
+    def operacion():
+        intentos.append(1)
+        if len(intentos) < 3:
+            raise urllib3.exceptions.HTTPError("HTTP 500: error")
+        return "ok"
+
+    assert politica.ejecutar("items.create_item", operacion) == "ok"
+    assert contadores == {"items.create_item": 2}
+
+
+def test_errores_definitivos_y_tiempo_maximo_cortan_los_reintentos():
+    class MockItems:
+        def __init__(self):
+            self.intentos = 0
+
+        def create_item(self, item_name):
+            self.intentos += 1
+            raise MondayQueryError("Board not found", [{"message": "Board not found"}])
+
+        def archive_item_by_id(self, item_id):
+            self.intentos += 1
+            raise MondayQueryError("Rate Limit Exceeded", [{"message": "x", "extensions": {"code": "RATE_LIMIT_EXCEEDED", "retry_in_seconds": 60}}])
+
+    class MockClient:
+        items = MockItems()
+
+    cliente = ClienteConReintentos(MockClient(), PoliticaReintento(tiempo_maximo=1))
+    with pytest.raises(MondayQueryError):
+        cliente.items.create_item(item_name="a")
+    assert MockClient.items.intentos == 1
+    with pytest.raises(MondayQueryError):
+        cliente.items.archive_item_by_id(item_id=1)
+    assert MockClient.items.intentos == 2
+
+
+def test_las_mutaciones_que_crean_solo_se_reintentan_si_no_llegaron_a_monday():
+    assert not es_idempotente("create_item", (), {"item_name": "a"})
+    assert not es_idempotente("_query", ('mutation { create_subitem (parent_item_id: 1, item_name: "a") { id } }',), {})
+    assert es_idempotente("_query", ("mutation { m1: delete_column (board_id: 1, column_id: \"x\") { id } }",), {})
+    assert es_idempotente("_query", ("query { boards { id } }",), {})
+
+    conexion = urllib3.exceptions.MaxRetryError(None, "/v2", urllib3.exceptions.NewConnectionError(None, "refused"))
+    assert es_reintentable(conexion, idempotente=False)
+    assert es_reintentable(httpx.ConnectTimeout("connect timeout"), idempotente=False)
+    assert es_reintentable(urllib3.exceptions.HTTPError('HTTP 429: {"retry_in_seconds": 3}'), idempotente=False)
+    assert not es_reintentable(urllib3.exceptions.ReadTimeoutError(None, "/v2", "read timed out"), idempotente=False)
+    assert not es_reintentable(urllib3.exceptions.HTTPError("HTTP 502: Bad Gateway"), idempotente=False)
+    assert not es_reintentable(httpx.ReadError("connection reset"), idempotente=False)
+
+
+def test_una_mutacion_que_crea_y_fallo_despues_de_enviarse_no_se_reenvia():
+    class MockCustom:
+        def __init__(self):
+            self.queries = []
+
+        def _query(self, query):
+            self.queries.append(query)
+            raise urllib3.exceptions.ReadTimeoutError(None, "/v2", "read timed out")
+
+    class MockClient:
+        custom = MockCustom()
+
+    contadores = {}
+    cliente = ClienteConReintentos(MockClient(), PoliticaReintento(espera_base=0.001, contadores=contadores))
+    with pytest.raises(ResultadoIncierto) as error:
+        cliente.custom._query('mutation { create_item (board_id: 1, item_name: "a") { id } }')
+    assert isinstance(error.value.error, urllib3.exceptions.ReadTimeoutError)
+    assert len(MockClient.custom.queries) == 1
+    # Las consultas de lectura se siguen reintentando
+    with pytest.raises(urllib3.exceptions.ReadTimeoutError):
+        cliente.custom._query("query { boards { id } }")
+    assert len(MockClient.custom.queries) == 1 + 6
+    assert contadores == {"custom._query": 5}
@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from monday.exceptions import MondayQueryError
+
+from monday_async_client import AsyncMondayClient
+from monday_singleflight import SingleFlight, normalizar_query
+
+
+def test_normalizar_query_ignora_espacios_comas_y_comentarios():
+    query = """
+        query {  # columnas del tablero
+            boards(ids: 123) {
+                columns { id, title  type }
+            }
+        }
+    """
+    assert normalizar_query(query) == "query{boards(ids:123){columns{id title type}}}"
+    # El contenido de los strings se mantiene
+    assert normalizar_query('query { items_page_by_column_values(columns: [{column_id: "name", column_values: ["a,  b # c"]}]) { cursor } }') == \
+        'query{items_page_by_column_values(columns:[{column_id:"name"column_values:["a,  b # c"]}]){cursor}}'
+
+
+def test_queries_identicas_concurrentes_se_envian_una_vez():
+    pedidos = []
+
+    async def handler(request):
+        pedidos.append(json.loads(request.content))
+        await asyncio.sleep(0.1)
+        return httpx.Response(200, json={"data": {"boards": [{"columns": [{"id": "c1"}]}]}})
+
+    async def ejecutar():
+        cliente = AsyncMondayClient("token", transport=httpx.MockTransport(handler))
+        respuestas = await asyncio.gather(
+            cliente.custom._query("query { boards(ids: 1) { columns { id } } }"),
+            cliente.custom._query("query {\n  boards(ids: 1) {\n    columns { id }\n  }\n}"),
+            cliente.custom._query("query { boards(ids: 1) { columns { id } } }"),
+            cliente.custom._query("query { boards(ids: 2) { columns { id } } }"),
+        )
+        estado = cliente.graphql.singleflight.estado()
+        await cliente.aclose()
+        return respuestas, estado
+
+    respuestas, estado = asyncio.run(ejecutar())
+    assert len(pedidos) == 2
+    assert estado == {"en_curso": 0, "ejecutadas": 2, "compartidas": 2}
+    # Cada llamada recibe su propia copia de la respuesta
+    respuestas[0]["data"]["boards"].clear()
+    assert respuestas[1]["data"]["boards"] == [{"columns": [{"id": "c1"}]}]
+
+
+def test_mutations_no_se_agrupan():
+    pedidos = []
+
+    async def handler(request):
+        pedidos.append(request)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"data": {"create_group": {"id": "g1"}}})
+
+    async def ejecutar():
+        cliente = AsyncMondayClient("token", transport=httpx.MockTransport(handler))
+        await asyncio.gather(*[cliente.groups.create_group(board_id="1", group_name="Grupo") for _ in range(3)])
+        await cliente.aclose()
+
+    asyncio.run(ejecutar())
+    assert len(pedidos) == 3
+
+
+def test_el_error_se_informa_a_todas_las_llamadas_agrupadas():
+    async def handler(request):
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"errors": [{"message": "Board not found"}]})
+
+    async def ejecutar():
+        cliente = AsyncMondayClient("token", transport=httpx.MockTransport(handler))
+        resultados = await asyncio.gather(*[cliente.boards.fetch_items_by_board_id(board_ids="1") for _ in range(3)], return_exceptions=True)
+        await cliente.aclose()
+        return resultados
+
+    assert all(isinstance(resultado, MondayQueryError) for resultado in asyncio.run(ejecutar()))
+
+
+def test_si_se_cancela_la_llamada_en_curso_la_siguiente_la_reintenta():
+    llamadas = []
+
+    async def operacion():
+        llamadas.append(1)
+        await asyncio.sleep(0.1)
+        return {"ok": len(llamadas)}
+
+    async def ejecutar():
+        singleflight = SingleFlight()
+        primera = asyncio.create_task(singleflight.ejecutar("clave", operacion))
+        await asyncio.sleep(0)
+        segunda = asyncio.create_task(singleflight.ejecutar("clave", operacion))
+        await asyncio.sleep(0.01)
+        primera.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await primera
+        return await segunda
+
+    assert asyncio.run(ejecutar()) == {"ok": 2}
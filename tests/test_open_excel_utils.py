@@ -0,0 +1,521 @@
+import json
+import re
+
+import pandas as pd
+import pytest
+import urllib3
+from monday.exceptions import MondayQueryError
+from excel_planner import NodoPlan
+from monday_retry import ResultadoIncierto
+from open_excel_utils import ExcelUtilsMonday
+
+
+class MockResource:
+    def __init__(self, client):
+        self.client = client
+
+
+class MockBoards(MockResource):
+    def create_board(self, board_name, board_kind):
+        self.client.boards_creados += 1
+        return self.client.registrar("create_board", board_name, {"create_board": {"id": f"b{self.client.boards_creados}"}})
+
+
+class MockGroups(MockResource):
+    def create_group(self, group_name, board_id):
+        return self.client.registrar("create_group", group_name, {"create_group": {"id": f"g_{group_name}"}})
+
+    def delete_group(self, board_id, group_id):
+        return self.client.registrar("delete_group", group_id, {"delete_group": {"id": group_id}})
+
+
+class MockItems(MockResource):
+    def create_item(self, item_name, board_id, group_id, column_values=None):
+        self.client.board_de_item[f"i_{item_name}"] = board_id
+        return self.client.registrar("create_item", item_name, {"create_item": {"id": f"i_{item_name}"}}, column_values)
+
+
+class MockCustom(MockResource):
+    def _query(self, query):
+        alias = re.findall(r"^\s*(m\d+): (\w+)", query, re.MULTILINE)
+        if alias:
+            for nombre, operacion in alias:
+                self.client.operaciones.append((operacion, nombre, None))
+            self.client.requests += 1
+            return {"data": {nombre: {"id": nombre} for nombre, operacion in alias}}
+        if "create_subitem" in query:
+            nombre = re.search(r'item_name: "(.*)"', query).group(1)
+            column_values = json.loads(json.loads(re.search(r"column_values: (\".*\")", query).group(1))) or None
+            item_id = re.search(r"parent_item_id: (.*),", query).group(1)
+            sub_board = f"sb_{self.client.board_de_item.get(item_id, 'b1')}"
+            return self.client.registrar("create_subitem", nombre, {"create_subitem": {"id": f"s_{nombre}", "board": {"id": sub_board}}}, column_values)
+        if "create_column" in query:
+            return self.client.registrar("create_column", query, {"create_column": {"id": f"col{self.client.requests}"}})
+        if "duplicate_board" in query:
+            self.client.boards_creados += 1
+            nombre = re.search(r'board_name: "(.*)"', query).group(1)
+            return self.client.registrar("duplicate_board", nombre, {"duplicate_board": {"board": {"id": f"b{self.client.boards_creados}"}}})
+        if "items_page_by_column_values" in query:
+            nombre = re.search(r'column_values: \["(.*)"\]', query).group(1)
+            items = [item for item in self.client.existentes if item["name"] == nombre]
+            return self.client.registrar("buscar_item", nombre, {"items_page_by_column_values": {"items": items}})
+        if "subitems" in query:
+            return self.client.registrar("get_sub_board", query, {"items": [{"subitems": [{"id": "s", "board": {"id": "sb1"}}]}]})
+        operacion = re.search(r"mutation\s*{\s*(\w+)", query).group(1)
+        return self.client.registrar(operacion, query, {operacion: {"id": "x"}})
+
+
+class MockMondayClient:
+    def __init__(self):
+        self.operaciones = []
+        self.requests = 0
+        self.existentes = []
+        self.boards_creados = 0
+        self.board_de_item = {}
+        self.boards = MockBoards(self)
+        self.groups = MockGroups(self)
+        self.items = MockItems(self)
+        self.custom = MockCustom(self)
+
+    def registrar(self, operacion, nombre, data, column_values=None):
+        self.operaciones.append((operacion, nombre, column_values))
+        self.requests += 1
+        return {"data": data}
+
+    def nombres(self, operacion):
+        return [nombre for op, nombre, column_values in self.operaciones if op == operacion]
+
+
+@pytest.fixture
+def archivo_excel(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    filas = [
+        ("Proyecto", 1),
+        ("Fase 1", 2),
+        ("Tarea A", 3),
+        ("Sub A1", 4),
+        ("Sub A2", 4),
+        ("Tarea B", 3),
+        ("Fase 2", 2),
+        ("Tarea C", 3),
+        ("Sub C1", 4),
+    ]
+    df = pd.DataFrame({
+        "ID": range(len(filas)),
+        "Name": [nombre for nombre, nivel in filas],
+        "Duration": ["1 day"] * len(filas),
+        "Start": ["January 02, 2024 08:00 AM"] * len(filas),
+        "Finish": ["January 05, 2024 05:00 PM"] * len(filas),
+        "Outline Level": [nivel for nombre, nivel in filas],
+    })
+    path = tmp_path / "plan.xlsx"
+    df.to_excel(path, index=False)
+    return str(path)
+
+
+def procesar(archivo_excel, client, uid="uid1"):
+    excel_monday = ExcelUtilsMonday()
+    excel_monday.esperar = False
+    excel_monday.process_excel_monday(archivo_excel, False, client, uid, 0, False)
+    return excel_monday
+
+
+def test_process_excel_crea_la_jerarquia(archivo_excel):
+    client = MockMondayClient()
+    excel_monday = procesar(archivo_excel, client)
+    assert not excel_monday.error, excel_monday.message
+    assert client.nombres("create_board") == ["Proyecto"]
+    assert client.nombres("create_group") == ["Fase 1", "Fase 2"]
+    # Los items de grupos distintos se crean en paralelo
+    assert sorted(client.nombres("create_item")) == ["Tarea A", "Tarea B", "Tarea C"]
+    assert sorted(client.nombres("create_subitem")) == ["Sub A1", "Sub A2", "Sub C1"]
+
+
+def test_process_excel_envia_fechas_al_crear(archivo_excel):
+    client = MockMondayClient()
+    excel_monday = procesar(archivo_excel, client)
+    assert not excel_monday.error, excel_monday.message
+    items = [column_values for op, nombre, column_values in client.operaciones if op == "create_item"]
+    assert all(len(column_values) == 2 for column_values in items)
+    assert {"date": "2024-01-02", "time": "11:00:00"} in items[0].values()
+    subitems = [column_values for op, nombre, column_values in client.operaciones if op == "create_subitem"]
+    # El primer subitem crea el sub board y sus fechas se asignan despues de crear las columnas
+    assert subitems[0] is None
+    assert all(len(column_values) == 2 for column_values in subitems[1:])
+    assert client.nombres("change_simple_column_value") == []
+
+
+def test_process_excel_agrupa_mutaciones_independientes(archivo_excel):
+    client = MockMondayClient()
+    excel_monday = procesar(archivo_excel, client)
+    assert not excel_monday.error, excel_monday.message
+    assert excel_monday.batcher.cantidad_requests < excel_monday.batcher.cantidad_mutaciones
+    assert len(client.nombres("delete_column")) == 3
+
+
+def test_process_excel_reintenta_errores_transitorios(archivo_excel, monkeypatch):
+    monkeypatch.setenv("MONDAY_RETRY_ESPERA_BASE", "0.01")
+    client = MockMondayClient()
+    create_item = client.items.create_item
+    fallas = []
+
+    def create_item_con_falla(item_name, board_id, group_id, column_values=None):
+        fallas.append(1)
+        if len(fallas) == 1:
+            # El pedido no llego a Monday, se reenvia
+            raise urllib3.exceptions.MaxRetryError(None, "/v2", urllib3.exceptions.NewConnectionError(None, "refused"))
+        respuesta = create_item(item_name, board_id, group_id, column_values)
+        if len(fallas) == 2:
+            # Monday creo el item pero la respuesta no llego, se busca antes de reenviarlo
+            client.existentes.append({"id": respuesta["data"]["create_item"]["id"], "name": item_name, "group": {"id": group_id}})
+            raise urllib3.exceptions.HTTPError("HTTP 503: Service Unavailable")
+        return respuesta
+
+    client.items.create_item = create_item_con_falla
+    excel_monday = procesar(archivo_excel, client)
+    assert not excel_monday.error, excel_monday.message
+    assert sorted(client.nombres("create_item")) == ["Tarea A", "Tarea B", "Tarea C"]
+    assert len(client.nombres("buscar_item")) == 1
+    assert excel_monday.reintentos == {"items.create_item": 1}
+
+
+def test_extraer_filas_lee_las_columnas_una_vez(archivo_excel):
+    excel_monday = ExcelUtilsMonday()
+    filas = excel_monday.extraer_filas(pd.read_excel(archivo_excel))
+    assert len(filas) == 9
+    assert filas[0] == ("Proyecto", "2024-01-02 11:00:00", "2024-01-05 20:00:00", 1)
+    assert excel_monday.identify_type(filas[3][3]) == "subiteml1"
+
+
+def test_la_memoria_pico_se_mide_solo_durante_la_lectura():
+    import tracemalloc
+    from open_excel_utils import finalizar_medicion_memoria, iniciar_medicion_memoria
+
+    inicio = iniciar_medicion_memoria()
+    datos = bytearray(8 * 1024 * 1024)
+    assert 7.5 <= finalizar_medicion_memoria(inicio) < 16
+    # Un pico anterior del proceso no se vuelve a informar
+    inicio = iniciar_medicion_memoria()
+    assert finalizar_medicion_memoria(inicio) < 1
+    assert not tracemalloc.is_tracing()
+    del datos
+
+
+def test_parsear_fechas_reporta_valores_invalidos():
+    excel_monday = ExcelUtilsMonday()
+    fechas = excel_monday.parsear_fechas(["January 02, 2024 08:00 AM", "2024/01/02", None], "Start")
+    assert fechas == ["2024-01-02 11:00:00", None, None]
+    assert excel_monday.errores_fechas == [{"fila": 1, "columna": "Start", "valor": "2024/01/02"}]
+    assert excel_monday.parse_date("January 05, 2024 05:00 PM") == "2024-01-05 20:00:00"
+
+
+def test_process_excel_continua_desde_el_mapa_de_ids(archivo_excel):
+    client = MockMondayClient()
+    excel_monday = procesar(archivo_excel, client)
+    assert excel_monday.ids_filas[NodoPlan(2, "item", "Tarea A").clave()] == "i_Tarea A"
+    # Se simula que la ejecucion anterior no llego a crear Tarea C y su subitem
+    excel_monday.ids_filas.pop(NodoPlan(7, "item", "Tarea C").clave())
+    excel_monday.ids_filas.pop(NodoPlan(8, "subiteml1", "Sub C1").clave())
+    excel_monday.error = True
+    excel_monday.salvar_estado(True)
+
+    client = MockMondayClient()
+    continuacion = ExcelUtilsMonday()
+    continuacion.esperar = False
+    continuacion.process_excel_monday(archivo_excel, False, client, "uid1", 0, True)
+    assert not continuacion.error, continuacion.message
+    assert client.nombres("create_board") == []
+    assert client.nombres("create_item") == ["Tarea C"]
+    assert client.nombres("create_subitem") == ["Sub C1"]
+    assert continuacion.pos == 8
+
+
+def test_simular_importacion_coincide_con_la_importacion(archivo_excel):
+    simulacion = ExcelUtilsMonday().simular_importacion(archivo_excel, False, "uid_simulacion")
+    assert (simulacion.boards, simulacion.groups, simulacion.items, simulacion.subitems) == (1, 2, 3, 3)
+    assert simulacion.columnas == 4
+    assert simulacion.niveles == 4
+    assert simulacion.segundos_estimados > 0
+
+    client = MockMondayClient()
+    excel_monday = procesar(archivo_excel, client)
+    assert not excel_monday.error, excel_monday.message
+    assert simulacion.requests == client.requests
+    assert simulacion.mutaciones == len([op for op, nombre, column_values in client.operaciones if op != "get_sub_board"])
+
+
+def test_parsear_excel_en_el_pool_de_procesos(archivo_excel):
+    from excel_process_pool import PoolParseo
+    from open_excel_utils import parsear_excel
+
+    config = ExcelUtilsMonday().get_config_parseo()
+    pool = PoolParseo(max_procesos=1)
+    try:
+        resultado = pool.ejecutar(parsear_excel, archivo_excel, config)
+    finally:
+        pool.cerrar()
+    assert resultado["error"] is None
+    assert resultado["columnas"][0][:3] == ["Proyecto", "Fase 1", "Tarea A"]
+    assert resultado["plan"]["tipos"][:4] == ["board", "group", "item", "subiteml1"]
+    assert resultado["plan"]["padres"][:4] == [-1, 0, 1, 2]
+
+    config["nivel_column_name"] = "Nivel"
+    assert "Nivel" in PoolParseo(max_procesos=0).ejecutar(parsear_excel, archivo_excel, config)["error"]
+
+
+def test_leer_dataframe_solo_carga_las_columnas_usadas(archivo_excel, monkeypatch):
+    monkeypatch.setenv("MONDAY_EXCEL_ENGINE", "openpyxl")
+    excel_monday = ExcelUtilsMonday()
+    df = excel_monday.leer_dataframe(archivo_excel)
+    assert sorted(df.columns) == ["Finish", "Name", "Outline Level", "Start"]
+    assert excel_monday.estadisticas_lectura["motor"] == "openpyxl"
+    assert excel_monday.estadisticas_lectura["filas"] == 9
+    assert excel_monday.estadisticas_lectura["segundos"] >= 0
+
+
+def test_process_excel_streaming_por_bloques(archivo_excel):
+    client = MockMondayClient()
+    excel_monday = ExcelUtilsMonday()
+    excel_monday.esperar = False
+    excel_monday.streaming = True
+    excel_monday.tamano_bloque_lectura = 2
+    excel_monday.process_excel_monday(archivo_excel, False, client, "uid1", 0, False)
+    assert not excel_monday.error, excel_monday.message
+    assert client.nombres("create_board") == ["Proyecto"]
+    assert client.nombres("create_group") == ["Fase 1", "Fase 2"]
+    assert len(client.nombres("delete_group")) == 1
+    assert client.nombres("create_item") == ["Tarea A", "Tarea B", "Tarea C"]
+    assert client.nombres("create_subitem") == ["Sub A1", "Sub A2", "Sub C1"]
+    assert len(excel_monday.ids_filas) == 9
+    assert excel_monday.pos == 8
+    assert excel_monday.estadisticas_lectura["filas"] == 9
+
+    streaming = ExcelUtilsMonday()
+    streaming.tamano_bloque_lectura = 4
+    assert list(streaming.iterar_filas(archivo_excel)) == ExcelUtilsMonday().extraer_filas(pd.read_excel(archivo_excel))
+
+
+def test_streaming_con_un_board_al_final_de_un_bloque(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    filas = [("Proyecto1", 1), ("Fase 1", 2), ("Tarea A", 3), ("Proy2", 1), ("Fase X", 2), ("Tarea X", 3)]
+    pd.DataFrame({
+        "ID": range(len(filas)),
+        "Name": [nombre for nombre, nivel in filas],
+        "Duration": ["1 day"] * len(filas),
+        "Start": ["January 02, 2024 08:00 AM"] * len(filas),
+        "Finish": ["January 05, 2024 05:00 PM"] * len(filas),
+        "Outline Level": [nivel for nombre, nivel in filas],
+    }).to_excel(tmp_path / "plan.xlsx", index=False)
+
+    client = MockMondayClient()
+    excel_monday = ExcelUtilsMonday()
+    excel_monday.esperar = False
+    excel_monday.streaming = True
+    # Proy2 es la ultima fila del primer bloque, su primer grupo llega en el bloque siguiente
+    excel_monday.tamano_bloque_lectura = 4
+    excel_monday.process_excel_monday(str(tmp_path / "plan.xlsx"), False, client, "uid1", 0, False)
+    assert not excel_monday.error, excel_monday.message
+    assert client.nombres("create_board") == ["Proyecto1", "Proy2"]
+    assert client.nombres("create_group") == ["Fase 1", "Fase X"]
+    assert client.nombres("create_item") == ["Tarea A", "Tarea X"]
+    # El grupo inicial se elimina una vez por board
+    assert len(client.nombres("delete_group")) == 2
+
+
+class CaidaDelProceso(BaseException):
+    """Simula que el proceso se corta sin pasar por el manejo de errores"""
+
+
+def test_continuar_despues_de_una_caida_usa_el_journal(archivo_excel, monkeypatch):
+    monkeypatch.setenv("MONDAY_JOURNAL_FILAS", "1")
+    client = MockMondayClient()
+    create_item = client.items.create_item
+
+    def create_item_con_caida(item_name, *args, **kwargs):
+        respuesta = create_item(item_name, *args, **kwargs)
+        if item_name == "Tarea C":
+            # Monday creo el item pero el proceso se corto antes de registrar el id
+            raise CaidaDelProceso()
+        return respuesta
+
+    client.items.create_item = create_item_con_caida
+    with pytest.raises(CaidaDelProceso):
+        procesar(archivo_excel, client)
+
+    client = MockMondayClient()
+    client.existentes = [{"id": "i_Tarea C", "name": "Tarea C", "group": {"id": "g_Fase 2"}}]
+    continuacion = ExcelUtilsMonday()
+    continuacion.esperar = False
+    continuacion.process_excel_monday(archivo_excel, False, client, "uid1", 0, True)
+    assert not continuacion.error, continuacion.message
+    assert client.nombres("create_board") == []
+    assert client.nombres("create_group") == []
+    # Tarea C quedo en curso: se reconcilia con una consulta en vez de crearla otra vez
+    assert client.nombres("buscar_item") == ["Tarea C"]
+    assert client.nombres("create_item") == []
+    assert continuacion.ids_filas[NodoPlan(7, "item", "Tarea C").clave()] == "i_Tarea C"
+    # La caida fue antes del nivel de subitems, ninguno se habia creado
+    assert sorted(client.nombres("create_subitem")) == ["Sub A1", "Sub A2", "Sub C1"]
+
+
+def test_cada_board_tiene_su_sub_board_sin_consultarlo(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    filas = [("P1", 1), ("F1", 2), ("T1", 3), ("S1", 4), ("S2", 4), ("P2", 1), ("F2", 2), ("T2", 3), ("S3", 4)]
+    pd.DataFrame({
+        "Name": [nombre for nombre, nivel in filas],
+        "Start": ["January 02, 2024 08:00 AM"] * len(filas),
+        "Finish": ["January 05, 2024 05:00 PM"] * len(filas),
+        "Outline Level": [nivel for nombre, nivel in filas],
+    }).to_excel(tmp_path / "dos_boards.xlsx", index=False)
+    archivo = str(tmp_path / "dos_boards.xlsx")
+
+    simulacion = ExcelUtilsMonday().simular_importacion(archivo, False, "uid_simulacion")
+    client = MockMondayClient()
+    excel_monday = procesar(archivo, client)
+    assert not excel_monday.error, excel_monday.message
+    assert client.nombres("get_sub_board") == []
+    assert excel_monday.sub_boards == {
+        "b1": {"id": "sb_b1", "columnas": excel_monday.sub_boards["b1"]["columnas"], "limpio": True},
+        "b2": {"id": "sb_b2", "columnas": excel_monday.sub_boards["b2"]["columnas"], "limpio": True},
+    }
+    assert len(client.nombres("create_column")) == 8
+    assert len(client.nombres("delete_column")) == 6
+    assert simulacion.columnas == 8
+    assert simulacion.requests == client.requests
+    assert simulacion.mutaciones == len(client.operaciones)
+
+
+def test_importacion_con_plantilla_duplica_el_board(archivo_excel, monkeypatch):
+    import open_excel_utils
+
+    monkeypatch.setattr(open_excel_utils, "_plantilla", None)
+    simulacion_inicial = ExcelUtilsMonday()
+    simulacion_inicial.usar_plantilla = True
+    simulacion = simulacion_inicial.simular_importacion(archivo_excel, False, "uid_simulacion")
+
+    client = MockMondayClient()
+    excel_monday = ExcelUtilsMonday()
+    excel_monday.esperar = False
+    excel_monday.usar_plantilla = True
+    excel_monday.process_excel_monday(archivo_excel, False, client, "uid1", 0, False)
+    assert not excel_monday.error, excel_monday.message
+    assert client.nombres("create_board") == ["Plantilla importacion excel"]
+    assert client.nombres("duplicate_board") == ["Proyecto"]
+    assert len(client.nombres("create_column")) == 4
+    assert len(client.nombres("delete_column")) == 3
+    assert simulacion.requests == client.requests
+    assert simulacion.mutaciones == len(client.operaciones)
+
+    # La segunda importacion reutiliza la plantilla guardada: un duplicate_board por board y nada mas de configuracion
+    client = MockMondayClient()
+    excel_monday = ExcelUtilsMonday()
+    excel_monday.esperar = False
+    excel_monday.usar_plantilla = True
+    excel_monday.process_excel_monday(archivo_excel, False, client, "uid2", 0, False)
+    assert not excel_monday.error, excel_monday.message
+    assert client.nombres("create_board") == []
+    assert client.nombres("create_column") == []
+    assert client.nombres("delete_column") == []
+    subitems = [column_values for op, nombre, column_values in client.operaciones if op == "create_subitem"]
+    assert all(len(column_values) == 2 for column_values in subitems)
+
+
+def test_duplicar_plantilla_solo_la_recrea_si_el_board_ya_no_existe(tmp_path, monkeypatch):
+    import open_excel_utils
+
+    monkeypatch.chdir(tmp_path)
+    plantilla = {"board_id": "p1", "columnas": ["c1", "c2"], "columnas_sub": ["s1", "s2"]}
+    monkeypatch.setattr(open_excel_utils, "_plantilla", plantilla)
+    client = MockMondayClient()
+    query = client.custom._query
+    errores = [urllib3.exceptions.HTTPError("HTTP 400: Bad Request")]
+
+    def query_con_falla(texto):
+        if "duplicate_board" in texto and "board_id: p1," in texto:
+            raise errores[0]
+        return query(texto)
+
+    client.custom._query = query_con_falla
+    excel_monday = ExcelUtilsMonday()
+    # Otros errores no descartan la plantilla
+    with pytest.raises(urllib3.exceptions.HTTPError):
+        excel_monday.duplicar_plantilla(client, "Proyecto")
+    assert open_excel_utils._plantilla is plantilla
+    assert client.nombres("create_board") == []
+
+    errores[0] = MondayQueryError("Board not found", [{"message": "Board not found", "extensions": {"code": "ResourceNotFoundException"}}])
+    board_id, columnas = excel_monday.duplicar_plantilla(client, "Proyecto")
+    assert client.nombres("create_board") == ["Plantilla importacion excel"]
+    assert client.nombres("duplicate_board") == ["Proyecto"]
+    assert open_excel_utils._plantilla["board_id"] != "p1"
+
+
+class MockBusqueda:
+    def __init__(self, data):
+        self.data = data
+        self.custom = self
+
+    def _query(self, query):
+        return {"data": self.data}
+
+
+def test_buscar_existente_descarta_ids_de_otras_filas_y_elige_el_mas_reciente():
+    board = NodoPlan(0, "board", "Proyecto")
+    board.monday_id = "10"
+    grupo = NodoPlan(1, "group", "Fase", padre=board)
+    grupo.monday_id = "g1"
+    item = NodoPlan(3, "item", "Tarea", padre=grupo)
+    excel_monday = ExcelUtilsMonday()
+    # Un hermano con el mismo titulo ya tiene su id registrado
+    excel_monday.ids_filas = {"2:hermano": "101"}
+
+    items = [{"id": id_item, "name": "Tarea", "group": {"id": "g1"}} for id_item in ("101", "105", "103")]
+    assert excel_monday.buscar_existente(MockBusqueda({"items_page_by_column_values": {"items": items}}), item) == "105"
+    assert excel_monday.buscar_existente(MockBusqueda({"items_page_by_column_values": {"items": items[:1]}}), item) is None
+
+    # Los boards vienen del mas nuevo al mas viejo, uno viejo con el mismo nombre no se reutiliza
+    boards = [{"id": "300", "name": "Proyecto"}, {"id": "120", "name": "Proyecto"}]
+    assert excel_monday.buscar_existente(MockBusqueda({"boards": boards}), NodoPlan(0, "board", "Proyecto")) == "300"
+
+
+def test_una_creacion_incierta_se_reconcilia_antes_de_reenviarla():
+    board = NodoPlan(0, "board", "Proyecto")
+    board.monday_id = "10"
+    grupo = NodoPlan(1, "group", "Fase", padre=board)
+    grupo.monday_id = "g1"
+    item = NodoPlan(2, "item", "Tarea", padre=grupo)
+    grupo.hijos.append(item)
+    excel_monday = ExcelUtilsMonday()
+    envios = []
+
+    def crear():
+        envios.append(1)
+        raise ResultadoIncierto("items.create_item", TimeoutError("read timed out"))
+
+    # Monday aplico la mutacion aunque la respuesta no llego, se usa el item existente
+    items = [{"id": "105", "name": "Tarea", "group": {"id": "g1"}}]
+    assert excel_monday.crear_o_reconciliar(MockBusqueda({"items_page_by_column_values": {"items": items}}), item, crear) == "105"
+    assert len(envios) == 1
+    # No existe, se vuelve a enviar
+    with pytest.raises(ResultadoIncierto):
+        excel_monday.crear_o_reconciliar(MockBusqueda({"items_page_by_column_values": {"items": []}}), item, crear)
+    assert len(envios) == 3
+
+
+def test_la_intencion_se_confirma_una_vez_por_nivel(archivo_excel, monkeypatch):
+    import excel_journal
+    monkeypatch.setenv("MONDAY_JOURNAL_FILAS", "1000")
+    monkeypatch.setenv("MONDAY_JOURNAL_SEGUNDOS", "1000")
+    escrituras = []
+    confirmar = excel_journal.JournalImportacion._confirmar
+
+    def confirmar_contando(journal):
+        if journal.pendientes:
+            escrituras.append(len(journal.pendientes))
+        confirmar(journal)
+
+    monkeypatch.setattr(excel_journal.JournalImportacion, "_confirmar", confirmar_contando)
+    excel_monday = procesar(archivo_excel, MockMondayClient())
+    assert not excel_monday.error, excel_monday.message
+    # board, grupos, items y subitems: una escritura forzada por nivel y no una por fila
+    assert escrituras[:4] == [1, 1 + 2, 2 + 3, 3 + 3]